@@ -0,0 +1,79 @@
+"""
+Compare the binary event codec with pickle and JSON: encode and decode throughput and size, one by one and in batches.
+Usage: python -m benchmarks.codec [events]
+"""
+import json
+import pickle
+import time
+from dataclasses import asdict, dataclass
+from sys import argv
+from typing import Any, Callable
+
+from framework.types.event import BaseEvent, event_codec
+
+
+@dataclass(frozen=True)
+class OrderEvent(BaseEvent):
+    order_id: int
+    symbol: str
+    price: float
+    quantity: int
+    is_buy: bool
+    note: str = ""
+
+
+def _make_events(count: int) -> list[OrderEvent]:
+    return [OrderEvent(index, f"SYM{index % 100}", 100.0 + index / 100, index % 1000, index % 2 == 0, "limit") for index in range(count)]
+
+
+def _json_dumps(events: list[OrderEvent]) -> bytes:
+    return json.dumps([[type(event).__qualname__, asdict(event)] for event in events]).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> list[OrderEvent]:
+    return [OrderEvent(**fields) for _, fields in json.loads(data)]
+
+
+def _measure(func: Callable[[], Any], count: int) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, count / (time.perf_counter() - start)
+
+
+def run(count: int) -> dict[str, dict[str, float]]:
+    events = _make_events(count)
+    results: dict[str, dict[str, float]] = {}
+
+    singles = {
+        "pickle": (lambda event: pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+        "json": (lambda event: _json_dumps([event]), lambda data: _json_loads(data)[0]),
+        "codec": (event_codec.encode, event_codec.decode),
+    }
+    for name, (dumps, loads) in singles.items():
+        payloads, encode_rate = _measure(lambda: [dumps(event) for event in events], count)
+        decoded, decode_rate = _measure(lambda: [loads(payload) for payload in payloads], count)
+        assert decoded == events
+        results[name] = {"encode_per_second": encode_rate, "decode_per_second": decode_rate, "bytes_per_event": sum(map(len, payloads)) / count}
+
+    batches = {
+        "pickle_batch": (lambda: pickle.dumps(events, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+        "json_batch": (lambda: _json_dumps(events), _json_loads),
+        "codec_batch": (lambda: event_codec.encode_batch(events), lambda data: event_codec.decode_batch(memoryview(data))),
+    }
+    for name, (dumps, loads) in batches.items():
+        payload, encode_rate = _measure(dumps, count)
+        decoded, decode_rate = _measure(lambda: loads(payload), count)
+        assert decoded == events
+        results[name] = {"encode_per_second": encode_rate, "decode_per_second": decode_rate, "bytes_per_event": len(payload) / count}
+
+    return results
+
+
+def main() -> None:
+    count = int(argv[1]) if len(argv) > 1 else 100_000
+    for name, result in run(count).items():
+        print(f"{name}: " + ", ".join(f"{key}={value:.1f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare slotted events and callback records (@dataclass(frozen=True, slots=True) with fast_init) with plain frozen dataclasses of the same fields:
+memory and allocations per instance, and construction rate.
+Usage: python -m benchmarks.events [instances]
+"""
+import time
+import tracemalloc
+from dataclasses import dataclass
+from sys import argv
+from typing import Any, Callable
+
+from framework.types.callback import CallbackFunction, CallbackItem
+from framework.types.event import BaseEvent
+from framework.utils.slots import fast_init
+
+
+@fast_init
+@dataclass(frozen=True, slots=True)
+class SlottedEvent(BaseEvent):
+    order_id: int
+    symbol: str
+    price: float
+    quantity: int = 0
+
+
+@dataclass(frozen=True)
+class DictEvent(BaseEvent):
+    order_id: int
+    symbol: str
+    price: float
+    quantity: int = 0
+
+
+@dataclass(frozen=True)
+class DictCallbackItem:
+    type: str
+    identifier: str
+    func_name: str
+    origin_func: CallbackFunction
+    actual_func: CallbackFunction
+    wrapper_args: Any = None
+
+
+def _callback() -> None:
+    return None
+
+
+def _measure_memory(factory: Callable[[int], Any], count: int) -> tuple[float, float]:
+    tracemalloc.start()
+    instances = [factory(index) for index in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del instances
+    return current / count, allocations / count
+
+
+def _measure_rate(factory: Callable[[int], Any], count: int) -> float:
+    start = time.perf_counter()
+    for index in range(count):
+        factory(index)
+    return count / (time.perf_counter() - start)
+
+
+def run(count: int) -> dict[str, dict[str, float]]:
+    factories: dict[str, Callable[[int], Any]] = {
+        "event_dict": lambda index: DictEvent(index, "SYM", 1.0),
+        "event_slotted": lambda index: SlottedEvent(index, "SYM", 1.0),
+        "callback_item_dict": lambda index: DictCallbackItem("process", "plugin", "func", _callback, _callback),
+        "callback_item_slotted": lambda index: CallbackItem("process", "plugin", "func", _callback, _callback),
+    }
+
+    results: dict[str, dict[str, float]] = {}
+    for name, factory in factories.items():
+        bytes_per_instance, allocations_per_instance = _measure_memory(factory, count)
+        results[name] = {
+            "bytes_per_instance": bytes_per_instance,
+            "allocations_per_instance": allocations_per_instance,
+            "created_per_second": _measure_rate(factory, count),
+        }
+    return results
+
+
+def main() -> None:
+    count = int(argv[1]) if len(argv) > 1 else 200_000
+    for name, result in run(count).items():
+        print(f"{name}: " + ", ".join(f"{key}={value:.1f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
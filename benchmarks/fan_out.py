@@ -0,0 +1,105 @@
+"""
+Measure the fan-out of events to the callbacks of a plugin through the real chain:
+global event bus -> distributor -> process scheduler -> callbacks.
+Compare fan_out (the callbacks run in the consumer task until they suspend) with asyncio.gather (one task per callback), for 1 to N callbacks.
+Usage: python -m benchmarks.fan_out [events] [callbacks]
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from statistics import quantiles
+from sys import argv
+from typing import Any, Awaitable, Callable
+
+from framework.constants.callback import CALLBACK_TYPE
+from framework.kernel.callback import scheduler
+from framework.kernel.callback.scheduler import ProcessSchedulerItem
+from framework.kernel.event.bus import global_event_bus
+from framework.kernel.event.distributor import event_distributor_manager
+from framework.types.callback import BuiltinProcessWrapperArgs, CallbackItem
+from framework.types.event import BaseEvent
+from framework.utils.fan_out import fan_out
+
+
+IDENTIFIER = "fan_out_benchmark"
+
+
+@dataclass(frozen=True)
+class TickEvent(BaseEvent):
+    index: int
+    sent_at: float
+
+
+async def _gather(funcs: tuple[Callable[..., Awaitable[Any]], ...], *args: Any) -> list[Any]:
+    return list(await asyncio.gather(*(func(*args) for func in funcs)))
+
+
+def _new_callback(latencies: list[float], remaining: list[int], finished: asyncio.Event) -> Callable[[TickEvent], Awaitable[bool]]:
+    async def callback(event: TickEvent) -> bool:
+        latencies.append(time.perf_counter() - event.sent_at)
+        remaining[0] -= 1
+        if not remaining[0]:
+            finished.set()
+        return True
+
+    return callback
+
+
+def _new_callback_item(index: int, func: Callable[[TickEvent], Awaitable[bool]]) -> CallbackItem:
+    func_name = f"callback_{index}"
+    return CallbackItem(
+        CALLBACK_TYPE.PROCESS,
+        IDENTIFIER,
+        func_name,
+        func,
+        func,
+        BuiltinProcessWrapperArgs(origin_func=func, func_name=func_name, identifier=IDENTIFIER, event_type=TickEvent),
+    )
+
+
+async def run(count: int, callbacks: int, fan_out_func: Callable[..., Awaitable[list[Any]]]) -> dict[str, float]:
+    scheduler.fan_out = fan_out_func
+    latencies: list[float] = []
+    remaining = [count * callbacks]
+    finished = asyncio.Event()
+    item = ProcessSchedulerItem(
+        CALLBACK_TYPE.PROCESS,
+        IDENTIFIER,
+        *(_new_callback_item(index, _new_callback(latencies, remaining, finished)) for index in range(callbacks)),
+        process_event_queue_maxsize=1024,
+    )
+    await item.start()
+
+    start = time.perf_counter()
+    for index in range(count):
+        await global_event_bus.put(TickEvent(index, time.perf_counter()))
+    await finished.wait()
+    elapsed = time.perf_counter() - start
+
+    await item.stop()
+    percentiles = quantiles(latencies, n=100)
+    return {
+        "events_per_second": count / elapsed,
+        "latency_p50_ms": percentiles[49] * 1000,
+        "latency_p99_ms": percentiles[98] * 1000,
+    }
+
+
+async def main_async(count: int, max_callbacks: int) -> None:
+    await event_distributor_manager.start()
+    for callbacks in sorted({1, 2, max_callbacks}):
+        for name, func in (("fan_out", fan_out), ("gather", _gather)):
+            result = await run(count, callbacks, func)
+            print(f"callbacks={callbacks} {name}: " + ", ".join(f"{key}={value:.2f}" for key, value in result.items()))
+    scheduler.fan_out = fan_out
+    await event_distributor_manager.stop()
+
+
+def main() -> None:
+    count = int(argv[1]) if len(argv) > 1 else 50_000
+    callbacks = max(1, int(argv[2]) if len(argv) > 2 else 4)
+    asyncio.run(main_async(count, callbacks))
+
+
+if __name__ == "__main__":
+    main()
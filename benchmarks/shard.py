@@ -0,0 +1,131 @@
+"""
+Compare 1 shard with N shards through the real pipeline (global event bus -> distributor -> process scheduler):
+N - 1 heavy plugins (CPU-bound callbacks) and a light plugin (latency sensitive) share the runtime.
+With 1 shard all of them run in the main loop. With N shards each heavy plugin is pinned to its own shard, and the light plugin stays in the main loop.
+The latency of the light plugin is measured from the put into the bus to its callback.
+Usage: python -m benchmarks.shard [shards] [seconds]
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from statistics import quantiles
+from sys import argv
+from typing import Awaitable, Callable
+
+from framework.components.shard import ShardManager
+from framework.constants.callback import CALLBACK_TYPE
+from framework.constants.event import OVERFLOW_POLICY
+from framework.kernel.callback.scheduler import ProcessSchedulerItem
+from framework.kernel.event.bus import global_event_bus
+from framework.kernel.event.distributor import event_distributor_manager
+from framework.types.callback import BuiltinProcessWrapperArgs, CallbackItem
+from framework.types.event import BaseEvent
+
+
+HEAVY_WORK = 200_000
+HEAVY_INTERVAL = 0.005
+LIGHT_INTERVAL = 0.001
+
+
+@dataclass(frozen=True)
+class HeavyEvent(BaseEvent):
+    pass
+
+
+@dataclass(frozen=True)
+class LightEvent(BaseEvent):
+    sent_at: float
+
+
+def _new_plugin(
+        identifier: str,
+        event_type: type[BaseEvent],
+        func: Callable[[BaseEvent], Awaitable[bool]],
+        manager: ShardManager,
+        overflow_policy: str = "",
+) -> ProcessSchedulerItem:
+    func_name = f"{identifier}_callback"
+    callback = CallbackItem(
+        CALLBACK_TYPE.PROCESS,
+        identifier,
+        func_name,
+        func,
+        func,
+        BuiltinProcessWrapperArgs(origin_func=func, func_name=func_name, identifier=identifier, event_type=event_type, serial=True),
+    )
+    return ProcessSchedulerItem(
+        CALLBACK_TYPE.PROCESS,
+        identifier,
+        callback,
+        process_event_queue_maxsize=16,
+        overflow_policy=overflow_policy,
+        shard=manager.get_shard(identifier),
+    )
+
+
+async def run(shards: int, heavy: int, seconds: float) -> dict[str, float]:
+    heavy_plugins = [f"heavy_{index}" for index in range(heavy)]
+    manager = ShardManager(shards, {identifier: index % (shards - 1) + 1 for index, identifier in enumerate(heavy_plugins)} if shards > 1 else {})
+    await manager.start()
+
+    done = [0]
+    lags: list[float] = []
+
+    async def heavy_callback(event: HeavyEvent) -> bool:
+        total = 0
+        for i in range(HEAVY_WORK):
+            total += i
+        done[0] += 1
+        return True
+
+    async def light_callback(event: LightEvent) -> bool:
+        lags.append(time.perf_counter() - event.sent_at)
+        return True
+
+    # The heavy plugins drop the events they cannot keep up with, so they do not hold up the routing of the light events.
+    plugins = [_new_plugin(identifier, HeavyEvent, heavy_callback, manager, OVERFLOW_POLICY.DROP_NEWEST) for identifier in heavy_plugins]
+    plugins.append(_new_plugin("light", LightEvent, light_callback, manager))
+    for plugin in plugins:
+        await plugin.start()
+
+    async def produce_heavy() -> None:
+        while time.perf_counter() < stop_at:
+            await global_event_bus.put(HeavyEvent())
+            await asyncio.sleep(HEAVY_INTERVAL)
+
+    async def produce_light() -> None:
+        while time.perf_counter() < stop_at:
+            await global_event_bus.put(LightEvent(time.perf_counter()))
+            await asyncio.sleep(LIGHT_INTERVAL)
+
+    stop_at = time.perf_counter() + seconds
+    await asyncio.gather(produce_heavy(), produce_light())
+    for plugin in plugins:
+        await plugin.stop(True)
+    await manager.stop()
+
+    percentiles = quantiles(lags, n=100)
+    return {
+        "heavy_per_second": done[0] / seconds,
+        "light_events": len(lags),
+        "light_latency_p50_ms": percentiles[49] * 1000,
+        "light_latency_p99_ms": percentiles[98] * 1000,
+    }
+
+
+async def main_async(shards: int, seconds: float) -> None:
+    await event_distributor_manager.start()
+    for count in (1, shards):
+        result = await run(count, shards - 1, seconds)
+        print(f"shards={count}: " + ", ".join(f"{key}={value:.2f}" for key, value in result.items()))
+    await event_distributor_manager.stop(True)
+
+
+def main() -> None:
+    shards = max(2, int(argv[1]) if len(argv) > 1 else 4)
+    seconds = float(argv[2]) if len(argv) > 2 else 3.0
+    asyncio.run(main_async(shards, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -55,10 +55,13 @@ class BaseCallbackWrapper(ABC):
     def args_type(self) -> Type[BaseCallbackWrapperArgs]:
         return self._args_type
 
+    def get_args(self, func: CallbackFunction, **kwargs) -> BaseCallbackWrapperArgs:
+        return _convert_dataclass(self.args_type, {"origin_func": func, **kwargs})
+
     def __call__(self, func: CallbackFunction, executor: BaseCallbackExecutor | None, **kwargs) -> CallbackFunction:
         if executor is not None:
             func = executor(func, origin_func=func, **kwargs)
-        wrapper_args = _convert_dataclass(self.args_type, {"origin_func": func, **kwargs})
+        wrapper_args = self.get_args(func, **kwargs)
         async def wrapper(*cb_args, **cb_kwargs) -> Any:
             return await self.wrapper(func, wrapper_args, *cb_args, **cb_kwargs)
 
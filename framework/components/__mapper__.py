@@ -1,7 +1,13 @@
 from . import callback
 from . import command_runner
+from . import dead_letter
 from . import lock
+from . import metrics
 from . import module_installer
+from . import process_pool
+from . import shard
+from . import thread_pool
+from . import trace
 from . import trigger
 from ..constants.vmodule import VMODULE_ROOT_PATH, VMODULE_SUBROOT_PATH
 from ..kernel.vmodule.expand import Adder
@@ -11,6 +17,12 @@ adder = Adder(f"{VMODULE_ROOT_PATH.ROOT}.{VMODULE_SUBROOT_PATH.COMPONENTS}")
 
 adder.get_sub_adder("callback").auto_add(callback, recursive=True)
 adder.get_sub_adder("command_runner").auto_add(command_runner)
+adder.get_sub_adder("dead_letter").auto_add(dead_letter)
 adder.get_sub_adder("lock").auto_add(lock)
+adder.get_sub_adder("metrics").auto_add(metrics)
 adder.get_sub_adder("module_installer").auto_add(module_installer)
+adder.get_sub_adder("process_pool").auto_add(process_pool)
+adder.get_sub_adder("shard").auto_add(shard)
+adder.get_sub_adder("thread_pool").auto_add(thread_pool)
+adder.get_sub_adder("trace").auto_add(trace)
 adder.get_sub_adder("trigger").auto_add(trigger)
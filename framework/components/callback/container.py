@@ -1,6 +1,6 @@
 from typing import Callable
 
-from ...types.callback import CallbackItem
+from ...types.callback import BaseCallbackWrapperArgs, CallbackItem
 
 
 class PluginLevelContainer:
@@ -59,9 +59,17 @@ class CallbackContainer:
 
         return self._type_level_containers[cb_type].get_plugin_id()
 
-    def add(self, plugin_id: str, func_name: str, cb_type: str, raw_func: Callable, cb_func: Callable) -> None:
+    def add(
+            self,
+            plugin_id: str,
+            func_name: str,
+            cb_type: str,
+            raw_func: Callable,
+            cb_func: Callable,
+            wrapper_args: BaseCallbackWrapperArgs | None = None,
+    ) -> None:
         container = self._type_level_containers.setdefault(cb_type, TypeLevelContainer(cb_type))
-        container.add(plugin_id, CallbackItem(plugin_id, func_name, cb_type, raw_func, cb_func))
+        container.add(plugin_id, CallbackItem(cb_type, plugin_id, func_name, raw_func, cb_func, wrapper_args))
 
     def remove(self, cb_type: str, plugin_id: str) -> None:
         if cb_type not in self._type_level_containers:
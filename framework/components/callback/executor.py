@@ -1,14 +1,26 @@
 import asyncio
+from inspect import iscoroutinefunction
+from random import random
+from time import time
 from typing import Any
+from weakref import WeakKeyDictionary
 
 from ...base.callback import BaseCallbackExecutor
+from ...constants.callback import RUN_IN
+from ...kernel.dead_letter import global_dead_letter_manager
+from ...kernel.event.bus import global_event_bus
 from ...kernel.logger import get_logger
+from ...kernel.process_pool import global_process_pool_manager
+from ...kernel.shard import global_shard_manager
+from ...kernel.thread_pool import global_thread_pool_manager
+from ...types.event import BaseEvent, SnowXCircuitStateEvent
 from ...types.callback import (
     CallbackFunction,
 
     BuiltinEmptyExecutorArgs,
     BuiltinExecutorArgs,
 )
+from ...utils.breaker import CircuitBreaker, CircuitOpenError
 
 
 LOGGER = get_logger("CallbackExecutor")
@@ -24,33 +36,134 @@ class EmptyExecutor(BaseCallbackExecutor):
 
 class BuiltinExecutor(BaseCallbackExecutor):
     """
-    The default callback executor in the framework. Support timeout control and automatic retry of failure. \n
-    Note: If the callback function is a synchronous function, the timeout parameter is not supported. \n
-    param timeout: Callback execution timeout. If this parameter is 0, then do not set the timeout time. \n
-    param retry_num: Callback retry number. If this parameter is 0, the callback function will not be retryd after the execution fails. \n
-    param retry_interval: Callback retry interval. If this parameter is 0, it will be retryd immediately after the callback execution fails. \n
+    The default callback executor in the framework. Support deadlines, retries with backoff, thread pools and circuit breakers. \n
+    The parameters are described in BuiltinExecutorArgs. If all the attempts of a process callback fail, its event is moved to the dead-letter store.
     """
     def __init__(self):
         super().__init__(BuiltinExecutorArgs)
+        self._breakers: WeakKeyDictionary[CallbackFunction, CircuitBreaker] = WeakKeyDictionary() # Reloaded callback functions are not kept alive.
+        self._publishing: set[asyncio.Task] = set()
+
+    def _get_breaker(self, executor_args: BuiltinExecutorArgs) -> CircuitBreaker | None:
+        if executor_args.breaker_window <= 0:
+            return None
+
+        breaker = self._breakers.get(executor_args.origin_func)
+        if breaker is None:
+            breaker = self._breakers.setdefault(executor_args.origin_func, CircuitBreaker(
+                executor_args.breaker_window,
+                executor_args.breaker_failure_rate,
+                executor_args.breaker_open_timeout,
+            ))
+        return breaker
+
+    def _publish(self, event: SnowXCircuitStateEvent) -> None:
+        """
+        Put the event into the bus in the main loop, by a background task if the bus is full.
+        """
+        try:
+            global_event_bus.put_nowait(event)
+        except asyncio.QueueFull:
+            task = asyncio.create_task(global_event_bus.put(event))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+
+    def _on_state_change(self, executor_args: BuiltinExecutorArgs, breaker: CircuitBreaker, state: str) -> None:
+        if breaker.state == state:
+            return
+
+        LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: Circuit {state} -> {breaker.state}, failure rate: {breaker.failure_rate:.2f}")
+        event = SnowXCircuitStateEvent(executor_args.identifier, executor_args.func_name, breaker.state, breaker.failure_rate)
+        global_shard_manager.call_main(self._publish, event) # The callback may run in a shard.
+
+    @staticmethod
+    def _get_deadline(timeout: int, cb_args: tuple, loop: asyncio.AbstractEventLoop) -> tuple[float, bool]:
+        """
+        :return: The deadline of the invocation in the time of the loop (0 if it has none), and whether it is the deadline of the event.
+        """
+        now = loop.time()
+        deadline = now + timeout if timeout > 0 else 0.0
+        event_deadline = cb_args[0].event_deadline if cb_args and isinstance(cb_args[0], BaseEvent) else 0.0
+        if not event_deadline:
+            return deadline, False
+
+        event_deadline = now + (event_deadline - time()) # Wall clock -> loop clock.
+        if deadline and deadline <= event_deadline:
+            return deadline, False
+        return event_deadline, True
+
+    @staticmethod
+    def _get_retry_interval(executor_args: BuiltinExecutorArgs, retry: int) -> float:
+        interval = max(0, executor_args.retry_interval) * max(1.0, executor_args.retry_backoff) ** retry
+        if executor_args.retry_max_interval > 0:
+            interval = min(interval, executor_args.retry_max_interval)
+
+        jitter = min(max(0.0, executor_args.retry_jitter), 1.0)
+        if jitter:
+            interval *= 1 - jitter * random()
+        return interval
+
+    async def _run(self, cb_func: CallbackFunction, executor_args: BuiltinExecutorArgs, *cb_args, **cb_kwargs) -> tuple[bool, Any | None]:
+        if executor_args.run_in != RUN_IN.THREAD or iscoroutinefunction(cb_func):
+            return await super().executor(cb_func, executor_args, *cb_args, **cb_kwargs)
+
+        return True, await global_thread_pool_manager.run(executor_args.thread_pool, cb_func, *cb_args, **cb_kwargs)
 
     async def executor(self, cb_func: CallbackFunction, executor_args: BuiltinExecutorArgs, *cb_args, **cb_kwargs) -> tuple[bool, Any | None]:
         timeout = max(0, executor_args.timeout)
         retry_num = max(0, executor_args.retry_num)
-        retry_interval = max(0, executor_args.retry_interval)
+        breaker = self._get_breaker(executor_args)
+        loop = asyncio.get_running_loop()
+        # All the attempts and retry intervals share the deadline, and no attempt is started after it.
+        deadline, is_event_deadline = self._get_deadline(timeout, cb_args, loop)
 
+        exception: BaseException | None = None
+        attempts = 0
         for i in range(retry_num + 1):
+            if deadline and loop.time() >= deadline:
+                exception = TimeoutError(f"The deadline of <{executor_args.func_name}> is exceeded")
+                if attempts:
+                    LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: Deadline exceeded, {retry_num - i + 1} attempts are skipped.")
+                break
+
+            if breaker is not None:
+                state = breaker.state
+                is_allowed = breaker.allow()
+                self._on_state_change(executor_args, breaker, state)
+                if not is_allowed: # Fail at once while the circuit is open.
+                    exception = CircuitOpenError(f"The circuit of <{executor_args.func_name}> is {breaker.state}")
+                    break
+
+            attempts += 1
             try:
-                if timeout == 0:
-                    return await super().executor(cb_func, executor_args, *cb_args, **cb_kwargs)
-                else:
-                    return await asyncio.wait_for(super().executor(cb_func, executor_args, *cb_args, **cb_kwargs), timeout=timeout)
-
-            except asyncio.TimeoutError:
-                LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: Callback function runs out of time: ({timeout}s)")
+                if not deadline:
+                    result = await self._run(cb_func, executor_args, *cb_args, **cb_kwargs)
+                else: # A timeout scope, no extra task. A synchronous function run in the loop cannot be interrupted.
+                    async with asyncio.timeout_at(deadline):
+                        result = await self._run(cb_func, executor_args, *cb_args, **cb_kwargs)
+
+            except TimeoutError as e:
+                exception = e
+                LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: Callback function runs out of time: ({timeout}s)" if not is_event_deadline else
+                               f"[{executor_args.identifier}<{executor_args.func_name}>]: Callback function runs past the deadline of the event.")
             except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.abort()
                 raise asyncio.CancelledError
             except Exception as e:
+                exception = e
                 LOGGER.error(f"[{executor_args.identifier}<{executor_args.func_name}>]: Callback function runs abnormally.", exc_info=e)
+            else:
+                if breaker is not None:
+                    state = breaker.state
+                    breaker.record(True)
+                    self._on_state_change(executor_args, breaker, state)
+                return result
+
+            if breaker is not None:
+                state = breaker.state
+                breaker.record(False)
+                self._on_state_change(executor_args, breaker, state)
 
             if retry_num == 0:
                 continue
@@ -58,13 +171,39 @@ class BuiltinExecutor(BaseCallbackExecutor):
                 LOGGER.error(f"[{executor_args.identifier}<{executor_args.func_name}>]: The number of retrials has reached the upper limit: ({retry_num}/{retry_num})")
                 continue
 
-            await asyncio.sleep(retry_interval)
+            interval = self._get_retry_interval(executor_args, i)
+            if deadline:
+                interval = min(interval, max(0.0, deadline - loop.time()))
+            await asyncio.sleep(interval)
             LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: Retrying({i + 1}/{retry_num})...")
 
+        if is_event_deadline and loop.time() >= deadline: # The event is obsolete, it is not moved to the dead-letter store.
+            return False, None
+        if cb_args and isinstance(cb_args[0], BaseEvent) and global_dead_letter_manager.enabled:
+            global_dead_letter_manager.add(cb_args[0], executor_args.identifier, executor_args.func_name, exception, attempts)
+            if attempts: # The calls short-circuited by an open circuit are not logged one by one.
+                LOGGER.warning(f"[{executor_args.identifier}<{executor_args.func_name}>]: <{cb_args[0]}> is moved to the dead-letter store after {attempts} attempts.")
         return False, None
 
 
+class ProcessExecutor(BuiltinExecutor):
+    """
+    Run CPU-bound callback functions in the warm worker process pool, so they do not hold the event loop. \n
+    The callback function must be defined at the module level of a plugin, and it, its arguments and its result must be picklable.
+    The result is put into the event bus like any other callback result. \n
+    Timeout and automatic retry of failure work as in the default executor. A timed out call keeps its worker until it returns.
+    The run_in and thread_pool parameters are ignored.
+    """
+    def __call__(self, cb_func: CallbackFunction, **kwargs) -> CallbackFunction:
+        global_process_pool_manager.require()
+        return super().__call__(cb_func, **kwargs)
+
+    async def _run(self, cb_func: CallbackFunction, executor_args: BuiltinExecutorArgs, *cb_args, **cb_kwargs) -> tuple[bool, Any | None]:
+        return True, await global_process_pool_manager.run(cb_func, *cb_args, **cb_kwargs)
+
+
 __all__ = [
     "EmptyExecutor",
     "BuiltinExecutor",
+    "ProcessExecutor",
 ]
@@ -1,6 +1,7 @@
 from inspect import getmodule
 
 from .container import CallbackContainer
+from ..process_pool import is_pool_worker
 from ...base.callback import BaseCallbackExecutor, BaseCallbackWrapper
 from ...kernel.logger import get_logger
 from ...types.callback import (
@@ -48,6 +49,7 @@ def new_callback_registrar(
         func_name_getter: FunctionNameGetter | None = None,
         wrapper: BaseCallbackWrapper | None = None,
         executor: BaseCallbackExecutor | None = None,
+        executors: dict[str, BaseCallbackExecutor] | None = None,
 ) -> CallbackRegistrar:
     """
     Create a new callback registrar.
@@ -65,10 +67,23 @@ def new_callback_registrar(
      For detailed information about the wrapper, please refer to [Components-Callback-Wrapper] chapter of the development document.
     :param executor: This executor will be passed into the wrapper. If the wrapper is none, this parameter will be ignored.
      For detailed information about the executor, please refer to [Components-Callback-Executor] chapter of the development document.
+    :param executors: Named executors that the registered callback function can select with the executor parameter of the registrar.
+     The callback function uses the executor parameter above when it does not select one.
     :return: Callback registrar.
     """
-    def registrar(identifier: str | CallbackFunction | None = None, func_name: str | None = None, **wrapper_kwargs) -> CallbackRegistrar | CallbackFunction:
+    default_executor = executor
+    named_executors = executors or {}
+
+    def registrar(
+            identifier: str | CallbackFunction | None = None,
+            func_name: str | None = None,
+            executor: str | None = None,
+            **wrapper_kwargs,
+    ) -> CallbackRegistrar | CallbackFunction:
         def decorator(func: CallbackFunction) -> CallbackFunction:
+            if is_pool_worker(): # Nothing runs the callbacks there, see ProcessPoolManager.
+                return func
+
             id_ = _getter(func, func_id_getter or _get_func_id, identifier)
             name = _getter(func, func_name_getter or _get_func_name, func_name)
 
@@ -80,9 +95,20 @@ def new_callback_registrar(
                 LOGGER.error(f"[{id_}<{name}>]: Failed to register in <{callback_type}>, because the incoming object is not callable.")
                 return func
 
+            if executor and executor not in named_executors:
+                LOGGER.error(f"[{id_}<{name}>]: Failed to register in <{callback_type}>, because the executor <{executor}> does not exist.")
+                return func
+
             if wrapper:
                 try:
-                    container.add(id_, name, callback_type, func, wrapper(func, executor, identifier=id_, func_name=name, **wrapper_kwargs))
+                    container.add(
+                        id_,
+                        name,
+                        callback_type,
+                        func,
+                        wrapper(func, named_executors[executor] if executor else default_executor, identifier=id_, func_name=name, **wrapper_kwargs),
+                        wrapper.get_args(func, identifier=id_, func_name=name, **wrapper_kwargs),
+                    )
                 except Exception as e:
                     LOGGER.error(f"[{id_}<{name}>]: Failed to register in <{callback_type}>, because the callback function wrapping failed.", exc_info=e)
                     return func
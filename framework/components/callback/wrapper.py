@@ -1,17 +1,21 @@
 import asyncio
-from typing import Any, Type
+from time import monotonic
+from typing import Any
 
 from ...base.callback import BaseCallbackExecutor, BaseCallbackWrapper
 from ...kernel.event.bus import global_event_bus
+from ...kernel.event.request import EventRequestError, event_request_manager
 from ...kernel.lock import global_async_completion_lock_manager
 from ...kernel.logger import get_logger
+from ...kernel.metrics import global_metrics_manager
+from ...kernel.shard import global_shard_manager
+from ...kernel.trace import global_trace_manager
 from ...types.callback import BaseCallbackWrapperArgs, CallbackFunction
 from ...types.callback import (
     BuiltinEmptyWrapperArgs,
     BuiltinProcessWrapperArgs,
     BuiltinAutorunWrapperArgs,
 )
-from ...types.event import BaseEvent
 
 
 LOGGER = get_logger("CallbackWrapper")
@@ -35,16 +39,32 @@ class ProcessWrapper(BaseCallbackWrapper):
 
         return super().__call__(func, executor, **kwargs)
 
-    async def wrapper(self, cb_func: CallbackFunction, wrapper_args: BuiltinProcessWrapperArgs, *cb_args, **cb_kwargs) -> Type[BaseEvent] | None:
-        if not cb_args and not cb_kwargs:
-            return wrapper_args.event_type
-
+    async def wrapper(self, cb_func: CallbackFunction, wrapper_args: BuiltinProcessWrapperArgs, *cb_args, **cb_kwargs) -> bool:
+        event = cb_args[0] if cb_args else None
+        trace_context = global_trace_manager.get_context(event) if global_trace_manager.active else None
+        started_at = monotonic()
         is_success, result = await cb_func(*cb_args, **cb_kwargs)
+        duration = monotonic() - started_at
+        global_metrics_manager.record_callback(wrapper_args.identifier, event, duration, is_success)
+        trace_parent = None
+        if trace_context is not None:
+            trace_parent = global_trace_manager.callback(trace_context, wrapper_args.identifier, wrapper_args.func_name, duration, is_success)
         if not is_success:
-            return None
-
-        await global_event_bus.auto_put(result)
-        return None
+            if event_request_manager.active:
+                event_request_manager.fail(event, EventRequestError(f"[{wrapper_args.identifier}<{wrapper_args.func_name}>] failed to process <{event}>"))
+            return False
+
+        if result is not None and event_request_manager.active:
+            result = event_request_manager.resolve(event, result) # The result of a request does not go through the bus.
+        if result is None:
+            return True
+
+        publishing = global_shard_manager.run_main(global_event_bus.auto_put(result)) # The callback may run in a shard.
+        if global_trace_manager.enabled:
+            await global_trace_manager.publish(trace_parent, publishing)
+        else:
+            await publishing
+        return True
 
 
 class AutorunWrapper(BaseCallbackWrapper):
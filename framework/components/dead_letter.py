@@ -0,0 +1,258 @@
+import asyncio
+from pathlib import Path
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Iterable
+
+from ..kernel.logger import get_logger
+from ..types.event import BaseEvent, event_codec
+from ..utils.dead_letter import DeadLetter, DeadLetterFile
+
+
+LOGGER = get_logger("DeadLetter")
+
+
+class DeadLetterManager:
+    """
+    A bounded store of the events whose process callbacks failed after all their attempts (see BuiltinExecutor). \n
+    Each entry keeps the event, the plugin identifier, the callback function name, the last exception and the number of attempts.
+    The store holds at most maxsize entries, the oldest ones are evicted. \n
+    The new entries are written to the file every flush_interval seconds in a worker thread, in one batch.
+    The entries of the file are loaded on start, their events are decoded when they are first needed,
+    so the event classes of the plugins can be found. \n
+    The entries can be inspected, discarded, or re-injected into the global event bus at a limited rate after a fix.
+    A re-injected entry leaves the store, if its callback fails again it comes back as a new entry. \n
+    Note: The callbacks of isolated plugins run in their child processes, their failures are not recorded.
+    """
+    def __init__(self, enable: bool, maxsize: int, flush_interval: float) -> None:
+        self._enable = enable
+        self._maxsize = max(1, maxsize)
+        self._flush_interval = max(0.01, flush_interval)
+
+        self._file: DeadLetterFile | None = None
+        self._lock = Lock() # The callbacks of plugins pinned to shards fail in their shard threads.
+        self._entries: dict[int, DeadLetter] = {}
+        self._payloads: dict[int, bytes | None] = {} # Encoded events, none if the event cannot be encoded.
+        self._unflushed: list[DeadLetter] = []
+        self._rewrite = False # Entries were removed since the last flush.
+        self._reinjecting: set[int] = set()
+        self._next_id = 1
+        self._flush_task: asyncio.Task | None = None
+
+        self.added = 0
+        self.evicted = 0
+        self.reinjected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_id: int) -> DeadLetter | None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is not None:
+            self._payloads.pop(entry_id, None)
+            self._rewrite = True
+        return entry
+
+    def add(self, event: BaseEvent, identifier: str, func_name: str, exception: BaseException | None, attempts: int) -> None:
+        """
+        Record an event whose callback failed after all its attempts.
+        """
+        if self._file is None:
+            return
+
+        exception = "" if exception is None else f"{exception.__class__.__name__}: {exception}"
+        with self._lock:
+            entry = DeadLetter(self._next_id, event, identifier, func_name, exception, attempts, time())
+            self._next_id += 1
+            self._entries[entry.id] = entry
+            self._unflushed.append(entry)
+            self.added += 1
+            if len(self._entries) > self._maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evicted += 1
+
+    def _get_event(self, entry: DeadLetter) -> BaseEvent | None:
+        if entry.event is None:
+            payload = self._payloads.get(entry.id)
+            if payload is None:
+                return None
+            try:
+                entry.event = event_codec.decode(payload)
+            except Exception as e:
+                LOGGER.warning(f"Failed to load the event of the dead letter <{entry.id}>.", exc_info=e)
+        return entry.event
+
+    def get_entries(self, identifier: str = "", limit: int = 0) -> list[dict[str, Any]]:
+        """
+        :param identifier: Only the entries of this plugin, all the entries if it is empty.
+        :param limit: At most this many of the oldest entries, all of them if it is 0.
+        :return: The metadata of the entries and the representation of their events, oldest first.
+        """
+        entries: list[dict[str, Any]] = []
+        for entry in tuple(self._entries.values()):
+            if identifier and entry.identifier != identifier:
+                continue
+
+            event = self._get_event(entry)
+            entries.append({**entry.get_metadata(), "event": "" if event is None else repr(event)})
+            if 0 < limit <= len(entries):
+                break
+        return entries
+
+    def discard(self, ids: Iterable[int] | None = None) -> int:
+        """
+        :param ids: The ids of the entries to remove, all the entries if it is none.
+        :return: The number of entries removed.
+        """
+        with self._lock:
+            ids = tuple(self._entries) if ids is None else tuple(ids)
+            return sum(self._remove(entry_id) is not None for entry_id in ids)
+
+    async def reinject(self, put: Callable[[BaseEvent], Awaitable[Any]], ids: Iterable[int] | None = None, rate: float = 0) -> int:
+        """
+        Put the events of the entries back with put, oldest first. An entry is removed once its put returns,
+        the entries whose events cannot be loaded are kept.
+        :param ids: The ids of the entries to re-inject, all the entries if it is none.
+        :param rate: At most this many events per second. If this parameter is 0, do not limit the rate.
+        :return: The number of events re-injected.
+        """
+        ids = tuple(self._entries) if ids is None else tuple(ids)
+        interval = 1 / rate if rate > 0 else 0.0
+        next_at = monotonic()
+        count = 0
+        for entry_id in ids:
+            entry = self._entries.get(entry_id)
+            if entry is None or entry_id in self._reinjecting or self._get_event(entry) is None:
+                continue
+
+            if interval:
+                delay = next_at - monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_at = max(next_at, monotonic() - interval) + interval # No burst after a slow put.
+                if entry_id not in self._entries or entry_id in self._reinjecting: # Removed or taken while waiting.
+                    continue
+
+            self._reinjecting.add(entry_id)
+            try:
+                await put(entry.event)
+            finally:
+                self._reinjecting.discard(entry_id)
+            with self._lock: # Only after the put, a cancelled or failed put keeps the entry.
+                self._remove(entry_id)
+            count += 1
+
+        self.reinjected += count
+        if count:
+            LOGGER.info(f"Re-injected {count} dead letters.")
+        return count
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "added": self.added,
+            "evicted": self.evicted,
+            "reinjected": self.reinjected,
+        }
+
+    def _encode(self, entry: DeadLetter) -> bytes | None:
+        if entry.id in self._payloads:
+            return self._payloads[entry.id]
+
+        try:
+            payload = event_codec.encode(entry.event)
+        except Exception as e:
+            LOGGER.warning(f"<{entry.event}> cannot be encoded, the dead letter <{entry.id}> will not be persisted.", exc_info=e)
+            payload = None
+        self._payloads[entry.id] = payload
+        return payload
+
+    async def _flush(self) -> None:
+        with self._lock:
+            unflushed, self._unflushed = self._unflushed, []
+            rewrite, self._rewrite = self._rewrite, False
+            entries = tuple(self._entries.values()) if rewrite else tuple(entry for entry in unflushed if entry.id in self._entries)
+
+        records = [
+            (entry.get_metadata(), payload)
+            for entry in entries
+            if (payload := self._encode(entry)) is not None
+        ]
+        if rewrite:
+            await asyncio.to_thread(self._file.rewrite, records)
+        elif records:
+            await asyncio.to_thread(self._file.append, records)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                LOGGER.error("Failed to write the dead-letter store.", exc_info=e)
+
+    async def start(self, path: Path) -> None:
+        """
+        Load the entries of the file of the path and start recording.
+        """
+        if not self._enable or self._file is not None:
+            return
+
+        file = DeadLetterFile(path)
+        for metadata, payload in await asyncio.to_thread(file.load):
+            try:
+                entry = DeadLetter(
+                    int(metadata["id"]),
+                    None,
+                    metadata["identifier"],
+                    metadata["func_name"],
+                    metadata["exception"],
+                    metadata["attempts"],
+                    metadata["timestamp"],
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                LOGGER.warning(f"Invalid dead letter <{metadata}>, it is skipped.", exc_info=e)
+                continue
+
+            self._entries[entry.id] = entry
+            self._payloads[entry.id] = payload
+            self._next_id = max(self._next_id, entry.id + 1)
+
+        while len(self._entries) > self._maxsize:
+            self._remove(next(iter(self._entries)))
+        self._file = file
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        LOGGER.info(f"Dead-letter store opened, {len(self._entries)} entries.")
+
+    async def stop(self, _: bool = False) -> None:
+        if self._file is None:
+            return
+
+        self._flush_task.cancel()
+        try:
+            await self._flush_task
+        except asyncio.CancelledError:
+            pass
+        self._flush_task = None
+
+        try:
+            await self._flush()
+        except Exception as e:
+            LOGGER.error("Failed to write the dead-letter store.", exc_info=e)
+        self._file = None
+        with self._lock:
+            self._entries.clear()
+            self._payloads.clear()
+            self._unflushed.clear()
+            self._rewrite = False
+
+
+__all__ = [
+    "DeadLetterManager",
+]
@@ -0,0 +1,138 @@
+import time
+from typing import Any, Callable, Hashable, Type
+
+from ..types.event import BaseEvent
+from ..utils.metrics import LatencyHistogram, QueueProbe
+
+
+class _CallbackStats:
+    def __init__(self) -> None:
+        self.wait = LatencyHistogram()
+        self.callback = LatencyHistogram()
+        self.failures = 0
+
+    def snapshot(self, with_wait: bool) -> dict[str, Any]:
+        snapshot = {
+            "callback": self.callback.snapshot(),
+            "failures": self.failures,
+        }
+        if with_wait:
+            snapshot["wait"] = self.wait.snapshot()
+        return snapshot
+
+    def reset(self) -> None:
+        self.wait.reset()
+        self.callback.reset()
+        self.failures = 0
+
+
+class MetricsManager:
+    """
+    Metrics of the event pipeline: the depth of the global event bus and of each distributor queue, the wait of the events
+    in them (enqueue to dequeue), and the latency of the process callbacks per plugin and per event type, in fixed-bucket histograms. \n
+    The snapshot also includes the concurrency limit of each process plugin and the queue depth of the thread pools. \n
+    Recording does not allocate (except the first time a plugin or an event type is seen).
+    If it is disabled, no probe is created and nothing is recorded. \n
+    Note: The callbacks of plugins pinned to shards are recorded in their shard threads, so the counts shared by several
+    shards (the event type histograms) may miss an increment under contention.
+    """
+    def __init__(self, enable: bool, thread_pool_stats_getter: Callable[[], dict[str, dict[str, int]]] | None = None) -> None:
+        self._enable = enable
+        self._thread_pool_stats_getter = thread_pool_stats_getter
+        self._started_at = time.time()
+
+        self._bus: QueueProbe | None = None
+        self._distributors: dict[Hashable, QueueProbe] = {}
+        self._plugins: dict[str, _CallbackStats] = {}
+        self._event_types: dict[str, _CallbackStats] = {} # Keyed by qualified name, so reloaded event classes are not kept alive.
+        self._concurrency: dict[str, Callable[[], dict[str, int | float]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._enable
+
+    def _get_event_type_stats(self, event_type: Type[BaseEvent]) -> _CallbackStats:
+        name = f"{event_type.__module__}.{event_type.__qualname__}"
+        stats = self._event_types.get(name)
+        if stats is None:
+            stats = self._event_types[name] = _CallbackStats()
+        return stats
+
+    def _record_wait(self, event: BaseEvent, wait: float) -> None:
+        self._get_event_type_stats(event.__class__).wait.record(wait)
+
+    def new_bus_probe(self, priority_getter: Callable[[BaseEvent], int]) -> QueueProbe | None:
+        if not self._enable:
+            return None
+
+        self._bus = QueueProbe(priority_getter)
+        return self._bus
+
+    def new_distributor_probe(self, symbol: Hashable) -> QueueProbe | None:
+        if not self._enable:
+            return None
+
+        probe = self._distributors[symbol] = QueueProbe(on_wait=self._record_wait)
+        return probe
+
+    def remove_distributor_probe(self, symbol: Hashable) -> None:
+        self._distributors.pop(symbol, None)
+
+    def add_concurrency_getter(self, identifier: str, getter: Callable[[], dict[str, int | float]]) -> None:
+        """
+        param getter: Return the concurrency limit, the consumer tasks in flight and the average callback latency of the plugin.
+        """
+        if self._enable:
+            self._concurrency[identifier] = getter
+
+    def remove_concurrency_getter(self, identifier: str) -> None:
+        self._concurrency.pop(identifier, None)
+
+    def record_callback(self, identifier: str, event: BaseEvent | None, duration: float, is_success: bool) -> None:
+        if not self._enable:
+            return
+
+        plugin_stats = self._plugins.get(identifier)
+        if plugin_stats is None:
+            plugin_stats = self._plugins[identifier] = _CallbackStats()
+        plugin_stats.callback.record(duration)
+        if not is_success:
+            plugin_stats.failures += 1
+
+        if event is not None:
+            event_type_stats = self._get_event_type_stats(event.__class__)
+            event_type_stats.callback.record(duration)
+            if not is_success:
+                event_type_stats.failures += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        :return: The gauges and histograms since the start or the last reset. Histogram values are in seconds.
+        """
+        return {
+            "enabled": self._enable,
+            "timestamp": time.time(),
+            "since": self._started_at,
+            "bus": None if self._bus is None else self._bus.snapshot(),
+            "distributors": {str(symbol): probe.snapshot() for symbol, probe in tuple(self._distributors.items())},
+            "plugins": {identifier: stats.snapshot(False) for identifier, stats in tuple(self._plugins.items())},
+            "event_types": {name: stats.snapshot(True) for name, stats in tuple(self._event_types.items())},
+            "concurrency": {identifier: getter() for identifier, getter in tuple(self._concurrency.items())},
+            "thread_pools": {} if self._thread_pool_stats_getter is None else self._thread_pool_stats_getter(),
+        }
+
+    def reset(self) -> None:
+        """
+        Reset the histograms and counters. The current depth of the queues is kept.
+        """
+        self._started_at = time.time()
+        for probe in (self._bus, *self._distributors.values()):
+            if probe is not None:
+                probe.reset()
+        for stats in (*self._plugins.values(), *self._event_types.values()):
+            stats.reset()
+
+
+__all__ = [
+    "MetricsManager",
+]
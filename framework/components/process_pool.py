@@ -0,0 +1,142 @@
+import asyncio
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from inspect import iscoroutinefunction
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.context import BaseContext
+from typing import Any, Callable
+
+
+class StaleWorkerError(Exception):
+    """
+    The worker process could not load the callback or its arguments, usually because the plugin was reloaded after the worker imported it.
+    """
+
+
+_IS_POOL_WORKER = False
+
+
+def _init_worker() -> None:
+    global _IS_POOL_WORKER
+    _IS_POOL_WORKER = True
+
+
+def is_pool_worker() -> bool:
+    """
+    :return: The current process is a worker of a process pool, which imports plugin modules only to load their callbacks.
+    """
+    return _IS_POOL_WORKER
+
+
+def _noop() -> None:
+    return None
+
+
+def _get_context() -> BaseContext:
+    # Never fork the framework process, its threads (shards, thread pools, trace flusher) may hold locks at the fork.
+    if "forkserver" not in get_all_start_methods():
+        return get_context("spawn")
+
+    context = get_context("forkserver")
+    context.set_forkserver_preload([__name__]) # Workers are forked from a server that imported the framework only.
+    return context
+
+
+def _invoke(payload: bytes) -> Any:
+    try:
+        func, args, kwargs = pickle.loads(payload)
+    except (ImportError, AttributeError) as e:
+        raise StaleWorkerError(str(e)) from None
+
+    if iscoroutinefunction(func):
+        return asyncio.run(func(*args, **kwargs))
+    return func(*args, **kwargs)
+
+
+class ProcessPoolManager:
+    """
+    A warm process pool for running CPU-bound callbacks on other cores. \n
+    Workers are started by forkserver (or spawn), not forked from the framework process, and they import the framework only.
+    Callbacks and their arguments are pickled by reference in the framework process, and the worker imports their modules by name.
+    If a worker cannot load them (a plugin reloaded after the worker imported it), the pool is recycled and the call is retried once.
+    """
+    def __init__(self, size: int) -> None:
+        self._size = max(1, size)
+        self._context = _get_context()
+
+        self._pool: ProcessPoolExecutor | None = None
+        self._in_flight: int = 0
+        self._required: bool = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def require(self) -> None:
+        """
+        Mark the pool as used, so that start will spawn the workers in advance.
+        """
+        self._required = True
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self._size, mp_context=self._context, initializer=_init_worker)
+        return self._pool
+
+    def recycle(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    async def start(self) -> None:
+        """
+        Spawn the workers if any callback requires the pool.
+        """
+        if not self._required:
+            return
+
+        self.recycle()
+        await asyncio.get_running_loop().run_in_executor(self.get_pool(), _noop)
+
+    async def _submit(self, payload: bytes) -> Any:
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.get_pool(), _invoke, payload)
+        finally:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a picklable function in a worker process and wait for the result. \n
+        Note: Cancelling the waiting coroutine does not interrupt a function that has already started.
+        :raise pickle.PicklingError: The function, its arguments or its result cannot be pickled.
+        """
+        payload = pickle.dumps((func, args, kwargs))
+        try:
+            return await self._submit(payload)
+        except StaleWorkerError:
+            self.recycle()
+            return await self._submit(payload)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "max_workers": self._size,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self._size),
+        }
+
+    async def shutdown(self, force: bool = False) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=not force, cancel_futures=force)
+
+
+__all__ = [
+    "StaleWorkerError",
+    "ProcessPoolManager",
+    "is_pool_worker",
+]
@@ -0,0 +1,161 @@
+import asyncio
+from threading import Event, Thread
+from typing import Any, Callable, Coroutine
+
+from ..kernel.logger import get_logger
+
+
+LOGGER = get_logger("ShardManager")
+
+
+class Shard:
+    """
+    An event loop running in its own thread.
+    """
+    def __init__(self, index: int) -> None:
+        self._index = index
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: Thread | None = None
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self._loop
+
+    def _run_forever(self, ready: Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        ready = Event()
+        self._thread = Thread(target=self._run_forever, args=(ready,), name=f"SnowX-Shard-{self._index}", daemon=True)
+        self._thread.start()
+        await asyncio.to_thread(ready.wait)
+
+    async def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Run the coroutine in this shard and wait for the result in the current loop. Cancelling the waiting coroutine cancels it in this shard.
+        """
+        loop = self._loop
+        if loop is None:
+            coro.close()
+            raise RuntimeError(f"Shard <{self._index}> is not running")
+        if asyncio.get_running_loop() is loop:
+            return await coro
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        await asyncio.to_thread(thread.join)
+        self._loop = None
+
+
+class ShardManager:
+    """
+    Sharded runtime. The main event loop is shard 0, and count - 1 shards run their own event loops in other threads. \n
+    A plugin pinned to a shard by pins (plugin identifier -> shard index) runs its process callbacks in that shard,
+    so a heavy plugin does not add latency to the plugins in the main loop. Unpinned plugins, and everything else
+    in the framework, stay in the main loop. Events cross from a shard to the main loop with run_main.
+    """
+    def __init__(self, count: int, pins: dict[str, int] | None = None) -> None:
+        self._count = max(1, count)
+        self._pins: dict[str, int] = dict(pins or {})
+
+        self._main_loop: asyncio.AbstractEventLoop | None = None
+        self._shards: tuple[Shard, ...] = tuple(Shard(index) for index in range(1, self._count))
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def pins(self) -> dict[str, int]:
+        return self._pins.copy()
+
+    def pin(self, identifier: str, index: int) -> None:
+        """
+        Pin a plugin to a shard. It takes effect the next time the plugin is loaded.
+        """
+        self._pins[identifier] = index
+
+    def get_shard(self, identifier: str) -> Shard | None:
+        """
+        :return: The shard that the plugin is pinned to, or none if it runs in the main loop.
+        """
+        index = self._pins.get(identifier, 0)
+        if index == 0:
+            return None
+        if not 0 < index < self._count:
+            LOGGER.warning(f"[{identifier}]: Shard <{index}> does not exist, use the main loop.")
+            return None
+
+        shard = self._shards[index - 1]
+        if shard.loop is None:
+            return None
+        return shard
+
+    async def run_main(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Run the coroutine in the main loop and wait for the result in the current loop.
+        """
+        main_loop = self._main_loop
+        if main_loop is None or asyncio.get_running_loop() is main_loop:
+            return await coro
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, main_loop))
+
+    def call_main(self, func: Callable[..., Any], *args: Any) -> None:
+        """
+        Call the function in the main loop without waiting for it, soon if the current thread is not the one of the main loop.
+        """
+        main_loop = self._main_loop
+        if main_loop is None:
+            func(*args)
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is main_loop:
+            func(*args)
+        else:
+            main_loop.call_soon_threadsafe(func, *args)
+
+    async def start(self) -> None:
+        self._main_loop = asyncio.get_running_loop()
+        for shard in self._shards:
+            await shard.start()
+
+    async def stop(self, _: bool = False) -> None:
+        for shard in self._shards:
+            await shard.stop()
+        self._main_loop = None
+
+
+__all__ = [
+    "Shard",
+    "ShardManager",
+]
@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+
+class ThreadPoolManager:
+    """
+    Named thread pools for running synchronous callbacks off the event loop. \n
+    A pool is created on first use with the size given by sizes (or default_size), and it can be resized before that.
+    """
+    def __init__(self, default_size: int, sizes: dict[str, int] | None = None) -> None:
+        self._default_size = max(1, default_size)
+        self._sizes: dict[str, int] = {name: max(1, size) for name, size in (sizes or {}).items()}
+
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._in_flight: dict[str, int] = {}
+
+    def get_size(self, name: str) -> int:
+        return self._sizes.get(name, self._default_size)
+
+    def set_size(self, name: str, size: int) -> bool:
+        if name in self._pools:
+            return False
+
+        self._sizes[name] = max(1, size)
+        return True
+
+    def get_pool(self, name: str) -> ThreadPoolExecutor:
+        pool = self._pools.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(self.get_size(name), thread_name_prefix=f"SnowX-{name}")
+            self._pools[name] = pool
+            self._in_flight[name] = 0
+        return pool
+
+    def _done(self, name: str, _) -> None:
+        self._in_flight[name] = max(0, self._in_flight.get(name, 0) - 1)
+
+    async def run(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a synchronous function in the named pool and wait for the result.
+        Note: Cancelling the waiting coroutine does not interrupt a function that has already started.
+        """
+        pool = self.get_pool(name)
+        future = asyncio.get_running_loop().run_in_executor(pool, partial(func, *args, **kwargs))
+        self._in_flight[name] += 1
+        future.add_done_callback(partial(self._done, name))
+        return await future
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """
+        :return: Pool name -> max workers, calls in flight and calls waiting for a free thread (queue depth).
+        """
+        stats: dict[str, dict[str, int]] = {}
+        for name in self._pools:
+            size = self.get_size(name)
+            in_flight = self._in_flight.get(name, 0)
+            stats[name] = {
+                "max_workers": size,
+                "in_flight": in_flight,
+                "queued": max(0, in_flight - size),
+            }
+        return stats
+
+    async def shutdown(self, force: bool = False) -> None:
+        pools = tuple(self._pools.values())
+        self._pools.clear()
+        self._in_flight.clear()
+        for pool in pools:
+            await asyncio.to_thread(pool.shutdown, wait=not force, cancel_futures=force)
+
+
+__all__ = [
+    "ThreadPoolManager",
+]
@@ -0,0 +1,284 @@
+import asyncio
+from threading import Lock
+from contextvars import ContextVar
+from pathlib import Path
+from random import random
+from time import time_ns
+from typing import Any, Awaitable, Callable, Iterable
+
+from ..kernel.logger import get_logger
+from ..types.event import BaseEvent
+from ..utils.trace import Span, SpanExporter, new_span_id, new_trace_id
+
+
+LOGGER = get_logger("Trace")
+
+_UNSAMPLED = (0, 0)
+
+# (Trace id, span id) of the re-publication in progress in this context, the parent of the events put into the bus.
+_publishing: ContextVar[tuple[int, int] | None] = ContextVar("publishing", default=None)
+
+
+def _get_event_name(event: BaseEvent) -> str:
+    event_type = event.__class__
+    return f"{event_type.__module__}.{event_type.__qualname__}"
+
+
+class TraceManager:
+    """
+    Sampled causal tracing of the events through the pipeline. \n
+    The sampling decision is made once per trace, when an event that was not produced by a traced process callback
+    is put into the global event bus (head-based sampling): it is sampled with the probability sample_rate.
+    The events returned by a process callback inherit the decision of the event it processed. \n
+    The trace context of a sampled event is kept next to it, in a table by event id, and the following spans are recorded: \n
+    bus.wait: From the event put into the bus until the distributor takes it, the parent of the other spans of the event. \n
+    distributor.route: Routing the batch of the event to the distributor queues, including waiting for full queues. \n
+    callback: Each process callback that processes the event. \n
+    publish: Putting the events returned by the callback back into the bus, the parent of their bus.wait spans. \n
+    Like in the event journal, the distributor reports how many subscribers an event is routed to (route), each subscriber
+    how many callbacks will process it (retain), and the event leaves the table after its last callback.
+    When no sampled event is in flight, the pipeline only checks that the table is empty (see active).
+    The table holds at most max_inflight events, the oldest ones are evicted (their later spans are not recorded),
+    so the events that never reach a callback (e.g. dropped by an overflow policy) do not stay in it. \n
+    The spans are exported every flush_interval seconds by a SpanExporter, in a worker thread.
+    """
+    def __init__(self, sample_rate: float, max_inflight: int, buffer_maxsize: int, flush_interval: float, service_name: str) -> None:
+        self._sample_rate = min(max(0.0, sample_rate), 1.0)
+        self._max_inflight = max(1, max_inflight)
+        self._buffer_maxsize = buffer_maxsize
+        self._flush_interval = max(0.01, flush_interval)
+        self._service_name = service_name
+
+        self._exporter: SpanExporter | None = None
+        self._contexts: dict[int, list] = {} # Event id -> [event, trace id, span id, parent span id, put timestamp, references, subscribers]
+        self._lock = Lock() # The callbacks of plugins pinned to shards finish in their shard threads.
+        self._flush_task: asyncio.Task | None = None
+
+        self.sampled = 0
+        self.evicted = 0
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether any sampled event is in flight.
+        """
+        return bool(self._contexts)
+
+    def _add(self, name: str, trace_id: int, span_id: int, parent_span_id: int, start_ns: int, end_ns: int, attributes: dict[str, Any], is_error: bool = False) -> None:
+        exporter = self._exporter
+        if exporter is None: # Stopped.
+            return
+        exporter.add(Span(name, trace_id, span_id, parent_span_id, start_ns, end_ns, attributes, is_error))
+
+    def enqueue(self, event: BaseEvent) -> None:
+        """
+        Called with every event accepted into the global event bus.
+        """
+        if self._exporter is None:
+            return
+
+        parent = _publishing.get()
+        if parent is None:
+            if random() >= self._sample_rate:
+                return
+            trace_id, parent_span_id = new_trace_id(), 0
+            self.sampled += 1
+        elif parent is _UNSAMPLED:
+            return
+        else:
+            trace_id, parent_span_id = parent
+
+        context = [event, trace_id, new_span_id(), parent_span_id, time_ns(), 0, 0]
+        contexts = self._contexts
+        with self._lock:
+            contexts[id(event)] = context
+            if len(contexts) > self._max_inflight:
+                del contexts[next(iter(contexts))]
+                self.evicted += 1
+
+    def dequeue(self, events: Iterable[BaseEvent]) -> None:
+        """
+        Called with the events taken from the global event bus, if the manager is active.
+        """
+        now = time_ns()
+        for event in events:
+            context = self._contexts.get(id(event))
+            if context is None:
+                continue
+
+            self._add("bus.wait", context[1], context[2], context[3], context[4], now, {
+                "event.type": _get_event_name(event),
+                "event.priority": event.event_priority,
+            })
+
+    def _release(self, event: BaseEvent, references: int) -> None:
+        with self._lock:
+            context = self._contexts.get(id(event))
+            if context is None:
+                return
+
+            context[5] += references
+            if context[5] <= 0:
+                del self._contexts[id(event)]
+
+    def route(self, events: Iterable[BaseEvent], get_subscribers: Callable[[BaseEvent], int]) -> int:
+        """
+        Called before a batch of events is put into the distributor queues, if the manager is active.
+        The events without subscribers are finished.
+        :return: The start timestamp of the routing, give it to routed.
+        """
+        now = time_ns()
+        for event in events:
+            context = self._contexts.get(id(event))
+            if context is None:
+                continue
+
+            subscribers = context[6] = get_subscribers(event)
+            if subscribers == 0:
+                self._add("distributor.route", context[1], new_span_id(), context[2], now, now, {
+                    "event.type": _get_event_name(event),
+                    "distributor.subscribers": 0,
+                })
+            self._release(event, subscribers)
+        return now
+
+    def routed(self, events: Iterable[BaseEvent], start_ns: int) -> None:
+        """
+        Called after the batch of events is put into the distributor queues.
+        """
+        now = time_ns()
+        for event in events:
+            context = self._contexts.get(id(event))
+            if context is None:
+                continue
+
+            self._add("distributor.route", context[1], new_span_id(), context[2], start_ns, now, {
+                "event.type": _get_event_name(event),
+                "distributor.subscribers": context[6],
+            })
+
+    def discard(self, events: Iterable[BaseEvent]) -> None:
+        """
+        The events are dropped before they are routed (e.g. expired), their later spans are not recorded.
+        """
+        with self._lock:
+            for event in events:
+                self._contexts.pop(id(event), None)
+
+    def retain(self, event: BaseEvent, callbacks: int) -> None:
+        """
+        Called by a subscriber with the number of its callbacks that will process the event, if the manager is active.
+        """
+        if callbacks != 1:
+            self._release(event, callbacks - 1)
+
+    def skip(self, event: BaseEvent, callbacks: int) -> None:
+        """
+        Called by a subscriber with the number of its callbacks that will not process the event after all (e.g. it expired).
+        """
+        if callbacks:
+            self._release(event, -callbacks)
+
+    def get_context(self, event: BaseEvent | None) -> list | None:
+        return self._contexts.get(id(event))
+
+    def callback(self, context: list, identifier: str, func_name: str, duration: float, is_success: bool) -> tuple[int, int]:
+        """
+        Record a process callback that processed a sampled event, it ends now.
+        :return: Trace id and span id of the callback, the parent of the events it returns.
+        """
+        end_ns = time_ns()
+        span_id = new_span_id()
+        self._add("callback", context[1], span_id, context[2], end_ns - int(duration * 1e9), end_ns, {
+            "event.type": _get_event_name(context[0]),
+            "plugin.identifier": identifier,
+            "callback.function": func_name,
+        }, not is_success)
+        self._release(context[0], -1)
+        return context[1], span_id
+
+    async def publish(self, parent: tuple[int, int] | None, publishing: Awaitable[Any]) -> Any:
+        """
+        Put the events returned by a process callback into the bus, the events inherit the sampling decision of the callback.
+        :param parent: The trace id and span id returned by callback, none if the processed event is not sampled.
+        :param publishing: Puts the events into the bus. It must not be started yet.
+        """
+        if parent is None:
+            token = _publishing.set(_UNSAMPLED)
+            try:
+                return await publishing
+            finally:
+                _publishing.reset(token)
+
+        span_id = new_span_id()
+        start_ns = time_ns()
+        token = _publishing.set((parent[0], span_id))
+        try:
+            return await publishing
+        finally:
+            _publishing.reset(token)
+            self._add("publish", parent[0], span_id, parent[1], start_ns, time_ns(), {})
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self._sample_rate,
+            "sampled": self.sampled,
+            "inflight": len(self._contexts),
+            "evicted": self.evicted,
+            "dropped": 0 if self._exporter is None else self._exporter.dropped,
+        }
+
+    async def _flush(self) -> None:
+        await asyncio.to_thread(self._exporter.write, self._exporter.drain())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                LOGGER.error("Failed to export the spans.", exc_info=e)
+
+    async def start(self, path: Path) -> None:
+        """
+        Start sampling, the spans are appended to the file of the path.
+        """
+        if self._sample_rate <= 0 or self._exporter is not None:
+            return
+
+        self._exporter = SpanExporter(path, self._service_name, __name__, self._buffer_maxsize)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        LOGGER.info(f"Tracing started, sample rate: {self._sample_rate}, spans are exported to <{path}>.")
+
+    async def stop(self, _: bool = False) -> None:
+        if self._exporter is None:
+            return
+
+        self._flush_task.cancel()
+        try:
+            await self._flush_task
+        except asyncio.CancelledError:
+            pass
+        self._flush_task = None
+
+        try:
+            await self._flush()
+        except Exception as e:
+            LOGGER.error("Failed to export the spans.", exc_info=e)
+        self._exporter = None
+        with self._lock:
+            self._contexts.clear()
+
+
+__all__ = [
+    "TraceManager",
+]
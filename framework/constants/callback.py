@@ -25,7 +25,38 @@ class ExecutionMethod:
 EXECUTION_METHOD = ExecutionMethod()
 
 
+@dataclass(frozen=True)
+class RunIn:
+    LOOP: str = "loop"
+    THREAD: str = "thread"
+
+
+RUN_IN = RunIn()
+
+
+@dataclass(frozen=True)
+class ExecutorType:
+    BUILTIN: str = "builtin"
+    PROCESS: str = "process"
+
+
+EXECUTOR_TYPE = ExecutorType()
+
+
+@dataclass(frozen=True)
+class CircuitState:
+    CLOSED: str = "closed"
+    OPEN: str = "open"
+    HALF_OPEN: str = "half_open"
+
+
+CIRCUIT_STATE = CircuitState()
+
+
 __all__ = [
     "CALLBACK_TYPE",
     "EXECUTION_METHOD",
+    "RUN_IN",
+    "EXECUTOR_TYPE",
+    "CIRCUIT_STATE",
 ]
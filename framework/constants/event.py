@@ -0,0 +1,42 @@
+from dataclasses import astuple, dataclass
+
+
+@dataclass(frozen=True)
+class OverflowPolicy:
+    BLOCK: str = "block"
+    DROP_NEWEST: str = "drop_newest"
+    DROP_OLDEST: str = "drop_oldest"
+    SPILL: str = "spill"
+
+
+OVERFLOW_POLICY = OverflowPolicy()
+OVERFLOW_POLICIES: tuple[str, ...] = astuple(OVERFLOW_POLICY)
+
+
+@dataclass(frozen=True)
+class EventPriority:
+    NORMAL: int = 0
+    CONTROL: int = 100
+
+
+EVENT_PRIORITY = EventPriority()
+
+
+@dataclass(frozen=True)
+class ExpiryPoint:
+    BUS: str = "bus"
+    DISTRIBUTOR: str = "distributor"
+    SCHEDULER: str = "scheduler"
+
+
+EXPIRY_POINT = ExpiryPoint()
+EXPIRY_POINTS: tuple[str, ...] = astuple(EXPIRY_POINT)
+
+
+__all__ = [
+    "OVERFLOW_POLICY",
+    "OVERFLOW_POLICIES",
+    "EVENT_PRIORITY",
+    "EXPIRY_POINT",
+    "EXPIRY_POINTS",
+]
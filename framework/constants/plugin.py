@@ -0,0 +1,17 @@
+from dataclasses import astuple, dataclass
+
+
+@dataclass(frozen=True)
+class Isolation:
+    NONE: str = ""
+    PROCESS: str = "process"
+
+
+ISOLATION = Isolation()
+ISOLATIONS: tuple[str, ...] = astuple(ISOLATION)
+
+
+__all__ = [
+    "ISOLATION",
+    "ISOLATIONS",
+]
@@ -1,11 +1,17 @@
 from . import callback
 from . import config
+from . import dead_letter
 from . import event
 from . import lock
 from . import logger
 from . import manager
+from . import metrics
 from . import path
 from . import plugin
+from . import process_pool
+from . import shard
+from . import thread_pool
+from . import trace
 from . import vmodule
 
 
@@ -21,6 +27,21 @@ api_adder.get_sub_adder("logger").auto_add(logger)
 callback_api_adder = api_adder.get_sub_adder("callback")
 callback_api_adder.auto_add(callback.registrar)
 
+dead_letter_api_adder = api_adder.get_sub_adder("dead_letter")
+dead_letter_api_adder.add_function("get_dead_letters")(dead_letter.get_dead_letters)
+dead_letter_api_adder.add_function("get_dead_letter_stats")(dead_letter.get_dead_letter_stats)
+dead_letter_api_adder.add_function("discard_dead_letters")(dead_letter.discard_dead_letters)
+dead_letter_api_adder.add_function("reinject_dead_letters")(dead_letter.reinject_dead_letters)
+
+event_api_adder = api_adder.get_sub_adder("event")
+event_api_adder.add_function("request")(event.request.request)
+event_api_adder.add_class("EventRequestError")(event.request.EventRequestError)
+event_api_adder.add_function("get_expiry_stats")(event.expiry.get_expiry_stats)
+
+metrics_api_adder = api_adder.get_sub_adder("metrics")
+metrics_api_adder.add_function("get_metrics_snapshot")(metrics.get_metrics_snapshot)
+metrics_api_adder.add_function("reset_metrics")(metrics.reset_metrics)
+
 path_api_adder = api_adder.get_sub_adder("path")
 path_api_adder.add_function("get_config_path")(path.get_config_path)
 path_api_adder.add_function("get_data_path")(path.get_data_path)
@@ -30,12 +51,21 @@ path_api_adder.add_function("get_temp_path")(path.get_temp_path)
 plugin_api_adder = api_adder.get_sub_adder("plugin")
 plugin_api_adder.auto_add(plugin.api)
 
+trace_api_adder = api_adder.get_sub_adder("trace")
+trace_api_adder.add_function("get_trace_stats")(trace.get_trace_stats)
+
 
 kernel_adder = Adder(f"{VMODULE_ROOT_PATH.ROOT}.{VMODULE_SUBROOT_PATH.KERNEL}")
 
+kernel_adder.get_sub_adder("dead_letter").auto_add(dead_letter)
 kernel_adder.get_sub_adder("event").auto_add(event)
 kernel_adder.get_sub_adder("lock").auto_add(lock)
 kernel_adder.get_sub_adder("manager").auto_add(manager)
+kernel_adder.get_sub_adder("metrics").auto_add(metrics)
+kernel_adder.get_sub_adder("process_pool").auto_add(process_pool)
+kernel_adder.get_sub_adder("shard").auto_add(shard)
+kernel_adder.get_sub_adder("thread_pool").auto_add(thread_pool)
+kernel_adder.get_sub_adder("trace").auto_add(trace)
 
 callback_kernel_adder = kernel_adder.get_sub_adder("callback")
 callback_kernel_adder.get_sub_adder("container").auto_add(callback.container)
@@ -1,9 +1,11 @@
-from ...components.callback.executor import BuiltinExecutor
+from ...components.callback.executor import BuiltinExecutor, ProcessExecutor
 
 
 executor = BuiltinExecutor()
+process_executor = ProcessExecutor()
 
 
 __all__ = [
-    "executor"
+    "executor",
+    "process_executor",
 ]
@@ -1,8 +1,14 @@
 from .container import global_callback_container
-from .executor import executor
+from .executor import executor, process_executor
 from .wrapper import empty_wrapper, process_wrapper, autorun_wrapper
 from ...components.callback.registrar import new_callback_registrar
-from ...constants.callback import CALLBACK_TYPE
+from ...constants.callback import CALLBACK_TYPE, EXECUTOR_TYPE
+
+
+_EXECUTORS = {
+    EXECUTOR_TYPE.BUILTIN: executor,
+    EXECUTOR_TYPE.PROCESS: process_executor,
+}
 
 
 on_init = new_callback_registrar(
@@ -10,6 +16,7 @@ on_init = new_callback_registrar(
     CALLBACK_TYPE.INIT,
     wrapper=empty_wrapper,
     executor=executor,
+    executors=_EXECUTORS,
 )
 
 on_exit = new_callback_registrar(
@@ -17,6 +24,7 @@ on_exit = new_callback_registrar(
     CALLBACK_TYPE.EXIT,
     wrapper=empty_wrapper,
     executor=executor,
+    executors=_EXECUTORS,
 )
 
 on_process = new_callback_registrar(
@@ -24,6 +32,7 @@ on_process = new_callback_registrar(
     CALLBACK_TYPE.PROCESS,
     wrapper=process_wrapper,
     executor=executor,
+    executors=_EXECUTORS,
 )
 
 on_autorun = new_callback_registrar(
@@ -31,6 +40,7 @@ on_autorun = new_callback_registrar(
     CALLBACK_TYPE.AUTORUN,
     wrapper=autorun_wrapper,
     executor=executor,
+    executors=_EXECUTORS,
 )
 
 
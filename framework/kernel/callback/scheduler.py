@@ -1,21 +1,39 @@
 import asyncio
-from typing import Awaitable, Callable, Type
+from collections import deque
+from dataclasses import fields, is_dataclass
+from operator import attrgetter
+from typing import Awaitable, Callable, Hashable, Type
 
 from .container import global_callback_container
 from ..config import get_config
 from ..event.distributor import event_distributor_manager
+from ..event.expiry import event_expiry_manager
+from ..event.journal import event_journal_manager
+from ..event.request import event_request_manager
 from ..lock import global_async_completion_lock_manager
 from ..logger import get_logger
+from ..metrics import global_metrics_manager
+from ..trace import global_trace_manager
 from ...base.callback import BaseSchedulerItem
+from ...state.framework import SNOWX_STATE
 from ...components.callback.scheduler import SchedulerManager, SingleExecutionSchedulerItem, get_result
+from ...components.shard import Shard
 from ...constants.callback import CALLBACK_TYPE, EXECUTION_METHOD
 from ...types.callback import CallbackItem, CallbackFunction
-from ...types.event import BaseEvent
+from ...types.event import BaseEvent, EventFilter
+from ...utils.fan_out import fan_out
+from ...utils.limiter import AIMDLimiter
+from ...utils.topic import compile_topic_pattern
 from ...utils.queue import TypedAsyncQueue
 from ...utils.worker import ProducerConsumerWorker
 
 
 PROCESS_EVENT_QUEUE_MAXSIZE = get_config("PROCESS_EVENT_QUEUE_MAXSIZE", 1024)
+PROCESS_MAX_CONCURRENCY = get_config("PROCESS_MAX_CONCURRENCY", 0)
+PROCESS_TARGET_LATENCY = get_config("PROCESS_TARGET_LATENCY", 0.0)
+PROCESS_ADAPTIVE_MAX_CONCURRENCY = get_config("PROCESS_ADAPTIVE_MAX_CONCURRENCY", 256)
+PROCESS_PARTITION_LANES = get_config("PROCESS_PARTITION_LANES", 16)
+SHARD_HANDOFF_BATCH_MAXSIZE = get_config("SHARD_HANDOFF_BATCH_MAXSIZE", 256)
 
 
 def new_serial_scheduler(cb_type: str) -> SchedulerManager:
@@ -33,31 +51,174 @@ exit_scheduler = new_serial_scheduler(CALLBACK_TYPE.EXIT)
 
 PROCESS_TYPE_LOGGER = get_logger("ProcessScheduler")
 
+def _done(event: BaseEvent) -> None:
+    event_journal_manager.done(event)
+    if event_request_manager.active:
+        event_request_manager.done(event)
+
+def _retain(event: BaseEvent, references: int) -> None:
+    event_journal_manager.retain(event, references)
+    if event_request_manager.active:
+        event_request_manager.retain(event, references)
+
+def _discard(event: BaseEvent) -> None:
+    """
+    Report an event left in a stopped scheduler. When stopping, the journal keeps it for the replay, like del_distributor does.
+    """
+    if not SNOWX_STATE.IS_STOPPING.is_set():
+        event_journal_manager.done(event)
+    if event_request_manager.active:
+        event_request_manager.done(event)
+
+async def _journal_done(event: BaseEvent, processing: Awaitable[bool]) -> bool:
+    """
+    Report the event to the event journal (and the pending requests) after it is processed, even if the processing raises.
+    If it is cancelled (forced stop), the event is not reported, so it will be replayed.
+    """
+    try:
+        result = await processing
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _done(event)
+        raise
+
+    _done(event)
+    return result
+
 class ProcessSchedulerItem(BaseSchedulerItem):
+    """
+    Dispatch the events of the distributor queue of a plugin to its process callbacks, as set by the arguments of on_process
+    (concurrency, partition lanes, filters, topics and deadline order), in the main loop or in the shard the plugin is pinned to.
+    """
     def __init__(
             self,
             cb_type: str,
             identifier: str,
             *callbacks: tuple[CallbackItem, ...],
             process_event_queue_maxsize: int = 0,
+            overflow_policy: str = "",
+            max_concurrency: int = 0,
+            serial: bool = False,
+            target_latency: float = 0.0,
+            partition_lanes: int = 1,
+            shard: Shard | None = None,
     ) -> None:
         super().__init__(cb_type, identifier, *callbacks)
 
+        self._shard = shard
+        self._forwarder_task: asyncio.Task | None = None
+        self._handoff: deque[BaseEvent] = deque() # Taken from the distributor, not yet in the inbox.
+
+        self._overflow_policy = overflow_policy
+        max_concurrency = self._get_min_option("max_concurrency", max_concurrency)
+        target_latency = self._get_min_option("target_latency", target_latency)
         self._worker = ProducerConsumerWorker(
             self._producer,
             self._consumer,
             max(process_event_queue_maxsize, 0),
+            max_concurrency,
+            serial or any(getattr(callback.wrapper_args, "serial", False) for callback in self.callbacks),
+            AIMDLimiter(target_latency, max_concurrency or PROCESS_ADAPTIVE_MAX_CONCURRENCY) if target_latency > 0 else None,
         )
         self._distributor: TypedAsyncQueue | None = None
-        self._event_callback: dict[Type[BaseEvent], set[Callable[[BaseEvent], Awaitable[None]]]] = {}
-        self._inherit_cache: dict[Type[BaseEvent], set[Callable[[BaseEvent], Awaitable[None]]]] = {}
-
-    async def _init_event_callback(self) -> None:
-        event_types = await asyncio.gather(*(callback.actual_func() for callback in self.callbacks))
-        for callback, event_type in zip(self.callbacks, event_types):
+        self._inbox: TypedAsyncQueue | None = None
+        self._event_callback: dict[Type[BaseEvent], list[Callable[[BaseEvent], Awaitable[bool]]]] = {}
+        self._partition_keys: dict[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], Hashable]] = {}
+        self._filters: dict[Callable[[BaseEvent], Awaitable[bool]], EventFilter] = {}
+        self._topics: dict[Callable[[BaseEvent], Awaitable[bool]], tuple[str, Callable[[str], bool]]] = {}
+        self._dispatch_table: dict[
+            Type[BaseEvent],
+            tuple[
+                tuple[Callable[[BaseEvent], Awaitable[bool]], ...],
+                tuple[tuple[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], Hashable]], ...],
+                tuple[tuple[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], bool], Callable[[BaseEvent], Hashable] | None], ...],
+            ],
+        ] = {}
+
+        self._partition_lanes = max(partition_lanes, 1)
+        self._lane_maxsize = max(process_event_queue_maxsize, 0)
+        self._lanes: dict[int, tuple[TypedAsyncQueue, ProducerConsumerWorker]] = {} # Created on the first event of each lane.
+
+    @staticmethod
+    def _new_lane_producer(lane: TypedAsyncQueue) -> Callable[[], Awaitable[tuple]]:
+        async def producer() -> tuple:
+            item = await lane.get()
+            lane.task_done()
+            return item
+
+        return producer
+
+    @staticmethod
+    async def _lane_consumer(item: tuple[Callable[[BaseEvent], Awaitable[bool]], BaseEvent]) -> bool:
+        callback, event = item
+        return await _journal_done(event, callback(event))
+
+    @staticmethod
+    def _get_partition_key_getter(callback: CallbackItem) -> Callable[[BaseEvent], Hashable] | None:
+        partition_key = getattr(callback.wrapper_args, "partition_key", None)
+        if partition_key is None or callable(partition_key):
+            return partition_key
+        if isinstance(partition_key, str) and partition_key:
+            return attrgetter(partition_key)
+
+        PROCESS_TYPE_LOGGER.warning(f"[{callback.func_name}]: <{partition_key}> is not a valid partition key, the events will not be partitioned.")
+        return None
+
+    @staticmethod
+    def _get_filter(callback: CallbackItem, event_type: Type[BaseEvent]) -> EventFilter | None:
+        """
+        :return: The filter of the callback, none if it has no filter.
+        :raise ValueError: The where argument is not a valid filter of the event type.
+        """
+        where = getattr(callback.wrapper_args, "where", None)
+        if where is None:
+            return None
+        if not isinstance(where, dict) or not where:
+            raise ValueError(f"<{where}> is not a non-empty dict")
+
+        event_fields = {field.name for field in fields(event_type)} if is_dataclass(event_type) else set()
+        for name, value in where.items():
+            if name not in event_fields:
+                raise ValueError(f"<{name}> is not a field of <{event_type.__name__}>")
+            hash(value) # The values are indexed by the distributor.
+        return tuple(where.items())
+
+    @staticmethod
+    def _get_topic(callback: CallbackItem) -> tuple[str, Callable[[str], bool]] | None:
+        """
+        :return: The topic pattern of the callback and its matcher, none if it has no topic.
+        :raise ValueError: The topic argument is not a valid topic pattern.
+        """
+        topic = getattr(callback.wrapper_args, "topic", "")
+        if not topic:
+            return None
+        return topic, compile_topic_pattern(topic)
+
+    def _init_event_callback(self) -> None:
+        for callback in self.callbacks:
+            event_type = getattr(callback.wrapper_args, "event_type", None)
             try:
                 if issubclass(event_type, BaseEvent):
-                    self._event_callback.setdefault(event_type, set()).add(callback.actual_func)
+                    try:
+                        event_filter = self._get_filter(callback, event_type)
+                    except (ValueError, TypeError) as e:
+                        PROCESS_TYPE_LOGGER.warning(f"[{callback.func_name}]: Invalid where filter ({e}), this callback function will be ignored.")
+                        continue
+                    try:
+                        topic = self._get_topic(callback)
+                    except ValueError as e:
+                        PROCESS_TYPE_LOGGER.warning(f"[{callback.func_name}]: Invalid topic ({e}), this callback function will be ignored.")
+                        continue
+
+                    self._event_callback.setdefault(event_type, []).append(callback.actual_func)
+                    key_getter = self._get_partition_key_getter(callback)
+                    if key_getter is not None:
+                        self._partition_keys[callback.actual_func] = key_getter
+                    if event_filter is not None:
+                        self._filters[callback.actual_func] = event_filter
+                    if topic is not None:
+                        self._topics[callback.actual_func] = topic
                     continue
 
             except TypeError:
@@ -66,60 +227,307 @@ class ProcessSchedulerItem(BaseSchedulerItem):
             PROCESS_TYPE_LOGGER.warning(f"[{callback.func_name}]: <{event_type}> is not a subclass of <BaseEvent>, this callback function will be ignored.")
             continue
 
+    def _get_min_option(self, name: str, default: int | float) -> int | float:
+        values = [
+            value
+            for callback in self.callbacks
+            if (value := getattr(callback.wrapper_args, name, 0)) > 0
+        ]
+        if not values:
+            return max(0, default)
+        return min(values)
+
+    def _get_overflow_policy(self) -> str:
+        policies = {
+            policy: callback
+            for callback in self.callbacks
+            if (policy := getattr(callback.wrapper_args, "overflow_policy", ""))
+        }
+        if not policies:
+            return self._overflow_policy
+
+        policy, callback = next(iter(policies.items()))
+        if len(policies) > 1:
+            PROCESS_TYPE_LOGGER.warning(f"[{self.identifier}]: Conflicting overflow policies {tuple(policies)}, use <{policy}> from <{callback.func_name}>.")
+        return policy
+
     def _reset_event_callback(self) -> None:
         self._event_callback.clear()
-        self._inherit_cache.clear()
-
-    def _get_callbacks(self, event: BaseEvent) -> set[Callable[[BaseEvent], Awaitable[None]]]:
+        self._partition_keys.clear()
+        self._filters.clear()
+        self._topics.clear()
+        self._dispatch_table.clear()
+
+    def _get_subscriptions(self) -> tuple[
+        set[Type[BaseEvent]],
+        dict[Type[BaseEvent], tuple[EventFilter, ...]],
+        tuple[tuple[Type[BaseEvent], str], ...],
+    ]:
+        """
+        :return: The event types received without filters, the filters of the event types whose callbacks all have one,
+         and the topic patterns. A callback with a topic is subscribed by its topic only, its filter is applied by the scheduler.
+        """
+        event_types: set[Type[BaseEvent]] = set()
+        where: dict[Type[BaseEvent], tuple[EventFilter, ...]] = {}
+        topics: dict[tuple[Type[BaseEvent], str], None] = {}
+        for event_type, callbacks in self._event_callback.items():
+            event_filters: list[EventFilter] = []
+            for callback in callbacks:
+                if callback in self._topics:
+                    topics[(event_type, self._topics[callback][0])] = None
+                elif callback in self._filters:
+                    event_filters.append(self._filters[callback])
+                else:
+                    event_types.add(event_type)
+
+            if event_filters and event_type not in event_types:
+                where[event_type] = tuple(event_filters)
+        return event_types, where, tuple(topics)
+
+    @staticmethod
+    def _compile_where(event_filter: EventFilter) -> Callable[[BaseEvent], bool]:
+        getter = attrgetter(*(name for name, _ in event_filter))
+        values = tuple(value for _, value in event_filter)
+        if len(values) == 1:
+            values = values[0]
+        return lambda event: getter(event) == values
+
+    def _compile_filter(self, callback: Callable[[BaseEvent], Awaitable[bool]]) -> Callable[[BaseEvent], bool]:
+        """
+        :return: A predicate that tells whether the callback processes the event, from its where filter and its topic.
+        """
+        where = self._compile_where(self._filters[callback]) if callback in self._filters else None
+        if callback not in self._topics:
+            return where
+
+        _, match_topic = self._topics[callback]
+        if where is None:
+            return lambda event: bool(event.event_topic) and match_topic(event.event_topic)
+        return lambda event: bool(event.event_topic) and match_topic(event.event_topic) and where(event)
+
+    def _get_dispatch(self, event: BaseEvent) -> tuple[
+        tuple[Callable[[BaseEvent], Awaitable[bool]], ...],
+        tuple[tuple[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], Hashable]], ...],
+        tuple[tuple[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], bool], Callable[[BaseEvent], Hashable] | None], ...],
+    ]:
         event_type = event.__class__
-        if event_type in self._inherit_cache:
-            return self._inherit_cache[event_type]
-
-        cache_callbacks = set()
-        for key, callbacks in self._event_callback.items():
-            if issubclass(event_type, key):
-                cache_callbacks.update(callbacks)
-
-        return cache_callbacks
+        dispatch = self._dispatch_table.get(event_type)
+        if dispatch is not None:
+            return dispatch
+
+        resolved: dict[Callable[[BaseEvent], Awaitable[bool]], None] = {}
+        for cls in event_type.__mro__:
+            for callback in self._event_callback.get(cls, ()):
+                resolved[callback] = None
+
+        filtered = {callback for callback in resolved if callback in self._filters or callback in self._topics}
+        dispatch = (
+            tuple(callback for callback in resolved if callback not in self._partition_keys and callback not in filtered),
+            tuple((callback, self._partition_keys[callback]) for callback in resolved if callback in self._partition_keys and callback not in filtered),
+            tuple(
+                (callback, self._compile_filter(callback), self._partition_keys.get(callback))
+                for callback in resolved if callback in filtered
+            ),
+        )
+        self._dispatch_table[event_type] = dispatch
+        return dispatch
+
+    def _resolve_callbacks(self, event: BaseEvent) -> tuple[
+        tuple[Callable[[BaseEvent], Awaitable[bool]], ...],
+        tuple[tuple[Callable[[BaseEvent], Awaitable[bool]], Callable[[BaseEvent], Hashable]], ...],
+    ]:
+        """
+        :return: The callbacks and the partitioned callbacks that process the event, after applying the filters and the topics.
+        """
+        callbacks, partitioned, filtered = self._get_dispatch(event)
+        if not filtered:
+            return callbacks, partitioned
+
+        matched = [(callback, key_getter) for callback, predicate, key_getter in filtered if predicate(event)]
+        if not matched:
+            return callbacks, partitioned
+        return (
+            callbacks + tuple(callback for callback, key_getter in matched if key_getter is None),
+            partitioned + tuple((callback, key_getter) for callback, key_getter in matched if key_getter is not None),
+        )
 
-    async def _producer(self) -> BaseEvent:
-        event = await self._distributor.get()
-        self._distributor.task_done()
-        return event
+    def _get_lane_index(self, key_getter: Callable[[BaseEvent], Hashable], event: BaseEvent) -> int:
+        try:
+            return hash(key_getter(event)) % self._partition_lanes
+        except Exception as e:
+            PROCESS_TYPE_LOGGER.warning(f"[{self.identifier}]: Failed to get the partition key of <{event}>, use the first lane.", exc_info=e)
+            return 0
+
+    async def _get_lane(self, index: int) -> TypedAsyncQueue:
+        lane = self._lanes.get(index)
+        if lane is None:
+            queue = TypedAsyncQueue(tuple, self._lane_maxsize)
+            lane = self._lanes[index] = (queue, ProducerConsumerWorker(self._new_lane_producer(queue), self._lane_consumer, serial=True))
+            await lane[1].start()
+        return lane[0]
+
+    async def _requeue(
+            self,
+            event: BaseEvent,
+            handoffs: list[tuple[int, Callable[[BaseEvent], Awaitable[bool]]]],
+            callbacks: tuple[Callable[[BaseEvent], Awaitable[bool]], ...],
+    ) -> None:
+        """
+        Put the callbacks of an event taken from the inbox into the lanes even if they are full, when the producer is cancelled.
+        """
+        _retain(event, len(callbacks) - 1) # Each lane item reports done, instead of the consumer once.
+        for index, callback in handoffs + [(0, callback) for callback in callbacks]:
+            (await self._get_lane(index)).force_put((callback, event))
+
+    async def _forwarder(self) -> None:
+        while True:
+            events = await self._distributor.bulk_get(SHARD_HANDOFF_BATCH_MAXSIZE)
+            for _ in events:
+                self._distributor.task_done()
+            self._handoff.extend(events)
+            await self._shard.run(self._hand_off())
+
+    async def _hand_off(self) -> None:
+        while self._handoff:
+            await self._inbox.put(self._handoff[0])
+            self._handoff.popleft()
+
+    async def _producer(self) -> tuple[BaseEvent, tuple[Callable[[BaseEvent], Awaitable[bool]], ...]] | None:
+        event = await self._inbox.get()
+        self._inbox.task_done()
+
+        if event.event_deadline and event_expiry_manager.enabled and event_expiry_manager.is_expired(event, self.identifier):
+            if global_trace_manager.active:
+                global_trace_manager.retain(event, 0)
+            _done(event)
+            return None
+
+        callbacks, partitioned = self._resolve_callbacks(event)
+        _retain(event, len(partitioned))
+        if global_trace_manager.active:
+            global_trace_manager.retain(event, len(callbacks) + len(partitioned))
+        handoffs = [(self._get_lane_index(key_getter, event), callback) for callback, key_getter in partitioned]
+        for position, (index, callback) in enumerate(handoffs): # Put in the producer to keep the distributor order in each lane.
+            try:
+                await (await self._get_lane(index)).put((callback, event))
+            except asyncio.CancelledError: # Stopped while the lane is full.
+                await self._requeue(event, handoffs[position:], callbacks)
+                raise
 
-    async def _consumer(self, event: BaseEvent) -> None:
-        callbacks = self._get_callbacks(event)
         if not callbacks:
-            return
-
-        await asyncio.gather(*(callback(event) for callback in callbacks))
+            _done(event)
+            return None
+        return event, callbacks
+
+    async def _consumer(self, item: tuple[BaseEvent, tuple[Callable[[BaseEvent], Awaitable[bool]], ...]]) -> bool:
+        event, callbacks = item
+        if event.event_deadline and event_expiry_manager.enabled and event_expiry_manager.is_expired(event, self.identifier):
+            if global_trace_manager.active:
+                global_trace_manager.skip(event, len(callbacks))
+            _done(event)
+            return True
+
+        return all(await _journal_done(event, fan_out(callbacks, event)))
+
+    def get_concurrency_stats(self) -> dict[str, int | float]:
+        limiter = self._worker.limiter
+        if limiter is None:
+            return {"limit": 0, "in_flight": 0, "latency": 0.0}
+
+        return {
+            "limit": limiter.limit,
+            "in_flight": limiter.in_flight,
+            "latency": getattr(limiter, "latency", 0.0),
+        }
 
     async def start(self) -> None:
         if self._worker.is_running():
             return
 
-        await self._init_event_callback()
+        self._init_event_callback()
         if not self._event_callback:
             self._reset_event_callback()
             return
 
-        self._distributor = event_distributor_manager.get_distributor(self.identifier, set(self._event_callback.keys()))
+        event_types, where, topics = self._get_subscriptions()
+        self._distributor = event_distributor_manager.get_distributor(
+            self.identifier,
+            event_types,
+            self._get_overflow_policy(),
+            where,
+            topics,
+            any(getattr(callback.wrapper_args, "deadline_order", False) for callback in self.callbacks),
+        )
+        global_metrics_manager.add_concurrency_getter(self.identifier, self.get_concurrency_stats)
+        if self._shard is None:
+            self._inbox = self._distributor
+            await self._start_workers()
+            return
+
+        self._inbox = TypedAsyncQueue(BaseEvent, SHARD_HANDOFF_BATCH_MAXSIZE)
+        await self._shard.run(self._start_workers())
+        self._forwarder_task = asyncio.create_task(self._forwarder())
+
+    async def _start_workers(self) -> None:
         await self._worker.start()
 
+    async def _stop_workers(self, force_stop: bool) -> None:
+        await self._worker.stop(force_stop)
+        for lane, lane_worker in self._lanes.values():
+            if not force_stop:
+                await lane.join()
+            await lane_worker.stop(force_stop)
+        self._lanes.clear()
+
+        if self._inbox is not self._distributor: # The events left in the shard, the distributor reports its own.
+            while not self._inbox.empty():
+                _discard(self._inbox.get_nowait())
+                self._inbox.task_done()
+            while self._handoff:
+                _discard(self._handoff.popleft())
+
     async def stop(self, force_stop: bool = False) -> None:
         if not self._worker.is_running():
             return
 
-        await self._worker.stop(force_stop)
+        if self._shard is None:
+            await self._stop_workers(force_stop)
+        else:
+            self._forwarder_task.cancel()
+            try:
+                await self._forwarder_task
+            except asyncio.CancelledError:
+                pass
+            self._forwarder_task = None
+            await self._shard.run(self._stop_workers(force_stop))
+
         self._reset_event_callback()
+        global_metrics_manager.remove_concurrency_getter(self.identifier)
         event_distributor_manager.del_distributor(self.identifier)
         self._distributor = None
+        self._inbox = None
+
+def get_concurrency_stats(self: SchedulerManager, identifier: str) -> dict[str, int | float]:
+    """
+    This function is injected into the process scheduler manager.
+    :return: The current concurrency limit, the consumer tasks in flight and the average callback latency (seconds) of the plugin.
+    """
+    if identifier not in self.schedulers:
+        return {}
+
+    return self.schedulers[identifier].get_concurrency_stats()
 
 process_scheduler = SchedulerManager(
     CALLBACK_TYPE.PROCESS,
     global_callback_container,
     ProcessSchedulerItem,
-    {"process_event_queue_maxsize": PROCESS_EVENT_QUEUE_MAXSIZE},
+    {
+        "process_event_queue_maxsize": PROCESS_EVENT_QUEUE_MAXSIZE,
+        "max_concurrency": PROCESS_MAX_CONCURRENCY,
+        "target_latency": PROCESS_TARGET_LATENCY,
+        "partition_lanes": PROCESS_PARTITION_LANES,
+    },
+    get_concurrency_stats=get_concurrency_stats,
 )
 
 
@@ -0,0 +1,63 @@
+from typing import Any, Iterable
+
+from .config import get_config
+from .event.bus import global_event_bus
+from .path import get_data_path
+from .shard import global_shard_manager
+from ..components.dead_letter import DeadLetterManager
+
+
+DEAD_LETTER_ENABLE = get_config("DEAD_LETTER_ENABLE", False)
+DEAD_LETTER_REINJECT_RATE = get_config("DEAD_LETTER_REINJECT_RATE", 100.0)
+
+global_dead_letter_manager = DeadLetterManager(
+    DEAD_LETTER_ENABLE,
+    get_config("DEAD_LETTER_MAXSIZE", 10000),
+    get_config("DEAD_LETTER_FLUSH_INTERVAL", 1.0),
+)
+
+
+async def start_dead_letter() -> None:
+    if DEAD_LETTER_ENABLE:
+        await global_dead_letter_manager.start(get_data_path("dead_letter") / "entries.dlq")
+
+
+def get_dead_letters(identifier: str = "", limit: int = 0) -> list[dict[str, Any]]:
+    """
+    :param identifier: Only the entries of this plugin, all the entries if it is empty.
+    :param limit: At most this many of the oldest entries, all of them if it is 0.
+    :return: The entries of the dead-letter store, oldest first.
+    """
+    return global_dead_letter_manager.get_entries(identifier, limit)
+
+
+def get_dead_letter_stats() -> dict[str, Any]:
+    return global_dead_letter_manager.get_stats()
+
+
+def discard_dead_letters(ids: Iterable[int] | None = None) -> int:
+    """
+    :param ids: The ids of the entries to remove, all the entries if it is none.
+    :return: The number of entries removed.
+    """
+    return global_dead_letter_manager.discard(ids)
+
+
+async def reinject_dead_letters(ids: Iterable[int] | None = None, rate: float = DEAD_LETTER_REINJECT_RATE) -> int:
+    """
+    Put the events of the dead-letter store back into the global event bus.
+    :param ids: The ids of the entries to re-inject, all the entries if it is none.
+    :param rate: At most this many events per second. If this parameter is 0, do not limit the rate.
+    :return: The number of events re-injected.
+    """
+    return await global_shard_manager.run_main(global_dead_letter_manager.reinject(global_event_bus.put, ids, rate))
+
+
+__all__ = [
+    "global_dead_letter_manager",
+    "start_dead_letter",
+    "get_dead_letters",
+    "get_dead_letter_stats",
+    "discard_dead_letters",
+    "reinject_dead_letters",
+]
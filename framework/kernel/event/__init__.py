@@ -1,8 +1,14 @@
 from . import bus
 from . import distributor
+from . import expiry
+from . import journal
+from . import request
 
 
 __all__ = [
     "bus",
     "distributor",
+    "expiry",
+    "journal",
+    "request",
 ]
@@ -1,9 +1,30 @@
+from .journal import event_journal_manager
 from ..config import get_config
+from ..metrics import global_metrics_manager
+from ..trace import global_trace_manager
+from ...constants.event import EVENT_PRIORITY
 from ...types.event import BaseEvent
-from ...utils.queue import TypedAsyncQueue
+from ...utils.queue import PriorityAsyncQueue
 
 
-global_event_bus = TypedAsyncQueue(BaseEvent, get_config("EVENT_BUS_MAXSIZE", 1024))
+def _get_event_priority(event: BaseEvent) -> int:
+    return event.event_priority
+
+
+def _put_hook(event: BaseEvent) -> None:
+    event_journal_manager.record(event)
+    global_trace_manager.enqueue(event)
+
+
+global_event_bus = PriorityAsyncQueue(
+    BaseEvent,
+    get_config("EVENT_BUS_MAXSIZE", 1024),
+    _get_event_priority,
+    get_config("EVENT_BUS_STARVATION_LIMIT", 32),
+    EVENT_PRIORITY.CONTROL,
+    _put_hook if global_trace_manager.sample_rate > 0 else event_journal_manager.record,
+    global_metrics_manager.new_bus_probe(_get_event_priority),
+)
 
 
 __all__ = [
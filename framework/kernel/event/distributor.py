@@ -1,23 +1,66 @@
 import asyncio
-from typing import Hashable, Type
+from operator import attrgetter
+from typing import Any, Callable, Hashable, Type
+from weakref import WeakKeyDictionary
 
 from .bus import global_event_bus
+from .expiry import event_expiry_manager
+from .journal import event_journal_manager
+from .request import event_request_manager
 from ..config import get_config
 from ..logger import get_logger
-from ...types.event import BaseEvent
-from ...utils.queue import TypedAsyncQueue
+from ..metrics import global_metrics_manager
+from ..path import get_data_path
+from ..trace import global_trace_manager
+from ...constants.event import EXPIRY_POINT, OVERFLOW_POLICY, OVERFLOW_POLICIES
+from ...state.framework import SNOWX_STATE
+from ...types.event import BaseEvent, EventFilter
+from ...utils.queue import TypedAsyncQueue, OverflowAsyncQueue
+from ...utils.spill import SpillFile
+from ...utils.topic import TopicTrie, split_topic_pattern
 from ...utils.worker import ProducerConsumerWorker
 
 
 DISTRIBUTOR_QUEUE_MAXSIZE = get_config("DISTRIBUTOR_QUEUE_MAXSIZE", 1024)
 DISTRIBUTOR_BUFFER_MAXSIZE = get_config("DISTRIBUTOR_BUFFER_MAXSIZE", 256)
+DISTRIBUTOR_BATCH_MAXSIZE = get_config("DISTRIBUTOR_BATCH_MAXSIZE", 64)
+DISTRIBUTOR_BATCH_WINDOW = get_config("DISTRIBUTOR_BATCH_WINDOW", 0.0)
+DISTRIBUTOR_OVERFLOW_POLICY = get_config("DISTRIBUTOR_OVERFLOW_POLICY", OVERFLOW_POLICY.BLOCK)
+DISTRIBUTOR_SPILL_MAXBYTES = get_config("DISTRIBUTOR_SPILL_MAXBYTES", 64 * 1024 * 1024)
+DISTRIBUTOR_SPILL_SEGMENT_MAXBYTES = get_config("DISTRIBUTOR_SPILL_SEGMENT_MAXBYTES", 4 * 1024 * 1024)
+DISTRIBUTOR_TOPIC_CACHE_MAXSIZE = get_config("DISTRIBUTOR_TOPIC_CACHE_MAXSIZE", 4096)
 
 LOGGER = get_logger("EventDistributor")
 
+_MISSING = object()
+
+_get_event_deadline = attrgetter("event_deadline")
+
+
+def _on_evict(event: BaseEvent) -> None:
+    event_journal_manager.done(event)
+    if event_request_manager.active:
+        event_request_manager.done(event)
+
+
+if DISTRIBUTOR_OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+    LOGGER.warning(f"Unsupported overflow policy <{DISTRIBUTOR_OVERFLOW_POLICY}>, use <{OVERFLOW_POLICY.BLOCK}> instead.")
+    DISTRIBUTOR_OVERFLOW_POLICY = OVERFLOW_POLICY.BLOCK
+
 
 class EventDistributorManager:
+    """
+    Route the events of the global event bus, in batches and in bus order, to the distributor queues of the subscribers
+    that match them by event type, field filters or topic pattern (see get_distributor).
+    """
     def __init__(self):
-        self._distributors: dict[Hashable, tuple[TypedAsyncQueue, set[Type[BaseEvent]]]] = {}
+        self._distributors: dict[Hashable, tuple[
+            OverflowAsyncQueue,
+            set[Type[BaseEvent]],
+            dict[Type[BaseEvent], tuple[EventFilter, ...]],
+            tuple[tuple[Type[BaseEvent], str], ...],
+        ]] = {}
+        self._route_lock = asyncio.Lock()
 
         self._scheduler = ProducerConsumerWorker(
             self._producer,
@@ -25,45 +68,315 @@ class EventDistributorManager:
             DISTRIBUTOR_BUFFER_MAXSIZE,
         )
 
-        self._event_distributor_cache: dict[Type[BaseEvent], list[TypedAsyncQueue]] = {}
+        # Subscribed event type -> distributor queues, used to resolve an event class through its MRO.
+        # The caches are rebuilt after the subscriptions change, and reloaded event classes are not kept alive by them.
+        self._type_index: dict[Type[BaseEvent], dict[Hashable, TypedAsyncQueue]] = {}
+        self._event_distributor_cache: WeakKeyDictionary[Type[BaseEvent], list[TypedAsyncQueue]] = WeakKeyDictionary()
+        # Filtered event type -> first field -> value -> [(subscriber symbol, distributor queue, getter and values of the other fields)]
+        self._where_index: dict[Type[BaseEvent], dict[str, dict[Hashable, list[tuple[Hashable, TypedAsyncQueue, tuple[Callable[[BaseEvent], Any], tuple] | None]]]]] = {}
+        self._event_where_cache: WeakKeyDictionary[Type[BaseEvent], tuple[tuple[str, dict[Hashable, list]], ...]] = WeakKeyDictionary()
+        # Topic pattern -> [(subscriber symbol, distributor queue, event type)]
+        self._topic_trie = TopicTrie()
+        self._topic_cache: dict[tuple[Type[BaseEvent], str], list[TypedAsyncQueue]] = {}
 
-    def _get_event_distributor(self, event: BaseEvent) -> list[TypedAsyncQueue]:
+    def _resolve(self, event_type: Type[BaseEvent]) -> list[TypedAsyncQueue]:
+        queues: dict[Hashable, TypedAsyncQueue] = {}
+        for cls in event_type.__mro__:
+            subscribers = self._type_index.get(cls)
+            if subscribers:
+                queues.update(subscribers)
+
+        return list(queues.values())
+
+    def _resolve_where(self, event_type: Type[BaseEvent]) -> tuple[tuple[str, dict[Hashable, list]], ...]:
+        return tuple(
+            field_index
+            for cls in event_type.__mro__
+            for field_index in self._where_index.get(cls, {}).items()
+        )
+
+    def _match_where(self, event: BaseEvent, queues: list[TypedAsyncQueue]) -> list[TypedAsyncQueue]:
         event_type = event.__class__
-        if event_type in self._event_distributor_cache:
-            return self._event_distributor_cache[event_type]
+        where = self._event_where_cache.get(event_type)
+        if where is None:
+            where = self._event_where_cache[event_type] = self._resolve_where(event_type)
+
+        matched = queues
+        for field, value_index in where:
+            try:
+                subscribers = value_index.get(getattr(event, field, _MISSING))
+            except TypeError: # Unhashable value.
+                continue
+            if not subscribers:
+                continue
 
-        cache = []
-        for distributor in self._distributors.values():
-            if any(issubclass(event_type, rec_type) for rec_type in distributor[1]):
-                cache.append(distributor[0])
+            for _, queue, rest in subscribers:
+                if queue in matched or (rest is not None and rest[0](event) != rest[1]):
+                    continue
+                if matched is queues:
+                    matched = list(queues)
+                matched.append(queue)
 
-        self._event_distributor_cache[event_type] = cache
-        return cache
+        return matched
+
+    def _resolve_topic(self, event_type: Type[BaseEvent], topic: str) -> list[TypedAsyncQueue]:
+        queues: list[TypedAsyncQueue] = []
+        for _, queue, subscribed_type in self._topic_trie.match(topic):
+            if queue not in queues and issubclass(event_type, subscribed_type):
+                queues.append(queue)
+        return queues
+
+    def _match_topic(self, event: BaseEvent, queues: list[TypedAsyncQueue]) -> list[TypedAsyncQueue]:
+        topic = event.event_topic
+        if not topic:
+            return queues
+
+        key = (event.__class__, topic)
+        topic_queues = self._topic_cache.get(key)
+        if topic_queues is None:
+            if len(self._topic_cache) >= DISTRIBUTOR_TOPIC_CACHE_MAXSIZE:
+                self._topic_cache.clear()
+            topic_queues = self._topic_cache[key] = self._resolve_topic(*key)
+
+        matched = queues
+        for queue in topic_queues:
+            if queue in matched:
+                continue
+            if matched is queues:
+                matched = list(queues)
+            matched.append(queue)
+        return matched
+
+    def _get_event_distributor(self, event: BaseEvent) -> list[TypedAsyncQueue]:
+        event_type = event.__class__
+        queues = self._event_distributor_cache.get(event_type)
+        if queues is None:
+            queues = self._resolve(event_type)
+            self._event_distributor_cache[event_type] = queues
+
+        if self._where_index:
+            queues = self._match_where(event, queues)
+        if self._topic_trie:
+            queues = self._match_topic(event, queues)
+        return queues
 
     @staticmethod
-    async def _producer() -> BaseEvent:
-        event = await global_event_bus.get()
-        global_event_bus.task_done()
-        return event
-
-    async def _consumer(self, event: BaseEvent) -> None:
-        distributors = self._get_event_distributor(event)
-        if not distributors:
-            return
-        await asyncio.gather(*(queue.auto_put(event) for queue in distributors))
+    def _compile_filter(event_filter: EventFilter) -> tuple[str, Hashable, tuple[Callable[[BaseEvent], Any], tuple] | None]:
+        (field, value), *rest = event_filter
+        if not rest:
+            return field, value, None
+
+        getter = attrgetter(*(name for name, _ in rest))
+        values = tuple(value for _, value in rest)
+        return field, value, (getter, values[0] if len(values) == 1 else values)
+
+    def _where_add(self, symbol: Hashable, queue: TypedAsyncQueue, where: dict[Type[BaseEvent], tuple[EventFilter, ...]]) -> None:
+        for event_type, event_filters in where.items():
+            for event_filter in event_filters:
+                field, value, rest = self._compile_filter(event_filter)
+                self._where_index.setdefault(event_type, {}).setdefault(field, {}).setdefault(value, []).append((symbol, queue, rest))
+        self._event_where_cache.clear()
+
+    def _where_remove(self, symbol: Hashable, where: dict[Type[BaseEvent], tuple[EventFilter, ...]]) -> None:
+        for event_type in where:
+            field_index = self._where_index.get(event_type, {})
+            for field, value_index in tuple(field_index.items()):
+                for value, subscribers in tuple(value_index.items()):
+                    subscribers[:] = [subscriber for subscriber in subscribers if subscriber[0] != symbol]
+                    if not subscribers:
+                        del value_index[value]
+                if not value_index:
+                    del field_index[field]
+            if not field_index:
+                self._where_index.pop(event_type, None)
+        self._event_where_cache.clear()
 
-    def get_distributor(self, symbol: Hashable, event_types: set[Type[BaseEvent]]) -> TypedAsyncQueue:
+    def _index_add(self, symbol: Hashable, queue: TypedAsyncQueue, event_types: set[Type[BaseEvent]]) -> None:
+        for event_type in event_types:
+            self._type_index.setdefault(event_type, {})[symbol] = queue
         self._event_distributor_cache.clear()
-        return self._distributors.setdefault(symbol, (TypedAsyncQueue(BaseEvent, DISTRIBUTOR_QUEUE_MAXSIZE), event_types))[0]
 
-    def del_distributor(self, symbol: Hashable) -> None:
+    def _index_remove(self, symbol: Hashable, event_types: set[Type[BaseEvent]]) -> None:
+        for event_type in event_types:
+            subscribers = self._type_index.get(event_type)
+            if subscribers is None:
+                continue
+            subscribers.pop(symbol, None)
+            if not subscribers:
+                del self._type_index[event_type]
         self._event_distributor_cache.clear()
-        self._distributors.pop(symbol, None)
+
+    @staticmethod
+    def _drop_expired(events: tuple[BaseEvent, ...], point: str) -> tuple[BaseEvent, ...]:
+        events, expired = event_expiry_manager.split(events, point)
+        if not expired:
+            return events
+
+        for event in expired:
+            event_journal_manager.route(event, 0)
+            if event_request_manager.active:
+                event_request_manager.expire(event)
+        if global_trace_manager.active:
+            global_trace_manager.discard(expired)
+        return events
+
+    async def _producer(self) -> tuple[BaseEvent, ...] | None:
+        events = await global_event_bus.bulk_get(DISTRIBUTOR_BATCH_MAXSIZE, DISTRIBUTOR_BATCH_WINDOW)
+        for _ in events:
+            global_event_bus.task_done()
+        if global_trace_manager.active:
+            global_trace_manager.dequeue(events)
+        if event_expiry_manager.enabled:
+            events = self._drop_expired(events, EXPIRY_POINT.BUS)
+        return events or None
+
+    def _route(self, events: tuple[BaseEvent, ...]) -> dict[TypedAsyncQueue, list[BaseEvent]]:
+        routes: dict[TypedAsyncQueue, list[BaseEvent]] = {}
+        journal = event_journal_manager if event_journal_manager.enabled else None
+        requests = event_request_manager if event_request_manager.active else None
+        for event in events:
+            queues = self._get_event_distributor(event)
+            for queue in queues:
+                routes.setdefault(queue, []).append(event)
+            if journal is not None:
+                journal.route(event, len(queues))
+            if requests is not None:
+                requests.route(event, len(queues))
+
+        return routes
+
+    def _get_subscriber_count(self, event: BaseEvent) -> int:
+        return len(self._get_event_distributor(event))
+
+    async def _consumer(self, events: tuple[BaseEvent, ...]) -> None:
+        async with self._route_lock: # Keep the batches in bus order when a distributor queue is full.
+            if event_expiry_manager.enabled:
+                events = self._drop_expired(events, EXPIRY_POINT.DISTRIBUTOR)
+            traced_at = global_trace_manager.route(events, self._get_subscriber_count) if global_trace_manager.active else 0
+            for queue, queue_events in self._route(events).items():
+                await queue.bulk_put(queue_events)
+            if traced_at:
+                global_trace_manager.routed(events, traced_at)
+
+    @staticmethod
+    def _new_queue(symbol: Hashable, overflow_policy: str, deadline_order: bool) -> OverflowAsyncQueue:
+        if not overflow_policy:
+            overflow_policy = DISTRIBUTOR_OVERFLOW_POLICY
+        if overflow_policy not in OVERFLOW_POLICIES:
+            LOGGER.warning(f"[{symbol}]: Unsupported overflow policy <{overflow_policy}>, use <{DISTRIBUTOR_OVERFLOW_POLICY}> instead.")
+            overflow_policy = DISTRIBUTOR_OVERFLOW_POLICY
+
+        spill_file = None
+        if overflow_policy == OVERFLOW_POLICY.SPILL:
+            spill_file = SpillFile(get_data_path("spill") / str(symbol), DISTRIBUTOR_SPILL_MAXBYTES, DISTRIBUTOR_SPILL_SEGMENT_MAXBYTES)
+
+        return OverflowAsyncQueue(
+            BaseEvent,
+            DISTRIBUTOR_QUEUE_MAXSIZE,
+            overflow_policy,
+            spill_file,
+            _on_evict,
+            global_metrics_manager.new_distributor_probe(symbol),
+            _get_event_deadline if deadline_order else None,
+            event_journal_manager.spill,
+            event_journal_manager.restore,
+        )
+
+    def get_distributor(
+            self,
+            symbol: Hashable,
+            event_types: set[Type[BaseEvent]],
+            overflow_policy: str = "",
+            where: dict[Type[BaseEvent], tuple[EventFilter, ...]] | None = None,
+            topics: tuple[tuple[Type[BaseEvent], str], ...] = (),
+            deadline_order: bool = False,
+    ) -> OverflowAsyncQueue:
+        """
+        Get the distributor queue of the subscriber, create it if it does not exist.
+        :param symbol: Subscriber symbol
+        :param event_types: The event types that the subscriber receives, including their subclasses.
+        :param overflow_policy: Overflow policy of the queue. If this parameter is empty, DISTRIBUTOR_OVERFLOW_POLICY will be used.
+         It is ignored if the queue already exists.
+        :param where: Event type -> filters. The subscriber receives the events of the type (including its subclasses)
+         that match any of the filters, i.e. whose fields are equal to all the values of the filter.
+         The event types in event_types are received without filters.
+        :param topics: (Event type, topic pattern) pairs. The subscriber receives the events of the type (including its subclasses)
+         whose topic matches the pattern. In a pattern, <*> matches one segment and a last <#> matches the rest of the topic.
+        :param deadline_order: Take the events from the queue in earliest-deadline-first order (see BaseEvent.event_deadline),
+         the events without a deadline after them. It is ignored if the queue already exists.
+        :return: Distributor queue
+        :raise ValueError: A topic pattern is not valid.
+        """
+        if symbol in self._distributors:
+            return self._distributors[symbol][0]
+
+        for _, pattern in topics:
+            split_topic_pattern(pattern)
+
+        where = {event_type: tuple(event_filters) for event_type, event_filters in (where or {}).items() if event_filters}
+        topics = tuple(topics)
+        queue = self._new_queue(symbol, overflow_policy, deadline_order)
+        self._distributors[symbol] = (queue, set(event_types), where, topics)
+        self._index_add(symbol, queue, event_types)
+        if where:
+            self._where_add(symbol, queue, where)
+        if topics:
+            for event_type, pattern in topics:
+                self._topic_trie.add(pattern, (symbol, queue, event_type))
+            self._topic_cache.clear()
+        return queue
+
+    def get_event_types(self, symbol: Hashable) -> set[Type[BaseEvent]]:
+        """
+        :return: The event types that the subscriber receives, with or without filters or topics. Empty if it does not exist.
+        """
+        if symbol not in self._distributors:
+            return set()
+        _, event_types, where, topics = self._distributors[symbol]
+        return set(event_types) | set(where) | {event_type for event_type, _ in topics}
+
+    def del_distributor(self, symbol: Hashable) -> None:
+        distributor = self._distributors.pop(symbol, None)
+        if distributor is None:
+            return
+
+        queue, event_types, where, topics = distributor
+        self._index_remove(symbol, event_types)
+        if where:
+            self._where_remove(symbol, where)
+        if topics:
+            self._topic_trie.remove(lambda subscriber: subscriber[0] == symbol)
+            self._topic_cache.clear()
+        global_metrics_manager.remove_distributor_probe(symbol)
+        is_stopping = SNOWX_STATE.IS_STOPPING.is_set()
+        if (event_journal_manager.enabled or event_request_manager.active) and not is_stopping: # Keep them for the replay when stopping.
+            while not queue.empty():
+                _on_evict(queue.get_nowait())
+                queue.task_done()
+        queue.close(is_stopping) # Keep the spilled events for the next start, the journaled ones are replayed instead.
 
     def clear_distributor(self) -> None:
+        for symbol, (queue, *_) in self._distributors.items():
+            queue.close()
+            global_metrics_manager.remove_distributor_probe(symbol)
+
+        self._type_index.clear()
         self._event_distributor_cache.clear()
+        self._where_index.clear()
+        self._event_where_cache.clear()
+        self._topic_trie.clear()
+        self._topic_cache.clear()
         self._distributors.clear()
 
+    def get_overflow_stats(self) -> dict[Hashable, tuple[str, int, int]]:
+        """
+        :return: Subscriber symbol -> (overflow policy, number of dropped events, number of spilled events)
+        """
+        return {
+            symbol: (queue.policy, queue.dropped, queue.spilled)
+            for symbol, (queue, *_) in self._distributors.items()
+        }
+
     async def start(self) -> None:
         if self._scheduler.is_running():
             LOGGER.warning("Distributor is already running.")
@@ -0,0 +1,72 @@
+from time import time
+from typing import Any
+
+from ..config import get_config
+from ...constants.event import EXPIRY_POINT, EXPIRY_POINTS
+from ...types.event import BaseEvent
+
+
+class EventExpiryManager:
+    """
+    Shed the events that are past their deadline (see BaseEvent.event_deadline), so a backlog does not spend
+    the pipeline on obsolete events. An expired event is dropped at the first of these points that sees it: \n
+    bus: The distributor takes the event from the global event bus. \n
+    distributor: The distributor routes the batch of the event, after it waited in the distributor buffer. \n
+    scheduler: A plugin takes the event from its distributor queue, before its callbacks are resolved. \n
+    The drops are counted per point, and per plugin for the scheduler point. A dropped event counts as consumed
+    for the event journal, and a pending request of it fails. The deadline is checked once per batch against the clock,
+    an event without a deadline costs one attribute read per point. \n
+    Note: The plugins pinned to shards count their drops in their shard threads, the counts may miss an increment under contention.
+    """
+    def __init__(self, enable: bool) -> None:
+        self._enable = enable
+        self._expired: dict[str, int] = dict.fromkeys(EXPIRY_POINTS, 0)
+        self._plugins: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._enable
+
+    def split(self, events: tuple[BaseEvent, ...], point: str) -> tuple[tuple[BaseEvent, ...], list[BaseEvent]]:
+        """
+        :return: The events that are not expired (the same tuple if none is), and the expired events, counted at the point.
+        """
+        now = time()
+        expired = [event for event in events if 0 < event.event_deadline <= now]
+        if not expired:
+            return events, expired
+
+        self._expired[point] += len(expired)
+        return tuple(event for event in events if not 0 < event.event_deadline <= now), expired
+
+    def is_expired(self, event: BaseEvent, identifier: str) -> bool:
+        """
+        Check an event at the scheduler point of the plugin, it is counted if it is expired.
+        """
+        deadline = event.event_deadline
+        if not deadline or deadline > time():
+            return False
+
+        self._expired[EXPIRY_POINT.SCHEDULER] += 1
+        self._plugins[identifier] = self._plugins.get(identifier, 0) + 1
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        :return: Drop point -> number of expired events dropped there, and <plugins>: plugin identifier -> number of expired events
+         dropped at its scheduler.
+        """
+        return {**self._expired, "plugins": dict(self._plugins)}
+
+
+event_expiry_manager = EventExpiryManager(get_config("EVENT_EXPIRY_ENABLE", True))
+
+
+def get_expiry_stats() -> dict[str, Any]:
+    return event_expiry_manager.get_stats()
+
+
+__all__ = [
+    "event_expiry_manager",
+    "get_expiry_stats",
+]
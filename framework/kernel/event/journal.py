@@ -0,0 +1,244 @@
+import asyncio
+from threading import Lock
+from typing import Callable
+
+from ..config import get_config
+from ..logger import get_logger
+from ..path import get_data_path
+from ...types.event import BaseEvent, event_codec
+from ...utils.journal import EventJournal
+from ...utils.queue import TypedAsyncQueue
+
+
+EVENT_JOURNAL_ENABLE = get_config("EVENT_JOURNAL_ENABLE", False)
+EVENT_JOURNAL_SEGMENT_MAXBYTES = get_config("EVENT_JOURNAL_SEGMENT_MAXBYTES", 16 * 1024 * 1024)
+EVENT_JOURNAL_COMMIT_INTERVAL = get_config("EVENT_JOURNAL_COMMIT_INTERVAL", 0.05)
+
+LOGGER = get_logger("EventJournal")
+
+
+class _MemoryJournal:
+    """
+    Number the events without keeping them, see EventJournalManager.track.
+    """
+    def __init__(self) -> None:
+        self.next_seq = 0
+
+    def append(self, _: bytes) -> int:
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    def commit(self, _: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class EventJournalManager:
+    """
+    Write-ahead journal of the global event bus. \n
+    Every durable event (see BaseEvent.event_durable) accepted into the bus is appended to the journal (record),
+    the distributor reports how many subscriber queues it was routed to (route), and every subscriber reports when
+    it has processed the event (done). An event is consumed when all of them are done. \n
+    The journal is committed every EVENT_JOURNAL_COMMIT_INTERVAL seconds in a worker thread, so appending does not wait for the disk.
+    On start, the events that were not consumed before the last stop or crash are recovered, and they are put back
+    into the bus by replay after the plugins are loaded. Delivery is at least once: the events consumed after
+    the oldest unconsumed event may be replayed again. \n
+    Note: An event that a subscriber queue discards by its overflow policy counts as done for that subscriber.
+    An event that it spills is still pending, and the copy loaded back from the spill file is tracked by restore.
+    """
+    def __init__(self, enable: bool, segment_maxbytes: int, commit_interval: float) -> None:
+        self._enable = enable
+        self._segment_maxbytes = segment_maxbytes
+        self._commit_interval = max(0.001, commit_interval)
+
+        self._journal: EventJournal | _MemoryJournal | None = None
+        self._on_consumed: Callable[[BaseEvent], None] | None = None
+        self._lock = Lock()
+        self._tracked: dict[int, list] = {} # Sequence -> [references, event id -> event (the original and its restored copies)]
+        self._sequences: dict[int, int] = {} # Event id -> sequence
+        self._pending: dict[int, None] = {} # Unconsumed sequences in order.
+        self._recovered: list[tuple[int, bytes]] = []
+        self._commit_task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._journal is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _get_watermark(self) -> int:
+        with self._lock:
+            for seq in self._pending:
+                return seq
+        return self._journal.next_seq
+
+    def record(self, event: BaseEvent) -> None:
+        journal = self._journal
+        if journal is None or not event.event_durable or id(event) in self._sequences:
+            return
+
+        payload = b""
+        try:
+            if self._on_consumed is None:
+                payload = event_codec.encode(event)
+        except Exception as e:
+            LOGGER.warning(f"<{event}> cannot be encoded, it will not be journaled.", exc_info=e)
+            return
+
+        with self._lock:
+            seq = journal.append(payload)
+            self._tracked[seq] = [0, {id(event): event}]
+            self._sequences[id(event)] = seq
+            self._pending[seq] = None
+
+    def _release(self, event: BaseEvent, references: int) -> None:
+        with self._lock:
+            seq = self._sequences.get(id(event))
+            if seq is None:
+                return
+
+            entry = self._tracked[seq]
+            entry[0] += references
+            if entry[0] > 0:
+                return
+
+            del self._tracked[seq]
+            for event_id in entry[1]:
+                del self._sequences[event_id]
+            self._pending.pop(seq, None)
+
+        if self._on_consumed is not None:
+            self._on_consumed(next(iter(entry[1].values())))
+
+    def route(self, event: BaseEvent, references: int) -> None:
+        """
+        The event is routed to this many subscriber queues. If it is 0, the event is consumed.
+        """
+        if self._journal is not None:
+            self._release(event, references)
+
+    def retain(self, event: BaseEvent, references: int) -> None:
+        """
+        A subscriber hands the event over to this many more places, each of them reports done.
+        """
+        if self._journal is not None and references:
+            self._release(event, references)
+
+    def done(self, event: BaseEvent) -> None:
+        if self._journal is not None:
+            self._release(event, -1)
+
+    def spill(self, event: BaseEvent) -> int | None:
+        """
+        The event is written to a spill file, it stays pending.
+        :return: The sequence of the event, give it to restore with the copy loaded back. None if the event is not tracked.
+        """
+        if self._journal is None:
+            return None
+        with self._lock:
+            return self._sequences.get(id(event))
+
+    def restore(self, event: BaseEvent, seq: int | None) -> bool:
+        """
+        Track the copy of a spilled event as the event of this sequence.
+        :return: False if the event was spilled before the last stop or crash, it is replayed from the journal instead.
+        """
+        if self._journal is None or seq is None:
+            return True
+        with self._lock:
+            entry = self._tracked.get(seq)
+            if entry is None:
+                return False
+            entry[1][id(event)] = event
+            self._sequences[id(event)] = seq
+            return True
+
+    async def _commit(self) -> None:
+        await asyncio.to_thread(self._journal.commit, self._get_watermark())
+
+    async def _commit_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._commit_interval)
+            try:
+                await self._commit()
+            except Exception as e:
+                LOGGER.error("Failed to commit the event journal.", exc_info=e)
+
+    async def start(self) -> None:
+        if not self._enable or self._journal is not None:
+            return
+
+        journal = EventJournal(get_data_path("event_journal"), self._segment_maxbytes)
+        self._recovered = await asyncio.to_thread(journal.open)
+        for seq, _ in self._recovered:
+            self._pending[seq] = None
+        self._journal = journal
+        self._commit_task = asyncio.create_task(self._commit_loop())
+        LOGGER.info(f"Event journal opened, {len(self._recovered)} events to replay.")
+
+    def track(self, on_consumed: Callable[[BaseEvent], None]) -> None:
+        """
+        Count the references of the durable events without a journal, on_consumed is called with every consumed event.
+        It is used in the plugin host process instead of start.
+        """
+        if self._journal is None:
+            self._journal = _MemoryJournal()
+            self._on_consumed = on_consumed
+
+    async def replay(self, bus: TypedAsyncQueue) -> None:
+        """
+        Put the recovered events back into the bus. The replayed events are journaled again, and their old records are consumed.
+        """
+        recovered, self._recovered = self._recovered, []
+        for seq, payload in recovered:
+            try:
+                event = event_codec.decode(payload)
+            except Exception as e:
+                LOGGER.warning(f"Failed to load the journaled event <{seq}>, it is skipped.", exc_info=e)
+            else:
+                await bus.put(event)
+
+            with self._lock:
+                self._pending.pop(seq, None)
+
+        if recovered:
+            LOGGER.info(f"Replayed {len(recovered)} journaled events.")
+
+    async def stop(self, _: bool = False) -> None:
+        if self._journal is None:
+            return
+
+        if self._commit_task is not None:
+            self._commit_task.cancel()
+            try:
+                await self._commit_task
+            except asyncio.CancelledError:
+                pass
+            self._commit_task = None
+
+        await self._commit()
+        journal, self._journal = self._journal, None
+        self._on_consumed = None
+        await asyncio.to_thread(journal.close)
+        with self._lock:
+            self._tracked.clear()
+            self._sequences.clear()
+            self._pending.clear()
+        self._recovered.clear()
+
+
+event_journal_manager = EventJournalManager(
+    EVENT_JOURNAL_ENABLE,
+    EVENT_JOURNAL_SEGMENT_MAXBYTES,
+    EVENT_JOURNAL_COMMIT_INTERVAL,
+)
+
+
+__all__ = [
+    "event_journal_manager",
+]
@@ -0,0 +1,203 @@
+import asyncio
+from threading import Lock
+from typing import Any, Type
+
+from .bus import global_event_bus
+from ..config import get_config
+from ..shard import global_shard_manager
+from ...types.event import BaseEvent
+
+
+EVENT_REQUEST_TIMEOUT = get_config("EVENT_REQUEST_TIMEOUT", 30.0)
+
+
+class EventRequestError(Exception):
+    pass
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exception: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exception)
+
+
+class EventRequestManager:
+    """
+    Request/response over the global event bus. \n
+    A request puts the event into the bus like any other event and waits for the result of the process callback that
+    processes it. The event itself is the correlation key: the pending requests are kept in a table by event id,
+    and the first event of the result type returned by a callback for the request event is handed to the requester
+    directly, without going through the bus and the distributor. The other returned events, and the results of
+    the other callbacks, are put into the bus as usual. \n
+    The request fails at once if the request event has no subscriber when it is routed, if a callback that processes it fails,
+    or if all the callbacks that process it finished without returning a result. \n
+    Note: A callback must not wait for a request that is processed by itself, or by a serial callback of the same plugin.
+    The callbacks of isolated plugins run in their child processes, their results go through the bus only,
+    so a request that an isolated plugin subscribes to ends with a result of another plugin or the timeout.
+    """
+    def __init__(self) -> None:
+        self._pending: dict[int, list] = {} # Event id -> [event, future, result type, loop, references]
+        self._lock = Lock() # Requests are resolved in shard threads too.
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether any request is pending.
+        """
+        return bool(self._pending)
+
+    def _pop(self, event: BaseEvent) -> tuple[asyncio.Future, asyncio.AbstractEventLoop] | None:
+        with self._lock:
+            pending = self._pending.get(id(event))
+            if pending is None or pending[0] is not event:
+                return None
+
+            del self._pending[id(event)]
+            return pending[1], pending[3]
+
+    @staticmethod
+    def _call_in_loop(loop: asyncio.AbstractEventLoop, func: Any, *args: Any) -> None:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            func(*args)
+        else:
+            loop.call_soon_threadsafe(func, *args)
+
+    async def request(self, event: BaseEvent, timeout: float = EVENT_REQUEST_TIMEOUT, result_type: Type[BaseEvent] = BaseEvent) -> BaseEvent:
+        """
+        Put the event into the global event bus and wait for its result.
+        :param event: Request event. The same event object cannot be requested again while it is pending.
+        :param timeout: Seconds to wait for the result, including waiting for space in the bus, EVENT_REQUEST_TIMEOUT by default.
+        If this parameter is 0, wait forever.
+        :param result_type: The result is the first event of this type returned by a callback that processes the request event.
+        :return: Result event
+        :raise asyncio.TimeoutError: No result within the timeout.
+        :raise EventRequestError: The request event has no subscriber, it is expired before it is routed,
+        a callback that processes it failed, or no callback returned a result.
+        """
+        if not isinstance(event, BaseEvent):
+            raise TypeError(f"<{event}> is not an event")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if id(event) in self._pending:
+                raise EventRequestError(f"<{event}> is already requested")
+            self._pending[id(event)] = [event, future, result_type, loop, 0]
+
+        async def _request() -> BaseEvent:
+            await global_shard_manager.run_main(global_event_bus.put(event)) # The requester may run in a shard.
+            return await future
+
+        try:
+            if timeout > 0:
+                return await asyncio.wait_for(_request(), timeout)
+            return await _request()
+        finally:
+            self._pop(event)
+
+    def route(self, event: BaseEvent, subscribers: int) -> None:
+        """
+        Called by the distributor when the event is routed, if any request is pending.
+        Like the event journal, each subscriber reports done once it has processed the event.
+        """
+        if id(event) not in self._pending:
+            return
+        if not subscribers:
+            self._fail(event, EventRequestError(f"<{event}> has no subscriber"))
+            return
+        self._release(event, subscribers)
+
+    def retain(self, event: BaseEvent, references: int) -> None:
+        """
+        A subscriber hands the event over to this many more places, each of them reports done.
+        """
+        if references and id(event) in self._pending:
+            self._release(event, references)
+
+    def done(self, event: BaseEvent) -> None:
+        """
+        Called when a subscriber has processed the event (or discarded it), if any request is pending.
+        """
+        if id(event) in self._pending:
+            self._release(event, -1)
+
+    def _release(self, event: BaseEvent, references: int) -> None:
+        with self._lock:
+            pending = self._pending.get(id(event))
+            if pending is None or pending[0] is not event:
+                return
+            pending[4] += references
+            if pending[4] > 0:
+                return
+        self._fail(event, EventRequestError(f"<{event}> is processed without a result"))
+
+    def fail(self, event: BaseEvent, error: EventRequestError) -> None:
+        """
+        Called by the process wrapper when a callback fails to process the event, if any request is pending.
+        """
+        if id(event) in self._pending:
+            self._fail(event, error)
+
+    def expire(self, event: BaseEvent) -> None:
+        """
+        Called by the distributor when the event is dropped because it is expired, if any request is pending.
+        """
+        if id(event) in self._pending:
+            self._fail(event, EventRequestError(f"<{event}> is expired"))
+
+    def _fail(self, event: BaseEvent, error: EventRequestError) -> None:
+        pending = self._pop(event)
+        if pending is not None:
+            self._call_in_loop(pending[1], _set_exception, pending[0], error)
+
+    def resolve(self, event: BaseEvent, result: tuple[BaseEvent, ...] | BaseEvent) -> tuple[BaseEvent, ...] | BaseEvent | None:
+        """
+        Called by the process wrapper with the result of a callback, if any request is pending.
+        :param event: The event that the callback processed.
+        :return: The rest of the result, to put into the bus.
+        """
+        request = self._pending.get(id(event))
+        if request is None:
+            return result
+
+        events = result if isinstance(result, tuple) else (result,)
+        for index, item in enumerate(events):
+            if not isinstance(item, request[2]):
+                continue
+
+            pending = self._pop(event)
+            if pending is None: # Resolved by another callback.
+                return result
+
+            self._call_in_loop(pending[1], _set_result, pending[0], item)
+            rest = events[:index] + events[index + 1:]
+            return rest or None
+
+        return result
+
+
+event_request_manager = EventRequestManager()
+
+
+async def request(event: BaseEvent, timeout: float = EVENT_REQUEST_TIMEOUT, result_type: Type[BaseEvent] = BaseEvent) -> BaseEvent:
+    """
+    Put the event into the global event bus and wait for the result of the callback that processes it,
+    see EventRequestManager.request.
+    """
+    return await event_request_manager.request(event, timeout, result_type)
+
+
+__all__ = [
+    "EventRequestError",
+    "event_request_manager",
+    "request",
+]
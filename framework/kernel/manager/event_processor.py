@@ -4,6 +4,7 @@ from typing import Awaitable, Callable
 
 from ..callback.registrar import on_process
 from ..logger import get_logger
+from ..metrics import get_metrics_snapshot, reset_metrics
 from ..plugin.api import (
     load_plugin,
     unload_plugin,
@@ -29,6 +30,8 @@ from ...types.event import (
     SnowXReloadPluginResultEvent,
     SnowXReloadAllEvent,
     SnowXReloadAllResultEvent,
+    SnowXMetricsEvent,
+    SnowXMetricsResultEvent,
 )
 from ...types.plugin import Metadata
 
@@ -44,6 +47,8 @@ __plugin_metadata__ = Metadata(
     dependent_framework_version=(),
     dependent_plugins=(),
     dependent_modules=(),
+    overflow_policy="",
+    isolation="",
 )
 
 
@@ -115,4 +120,12 @@ async def snowx_reload_all(_) -> SnowXReloadAllResultEvent:
     return SnowXReloadAllResultEvent()
 
 
+@on_process(event_type=SnowXMetricsEvent)
+async def snowx_metrics(event: SnowXMetricsEvent) -> SnowXMetricsResultEvent:
+    snapshot = get_metrics_snapshot()
+    if event.reset:
+        reset_metrics()
+    return SnowXMetricsResultEvent(snapshot)
+
+
 __all__ = []
@@ -3,19 +3,38 @@ from functools import partial
 from .manager import framework_manager
 from ..callback.scheduler import process_scheduler
 from ..config import save_config
+from ..dead_letter import global_dead_letter_manager, start_dead_letter
+from ..event.bus import global_event_bus
 from ..event.distributor import event_distributor_manager
+from ..event.journal import event_journal_manager
 from ..plugin.manager import plugin_manager
+from ..process_pool import global_process_pool_manager
+from ..shard import global_shard_manager
+from ..thread_pool import global_thread_pool_manager
+from ..trace import global_trace_manager, start_tracing
 from ...constants.framework import FRAMEWORK_METADATA
 
 
 framework_manager.inject_start_func(save_config)
+framework_manager.inject_start_func(event_journal_manager.start)
+framework_manager.inject_start_func(start_tracing)
+framework_manager.inject_start_func(start_dead_letter)
 framework_manager.inject_start_func(event_distributor_manager.start)
+framework_manager.inject_start_func(global_shard_manager.start)
 framework_manager.inject_start_func(partial(process_scheduler.start, FRAMEWORK_METADATA.ID))
 framework_manager.inject_start_func(plugin_manager.load_all)
+framework_manager.inject_start_func(partial(event_journal_manager.replay, global_event_bus))
+framework_manager.inject_start_func(global_process_pool_manager.start)
 
 framework_manager.inject_stop_func(plugin_manager.unload_all)
 framework_manager.inject_stop_func(partial(process_scheduler.stop, FRAMEWORK_METADATA.ID))
+framework_manager.inject_stop_func(global_shard_manager.stop)
 framework_manager.inject_stop_func(event_distributor_manager.stop)
+framework_manager.inject_stop_func(global_trace_manager.stop)
+framework_manager.inject_stop_func(global_dead_letter_manager.stop)
+framework_manager.inject_stop_func(event_journal_manager.stop)
+framework_manager.inject_stop_func(global_thread_pool_manager.shutdown)
+framework_manager.inject_stop_func(global_process_pool_manager.shutdown)
 
 
 __all__ = []
@@ -0,0 +1,23 @@
+from typing import Any
+
+from .config import get_config
+from .thread_pool import global_thread_pool_manager
+from ..components.metrics import MetricsManager
+
+
+global_metrics_manager = MetricsManager(get_config("METRICS_ENABLE", False), global_thread_pool_manager.get_stats)
+
+
+def get_metrics_snapshot() -> dict[str, Any]:
+    return global_metrics_manager.snapshot()
+
+
+def reset_metrics() -> None:
+    global_metrics_manager.reset()
+
+
+__all__ = [
+    "global_metrics_manager",
+    "get_metrics_snapshot",
+    "reset_metrics",
+]
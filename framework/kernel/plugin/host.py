@@ -0,0 +1,628 @@
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import struct
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Type
+
+from .manager import plugin_manager
+from ..config import get_config
+from ..event.bus import global_event_bus
+from ..event.distributor import event_distributor_manager
+from ..event.journal import event_journal_manager
+from ..logger import get_logger
+from ...state.framework import SNOWX_STATE, set_stopping
+from ...types.event import BaseEvent, EventCodecError, event_codec
+from ...types.plugin import Info, Item
+from ...utils.queue import TypedAsyncQueue
+
+
+PLUGIN_HOST_BATCH_MAXSIZE = get_config("PLUGIN_HOST_BATCH_MAXSIZE", 256)
+PLUGIN_HOST_START_TIMEOUT = get_config("PLUGIN_HOST_START_TIMEOUT", 30.0)
+PLUGIN_HOST_STOP_TIMEOUT = get_config("PLUGIN_HOST_STOP_TIMEOUT", 10.0)
+PLUGIN_HOST_RESTART_INTERVAL = get_config("PLUGIN_HOST_RESTART_INTERVAL", 1.0)
+PLUGIN_HOST_MAX_RESTARTS = get_config("PLUGIN_HOST_MAX_RESTARTS", 5)
+PLUGIN_HOST_FRAME_MAXSIZE = get_config("PLUGIN_HOST_FRAME_MAXSIZE", 64 * 1024 * 1024)
+PLUGIN_HOST_UNACKED_MAXSIZE = get_config("PLUGIN_HOST_UNACKED_MAXSIZE", 16)
+PLUGIN_HOST_ECHO_LIMIT = 65536
+
+HOST_ID_ENV = "SNOWX_PLUGIN_HOST_ID"
+HOST_PORT_ENV = "SNOWX_PLUGIN_HOST_PORT"
+HOST_TOKEN_ENV = "SNOWX_PLUGIN_HOST_TOKEN"
+
+PLUGIN_HOST_ID = os.environ.get(HOST_ID_ENV, "")
+BRIDGE_SYMBOL = "__plugin_host__"
+
+_TOKEN_SIZE = 32
+_FRAME_HEADER = struct.Struct("<IB") # Body size, frame kind.
+_BATCH_ID = struct.Struct("<q") # Batch id at the start of an events frame, -1 for none.
+_READY = 1
+_EVENTS = 2
+_ACK = 3
+_STOP = 4
+_SCHEMAS = 5
+
+LOGGER = get_logger("PluginHost")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    length, kind = _FRAME_HEADER.unpack(header)
+    if length > PLUGIN_HOST_FRAME_MAXSIZE:
+        raise ConnectionError(f"A frame of {length} bytes exceeds PLUGIN_HOST_FRAME_MAXSIZE.")
+    return kind, await reader.readexactly(length)
+
+
+def _dump_frame(kind: int, body: bytes) -> bytes:
+    return _FRAME_HEADER.pack(len(body), kind) + body
+
+
+def _load_json(body: bytes) -> Any:
+    """
+    The control frames are JSON, so a frame from the other process cannot run code here.
+    :raise ConnectionError: The body is not JSON.
+    """
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise ConnectionError("A malformed frame is received.") from e
+
+
+async def _write_frame(writer: asyncio.StreamWriter, kind: int, payload: Any = None) -> None:
+    writer.write(_dump_frame(kind, json.dumps(payload).encode("utf-8")))
+    await writer.drain()
+
+
+def _encode_events(events: list[BaseEvent], allow_pickle: bool) -> bytes:
+    try:
+        return event_codec.encode_batch(events, allow_pickle)
+    except EventCodecError:
+        pass
+
+    encodable: list[BaseEvent] = []
+    for event in events:
+        try:
+            event_codec.encode_batch((event,), allow_pickle)
+        except EventCodecError as e:
+            LOGGER.warning(f"<{event}> cannot be encoded, it will not cross the process boundary.", exc_info=e)
+        else:
+            encodable.append(event)
+    return event_codec.encode_batch(encodable, allow_pickle)
+
+
+def _decode_events(payload: memoryview, trusted: bool) -> list[BaseEvent]:
+    errors: list[Exception] = []
+    events = event_codec.decode_batch(payload, errors, trusted)
+    if errors:
+        LOGGER.warning(f"{len(errors)} events from the other process cannot be decoded, their classes are missing, have another schema or are not accepted here.", exc_info=errors[0])
+    return events
+
+
+def _load_acks(body: bytes) -> list[int]:
+    acks = _load_json(body)
+    if not isinstance(acks, list):
+        raise ConnectionError("A malformed ack frame is received.")
+    return [batch_id for batch_id in acks if type(batch_id) is int]
+
+
+def _dump_event_types(event_types: set[Type[BaseEvent]]) -> list[dict[str, Any]]:
+    schemas: list[dict[str, Any]] = []
+    for event_type in event_types:
+        try:
+            schemas.append(event_codec.get_codec(event_type).get_schema())
+        except EventCodecError as e:
+            LOGGER.warning(f"<{event_type}> cannot cross the process boundary.", exc_info=e)
+    return schemas
+
+
+def _load_event_types(schemas: Any) -> tuple[Type[BaseEvent], ...]:
+    """
+    Find the classes of the schemas from the plugin host, without importing its modules (see EventCodecRegistry.resolve_schema).
+    """
+    if not isinstance(schemas, list):
+        raise ConnectionError("A malformed schemas frame is received.")
+
+    event_types: list[Type[BaseEvent]] = []
+    for schema in schemas:
+        try:
+            event_types.append(event_codec.resolve_schema(schema))
+        except EventCodecError as e:
+            LOGGER.warning(f"The event class of the plugin host <{schema}> cannot be used here.", exc_info=e)
+    return tuple(event_types)
+
+
+class _EventBridge:
+    """
+    Forward events between the local bus and the other process in batches, in both directions. \n
+    Events received from the other process are put on the local bus, and they are not sent back when the local
+    distributor routes them to the bridge queue. They are kept by identity until then, so the identity is not reused. \n
+    param unacked_maxsize: If it is not 0, a sent batch is done only when the other process acks it (see _BatchAcker),
+    and it is sent again over the next connection until then. At most this many batches wait for their ack. \n
+    param in_host: The bridge runs in the plugin host process. The framework does not unpickle or import anything from it,
+    so the events are sent without pickle after the schemas of their classes, and the events received from the framework are trusted.
+    """
+    def __init__(self, queue: TypedAsyncQueue, unacked_maxsize: int = 0, in_host: bool = False) -> None:
+        self._queue = queue
+        self._in_host = in_host
+        self._received: dict[int, BaseEvent] = {}
+        self._announced: set[Type[BaseEvent]] = set() # Classes whose schemas are sent.
+
+        self._unacked_maxsize = max(0, unacked_maxsize)
+        self._unacked: dict[int, tuple[list[BaseEvent], bytes]] = {} # Batch id -> (events, frame)
+        self._acked = asyncio.Event()
+        self._next_batch_id = 0
+        self.acked = 0 # Number of the acked batches.
+
+    async def send_loop(self, writer: asyncio.StreamWriter) -> None:
+        for _, frame in tuple(self._unacked.values()): # Sent over the previous connection.
+            writer.write(frame)
+            await writer.drain()
+
+        while True:
+            while self._unacked_maxsize and len(self._unacked) >= self._unacked_maxsize:
+                self._acked.clear()
+                await self._acked.wait()
+
+            events = await self._queue.bulk_get(PLUGIN_HOST_BATCH_MAXSIZE)
+            for _ in events:
+                self._queue.task_done()
+            await self.send(writer, events)
+
+    async def _announce(self, writer: asyncio.StreamWriter, events: list[BaseEvent]) -> None:
+        event_types = {type(event) for event in events} - self._announced
+        if event_types:
+            self._announced |= event_types
+            schemas = [schema for schema in _dump_event_types(event_types) if all(kind != "pickle" for _, kind in schema["fields"])]
+            if schemas: # The others cannot be sent, see _encode_events.
+                await _write_frame(writer, _SCHEMAS, schemas)
+
+    async def _send_batch(self, writer: asyncio.StreamWriter, events: list[BaseEvent]) -> None:
+        if self._in_host:
+            await self._announce(writer, events)
+
+        batch_id = None
+        if self._unacked_maxsize:
+            batch_id = self._next_batch_id
+            self._next_batch_id += 1
+
+        body = _BATCH_ID.pack(-1 if batch_id is None else batch_id) + _encode_events(events, not self._in_host)
+        frame = _dump_frame(_EVENTS, body)
+        if len(frame) > PLUGIN_HOST_FRAME_MAXSIZE:
+            if len(events) > 1:
+                half = len(events) // 2
+                await self._send_batch(writer, events[:half])
+                await self._send_batch(writer, events[half:])
+                return
+            LOGGER.warning(f"<{events[0]}> exceeds PLUGIN_HOST_FRAME_MAXSIZE, it will not cross the process boundary.")
+            event_journal_manager.done(events[0])
+            return
+
+        if batch_id is not None:
+            self._unacked[batch_id] = (events, frame)
+        writer.write(frame)
+        await writer.drain()
+        if batch_id is None: # Handed over to the other process.
+            for event in events:
+                event_journal_manager.done(event)
+
+    async def send(self, writer: asyncio.StreamWriter, events: tuple[BaseEvent, ...]) -> None:
+        outgoing: list[BaseEvent] = []
+        for event in events:
+            if self._received.pop(id(event), None) is None:
+                outgoing.append(event)
+            else:
+                event_journal_manager.done(event)
+        if outgoing:
+            await self._send_batch(writer, outgoing)
+
+    async def flush(self, writer: asyncio.StreamWriter) -> None:
+        events: list[BaseEvent] = []
+        while not self._queue.empty():
+            events.append(self._queue.get_nowait())
+            self._queue.task_done()
+        await self.send(writer, tuple(events))
+
+    def ack(self, batch_ids: list[int]) -> None:
+        for batch_id in batch_ids:
+            events, _ = self._unacked.pop(batch_id, ((), b""))
+            for event in events:
+                event_journal_manager.done(event)
+        self.acked += len(batch_ids)
+        self._acked.set()
+
+    def discard(self) -> None:
+        """
+        Give up the batches waiting for their ack, they count as done.
+        """
+        self.ack(list(self._unacked))
+
+    async def receive(self, body: bytes, subscribed: tuple[Type[BaseEvent], ...], acker: "_BatchAcker | None" = None) -> None:
+        """
+        :raise ConnectionError: The body is not an events frame.
+        """
+        if len(body) < _BATCH_ID.size:
+            raise ConnectionError("A malformed events frame is received.")
+
+        (batch_id,) = _BATCH_ID.unpack_from(body)
+        try:
+            events = [event for event in _decode_events(memoryview(body)[_BATCH_ID.size:], self._in_host) if isinstance(event, BaseEvent)]
+        except EventCodecError as e:
+            LOGGER.error("A batch of events from the other process cannot be decoded.", exc_info=e)
+            events = []
+        if acker is not None and batch_id >= 0:
+            acker.add(batch_id, events)
+
+        for event in events:
+            if isinstance(event, subscribed):
+                self._received[id(event)] = event
+        while len(self._received) > PLUGIN_HOST_ECHO_LIMIT:
+            self._received.pop(next(iter(self._received)))
+        await global_event_bus.bulk_put(events)
+
+
+class _BatchAcker:
+    """
+    Ack the batches of events from the framework once all their durable events are consumed in the plugin host process.
+    """
+    def __init__(self) -> None:
+        self._remaining: dict[int, int] = {} # Batch id -> unconsumed events
+        self._batches: dict[int, int] = {} # Event id -> batch id
+        self._acks: list[int] = []
+        self._ready = asyncio.Event()
+
+    def _ack(self, batch_id: int) -> None:
+        self._acks.append(batch_id)
+        self._ready.set()
+
+    def add(self, batch_id: int, events: list[BaseEvent]) -> None:
+        remaining = 0
+        for event in events:
+            if event.event_durable: # The others are not tracked by the journal.
+                self._batches[id(event)] = batch_id
+                remaining += 1
+
+        if remaining:
+            self._remaining[batch_id] = remaining
+        else:
+            self._ack(batch_id)
+
+    def consumed(self, event: BaseEvent) -> None:
+        batch_id = self._batches.pop(id(event), None)
+        if batch_id is None:
+            return
+
+        self._remaining[batch_id] -= 1
+        if not self._remaining[batch_id]:
+            del self._remaining[batch_id]
+            self._ack(batch_id)
+
+    async def flush(self, writer: asyncio.StreamWriter) -> None:
+        acks, self._acks = self._acks, []
+        self._ready.clear()
+        if acks:
+            await _write_frame(writer, _ACK, acks)
+
+    async def send_loop(self, writer: asyncio.StreamWriter) -> None:
+        while True:
+            await self._ready.wait()
+            await self.flush(writer)
+
+
+class PluginHost:
+    """
+    Run an isolated plugin in a child process with its own minimal kernel (bus, distributor and process scheduler). \n
+    The child connects back over a local socket. The events that the plugin subscribes to are forwarded to the child,
+    and the events it produces are forwarded to the bus of the framework. If the child exits unexpectedly, it is restarted
+    after PLUGIN_HOST_RESTART_INTERVAL seconds, up to PLUGIN_HOST_MAX_RESTARTS times in a row without an acked batch. Meanwhile, the events for it
+    wait in its distributor queue, and the batches it has not acked are sent again. If it cannot be restarted, the plugin fails
+    and its distributor is deleted. \n
+    The child authenticates with a random token of _TOKEN_SIZE bytes before any frame is read from it.
+    Nothing from it is unpickled: the control frames are JSON and the events are decoded by event_codec without pickle. \n
+    Note: The events from the plugin host must have fields of plain types only (see EventCodec.has_pickle). The modules of
+    the plugin are never imported here, the classes that are not imported are replaced by proxy classes built from their schemas.
+    """
+    def __init__(self, info: Info) -> None:
+        self._info = info
+        self._token = secrets.token_bytes(_TOKEN_SIZE)
+
+        self._server: asyncio.Server | None = None
+        self._connection: asyncio.Future[tuple[asyncio.StreamReader, asyncio.StreamWriter]] | None = None
+        self._process: asyncio.subprocess.Process | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._bridge: _EventBridge | None = None
+        self._subscribed: tuple[Type[BaseEvent], ...] = ()
+
+        self._bridge_tasks: list[asyncio.Task] = []
+        self._supervisor_task: asyncio.Task | None = None
+        self._stopping: bool = False
+        self._failed: bool = False
+
+    @property
+    def identifier(self) -> str:
+        return self._info.metadata.id
+
+    @property
+    def pid(self) -> int | None:
+        return None if self._process is None else self._process.pid
+
+    @property
+    def failed(self) -> bool:
+        return self._failed
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            token = await asyncio.wait_for(reader.readexactly(_TOKEN_SIZE), PLUGIN_HOST_START_TIMEOUT)
+        except Exception:
+            writer.close()
+            return
+
+        if not hmac.compare_digest(token, self._token) or self._connection is None or self._connection.done():
+            writer.close()
+            return
+        self._connection.set_result((reader, writer))
+
+    async def _spawn(self) -> bool:
+        if self._server is None:
+            self._server = await asyncio.start_server(self._on_connect, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+
+        env = os.environ.copy()
+        env[HOST_ID_ENV] = self.identifier
+        env[HOST_PORT_ENV] = str(port)
+        env[HOST_TOKEN_ENV] = self._token.hex()
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, (str(Path(__file__).parents[3]), env.get("PYTHONPATH"))))
+
+        self._connection = asyncio.get_running_loop().create_future()
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", "from framework.kernel.plugin.host import run_host; run_host()",
+            env=env,
+        )
+        LOGGER.info(f"[{self.identifier}]: Started the plugin host process <{self._process.pid}>.")
+
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.shield(self._connection), PLUGIN_HOST_START_TIMEOUT)
+            kind, body = await asyncio.wait_for(_read_frame(reader), PLUGIN_HOST_START_TIMEOUT)
+            ready = _load_json(body) if kind == _READY else None
+            if not isinstance(ready, dict):
+                raise ConnectionError("The plugin host did not send a ready frame.")
+        except Exception as e:
+            LOGGER.error(f"[{self.identifier}]: The plugin host did not get ready.", exc_info=e)
+            await self._kill()
+            return False
+
+        if ready.get("success") is not True:
+            LOGGER.error(f"[{self.identifier}]: The plugin failed to load in the plugin host.")
+            writer.close()
+            await self._kill()
+            return False
+
+        if self._bridge is None:
+            self._subscribed = _load_event_types(ready.get("event_types"))
+            self._bridge = _EventBridge(event_distributor_manager.get_distributor(
+                self.identifier,
+                set(self._subscribed),
+                self._info.metadata.overflow_policy,
+            ), PLUGIN_HOST_UNACKED_MAXSIZE)
+
+        self._writer = writer
+        self._bridge_tasks = [
+            asyncio.create_task(self._bridge.send_loop(writer)),
+            asyncio.create_task(self._receive_loop(reader)),
+        ]
+        return True
+
+    async def _receive_loop(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            try:
+                kind, body = await _read_frame(reader)
+                if kind == _EVENTS:
+                    await self._bridge.receive(body, self._subscribed)
+                elif kind == _ACK:
+                    self._bridge.ack(_load_acks(body))
+                elif kind == _SCHEMAS:
+                    _load_event_types(_load_json(body))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+    async def _cancel_bridge(self) -> None:
+        for task in self._bridge_tasks:
+            task.cancel()
+        for task in self._bridge_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                LOGGER.warning(f"[{self.identifier}]: The event bridge stopped abnormally.", exc_info=e)
+        self._bridge_tasks.clear()
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _kill(self) -> None:
+        process = self._process
+        if process is None or process.returncode is not None:
+            return
+        process.kill()
+        await process.wait()
+
+    async def _supervise(self) -> None:
+        failures = 0 # Restarts since the last acked batch.
+        while not self._stopping:
+            acked = self._bridge.acked
+            returncode = await self._process.wait()
+            if self._stopping:
+                return
+
+            LOGGER.error(f"[{self.identifier}]: The plugin host exited unexpectedly with code <{returncode}>.")
+            if self._bridge.acked != acked:
+                failures = 0
+            await self._cancel_bridge()
+            while not self._stopping:
+                if failures >= PLUGIN_HOST_MAX_RESTARTS:
+                    LOGGER.error(f"[{self.identifier}]: The plugin host was restarted {failures} times in a row without progress, give up.")
+                    self._failed = True
+                    await self._close() # Stop queueing events for it.
+                    return
+
+                await asyncio.sleep(PLUGIN_HOST_RESTART_INTERVAL)
+                failures += 1
+                LOGGER.warning(f"[{self.identifier}]: Restarting the plugin host ({failures}/{PLUGIN_HOST_MAX_RESTARTS})...")
+                if await self._spawn():
+                    break
+
+    async def start(self) -> bool:
+        self._stopping = False
+        if not await self._spawn():
+            await self._close()
+            return False
+
+        self._supervisor_task = asyncio.create_task(self._supervise())
+        return True
+
+    async def stop(self, force: bool = False) -> None:
+        self._stopping = True
+        if self._supervisor_task is not None:
+            self._supervisor_task.cancel()
+            try:
+                await self._supervisor_task
+            except asyncio.CancelledError:
+                pass
+            self._supervisor_task = None
+
+        if self._writer is not None and self._process is not None and self._process.returncode is None:
+            try:
+                await self._bridge.flush(self._writer)
+                await _write_frame(self._writer, _STOP, (force, SNOWX_STATE.IS_STOPPING.is_set()))
+                await asyncio.wait_for(self._process.wait(), PLUGIN_HOST_STOP_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError):
+                LOGGER.warning(f"[{self.identifier}]: The plugin host did not stop in time, kill it.")
+
+        await self._kill()
+        await self._cancel_bridge()
+        await self._close()
+
+    async def _close(self) -> None:
+        if self._bridge is not None:
+            if not SNOWX_STATE.IS_STOPPING.is_set(): # Keep them for the replay when stopping, see del_distributor.
+                self._bridge.discard()
+            event_distributor_manager.del_distributor(self.identifier)
+            self._bridge = None
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class PluginHostManager:
+    def __init__(self) -> None:
+        self._hosts: dict[str, PluginHost] = {}
+
+    def get_pids(self) -> dict[str, int | None]:
+        return {identifier: host.pid for identifier, host in self._hosts.items()}
+
+    def get_failed(self) -> list[str]:
+        """
+        :return: The identifiers of the plugins whose plugin host could not be restarted.
+        """
+        return [identifier for identifier, host in self._hosts.items() if host.failed]
+
+    async def load(self, info: Info) -> Item | None:
+        """
+        Start the plugin in a plugin host.
+        :return: A plugin item with an empty placeholder module, because the plugin module only exists in the child process.
+        """
+        identifier = info.metadata.id
+        if identifier in self._hosts:
+            return None
+
+        host = PluginHost(info)
+        if not await host.start():
+            return None
+
+        self._hosts[identifier] = host
+        return Item(info, ModuleType(info.path_info.import_path))
+
+    async def unload(self, identifier: str, force: bool = False) -> None:
+        host = self._hosts.pop(identifier, None)
+        if host is None:
+            return
+        await host.stop(force)
+
+
+plugin_host_manager = PluginHostManager()
+
+
+async def _host_main(identifier: str, port: int, token: bytes) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(token)
+    await writer.drain()
+
+    acker = _BatchAcker()
+    event_journal_manager.track(acker.consumed)
+    await event_distributor_manager.start()
+    is_success = await plugin_manager.load_single(identifier)
+    event_types: set[Type[BaseEvent]] = set()
+    for loaded_id in plugin_manager.loaded_plugins:
+        event_types |= event_distributor_manager.get_event_types(loaded_id)
+    bridge = _EventBridge(event_distributor_manager.get_distributor(BRIDGE_SYMBOL, {BaseEvent}), in_host=True)
+    await _write_frame(writer, _READY, {"success": is_success, "event_types": _dump_event_types(event_types)})
+
+    force = True
+    if is_success:
+        send_tasks = [
+            asyncio.create_task(bridge.send_loop(writer)),
+            asyncio.create_task(acker.send_loop(writer)),
+        ]
+        while True:
+            try:
+                kind, body = await _read_frame(reader)
+                if kind == _EVENTS:
+                    await bridge.receive(body, (BaseEvent,), acker)
+                    continue
+            except (asyncio.IncompleteReadError, ConnectionError):
+                LOGGER.error(f"[{identifier}]: Lost the connection to the framework, stop the plugin host.")
+                set_stopping() # Do not ack the events left, they are sent again.
+                break
+
+            if kind == _STOP:
+                force, is_stopping = _load_json(body)
+                if is_stopping: # The events left are replayed by the journal of the framework.
+                    set_stopping()
+                break
+
+        await plugin_manager.unload_all(force)
+        for task in send_tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await bridge.flush(writer)
+            await acker.flush(writer)
+        except ConnectionError:
+            pass
+
+    await event_distributor_manager.stop(force)
+    writer.close()
+
+
+def run_host() -> None:
+    """
+    Entry point of the plugin host process.
+    """
+    asyncio.run(_host_main(PLUGIN_HOST_ID, int(os.environ[HOST_PORT_ENV]), bytes.fromhex(os.environ[HOST_TOKEN_ENV])))
+
+
+__all__ = [
+    "PLUGIN_HOST_ID",
+    "plugin_host_manager",
+    "run_host",
+]
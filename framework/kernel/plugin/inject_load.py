@@ -52,19 +52,31 @@ def unload_check_module(*_) -> None:
 plugin_manager.inject_load_func(load_check_module, unload_check_module)
 
 
+from .host import PLUGIN_HOST_ID, plugin_host_manager
 from .importer import import_plugin, remove_plugin
-from ...types.plugin import Item
-
-def load_import_plugin(manager: PluginManager, identifier: str) -> bool | Item:
-    item = import_plugin(manager.plugin_infos[identifier])
+from ...constants.plugin import ISOLATION
+from ...types.plugin import Info, Item
+
+def _is_isolated(info: Info) -> bool:
+    return info.metadata.isolation == ISOLATION.PROCESS and not PLUGIN_HOST_ID # Plugins in a plugin host are imported directly.
+
+async def load_import_plugin(manager: PluginManager, identifier: str) -> bool | Item:
+    info = manager.plugin_infos[identifier]
+    if _is_isolated(info):
+        item = await plugin_host_manager.load(info)
+    else:
+        item = import_plugin(info)
     if item is None:
         return False
     return item
 
-def unload_import_plugin(manager: PluginManager, identifier: str, _) -> None:
+async def unload_import_plugin(manager: PluginManager, identifier: str, force: bool) -> None:
     if identifier not in manager.loaded_plugins:
         return
     info = manager.loaded_plugins[identifier].info
+    if _is_isolated(info):
+        await plugin_host_manager.unload(identifier, force)
+        return
     remove_plugin(info)
 
 plugin_manager.inject_load_func(load_import_plugin, unload_import_plugin)
@@ -90,9 +102,14 @@ plugin_manager.inject_load_func(load_callback_run, unload_callback_run)
 
 
 from ..callback.scheduler import process_scheduler, autorun_scheduler
-
-async def load_start_cb_scheduler(_, identifier: str) -> bool:
-    await process_scheduler.start(identifier)
+from ..shard import global_shard_manager
+
+async def load_start_cb_scheduler(manager: PluginManager, identifier: str) -> bool:
+    await process_scheduler.start(
+        identifier,
+        overflow_policy=manager.plugin_infos[identifier].metadata.overflow_policy,
+        shard=global_shard_manager.get_shard(identifier),
+    )
     await autorun_scheduler.start(identifier)
     return True
 
@@ -4,6 +4,8 @@ from pathlib import Path
 from typing import Any, Callable
 
 from ..logger import get_logger
+from ...constants.event import OVERFLOW_POLICIES
+from ...constants.plugin import ISOLATIONS
 from ...error.version import InvalidVersionValueError
 from ...types.plugin import (
     Metadata,
@@ -173,11 +175,37 @@ def _dependent_modules_loader(plugin_path: Path, raw_metadata: dict[str, Any]) -
 
     return True, tuple(dependent_modules)
 
+def _overflow_policy_loader(plugin_path: Path, raw_metadata: dict[str, Any]) -> tuple[bool, str | None]:
+    overflow_policy = raw_metadata.get("OverflowPolicy", "")
+    if not isinstance(overflow_policy, str):
+        _generic_err_logger(plugin_path, "Unsupported <OverflowPolicy> type.")
+        return False, None
+
+    if overflow_policy and overflow_policy not in OVERFLOW_POLICIES:
+        _generic_err_logger(plugin_path, f"Unsupported <OverflowPolicy>, available: {OVERFLOW_POLICIES}.")
+        return False, None
+
+    return True, overflow_policy
+
+def _isolation_loader(plugin_path: Path, raw_metadata: dict[str, Any]) -> tuple[bool, str | None]:
+    isolation = raw_metadata.get("Isolation", "")
+    if not isinstance(isolation, str):
+        _generic_err_logger(plugin_path, "Unsupported <Isolation> type.")
+        return False, None
+
+    if isolation not in ISOLATIONS:
+        _generic_err_logger(plugin_path, f"Unsupported <Isolation>, available: {ISOLATIONS}.")
+        return False, None
+
+    return True, isolation
+
 OPTIONAL_KEYS: dict[str, Callable[[Path, dict[str, Any]], tuple[bool, Any | None]]] = {
     "description": _description_loader,
     "dependent_framework_version": _dependent_framework_version_loader,
     "dependent_plugins": _dependent_plugins_loader,
     "dependent_modules": _dependent_modules_loader,
+    "overflow_policy": _overflow_policy_loader,
+    "isolation": _isolation_loader,
 }
 
 
@@ -0,0 +1,12 @@
+from os import cpu_count
+
+from .config import get_config
+from ..components.process_pool import ProcessPoolManager
+
+
+global_process_pool_manager = ProcessPoolManager(get_config("PROCESS_POOL_SIZE", cpu_count() or 1))
+
+
+__all__ = [
+    "global_process_pool_manager",
+]
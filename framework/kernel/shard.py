@@ -0,0 +1,10 @@
+from .config import get_config
+from ..components.shard import ShardManager
+
+
+global_shard_manager = ShardManager(get_config("SHARD_COUNT", 1), get_config("SHARD_PINS", {}))
+
+
+__all__ = [
+    "global_shard_manager",
+]
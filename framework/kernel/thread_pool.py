@@ -0,0 +1,15 @@
+from os import cpu_count
+
+from .config import get_config
+from ..components.thread_pool import ThreadPoolManager
+
+
+global_thread_pool_manager = ThreadPoolManager(
+    get_config("THREAD_POOL_DEFAULT_SIZE", min(32, (cpu_count() or 1) + 4)),
+    get_config("THREAD_POOL_SIZES", {}),
+)
+
+
+__all__ = [
+    "global_thread_pool_manager",
+]
@@ -0,0 +1,31 @@
+from typing import Any
+
+from .config import get_config
+from .path import get_log_path
+from ..components.trace import TraceManager
+from ..constants.framework import FRAMEWORK_METADATA
+
+
+global_trace_manager = TraceManager(
+    get_config("TRACE_SAMPLE_RATE", 0.0),
+    get_config("TRACE_MAX_INFLIGHT", 4096),
+    get_config("TRACE_BUFFER_MAXSIZE", 65536),
+    get_config("TRACE_FLUSH_INTERVAL", 1.0),
+    FRAMEWORK_METADATA.ID,
+)
+
+
+async def start_tracing() -> None:
+    if global_trace_manager.sample_rate > 0:
+        await global_trace_manager.start(get_log_path("trace") / "spans.jsonl")
+
+
+def get_trace_stats() -> dict[str, Any]:
+    return global_trace_manager.get_stats()
+
+
+__all__ = [
+    "global_trace_manager",
+    "start_tracing",
+    "get_trace_stats",
+]
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Type
+from typing import Any, Awaitable, Callable, Hashable, Type
 
 from .event import BaseEvent
 from ..base.trigger import BaseTrigger
 from ..components.trigger import EmptyTrigger
+from ..constants.callback import RUN_IN
+from ..utils.slots import fast_init
 
 
 CallbackFunction = Callable[..., Any | Awaitable[Any]]
@@ -18,16 +20,19 @@ FunctionIdentifierGetter = Callable[[CallbackFunction], str]
 FunctionNameGetter = Callable[[CallbackFunction], str]
 
 
-@dataclass(frozen=True)
+@fast_init
+@dataclass(frozen=True, slots=True)
 class CallbackItem:
     type: str
     identifier: str
     func_name: str
     origin_func: CallbackFunction
     actual_func: CallbackFunction
+    wrapper_args: "BaseCallbackWrapperArgs | None" = None
 
 
-@dataclass(frozen=True)
+@fast_init
+@dataclass(frozen=True, slots=True)
 class CallbackResultItem:
     item: CallbackItem
     is_exit: bool
@@ -35,46 +40,62 @@ class CallbackResultItem:
     result: Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaseArgs:
     origin_func: CallbackFunction
     func_name: str
     identifier: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaseCallbackExecutorArgs(BaseArgs):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaseCallbackWrapperArgs(BaseArgs):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BuiltinEmptyExecutorArgs(BaseCallbackExecutorArgs):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BuiltinExecutorArgs(BaseCallbackExecutorArgs):
-    timeout: int = 0
+    timeout: int = 0 # Seconds for an invocation with its retries, capped by the deadline of its event. 0 for none.
     retry_num: int = 0
-    retry_interval: int = 0
-
-
-@dataclass(frozen=True)
+    retry_interval: int = 0 # Seconds before the first retry.
+    retry_backoff: float = 1.0 # Factor of the interval after every retry, 1 keeps it fixed.
+    retry_max_interval: float = 0.0 # Upper bound of the interval. 0 for none.
+    retry_jitter: float = 0.0 # Randomized fraction (0 to 1) of the interval, so the callbacks that fail together do not retry together.
+    run_in: str = RUN_IN.LOOP # Where a synchronous function runs, see RUN_IN. A timed out thread is abandoned, not interrupted.
+    thread_pool: str = "default" # For run_in <thread>, see THREAD_POOL_SIZES in the config.
+    breaker_window: int = 0 # Last attempts kept by the circuit breaker (see CircuitBreaker). 0 for no breaker.
+    breaker_failure_rate: float = 0.5 # Failure rate of the full window that opens the circuit.
+    breaker_open_timeout: float = 30.0 # Seconds the circuit stays open before a trial call.
+
+
+@dataclass(frozen=True, slots=True)
 class BuiltinEmptyWrapperArgs(BaseCallbackWrapperArgs):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BuiltinProcessWrapperArgs(BaseCallbackWrapperArgs):
     event_type: Type[BaseEvent] = BaseEvent
+    overflow_policy: str = ""
+    max_concurrency: int = 0
+    serial: bool = False
+    target_latency: float = 0.0
+    partition_key: str | Callable[[BaseEvent], Hashable] | None = None
+    where: dict[str, Hashable] | None = None
+    topic: str = ""
+    deadline_order: bool = False
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BuiltinAutorunWrapperArgs(BaseCallbackWrapperArgs):
     trigger: BaseTrigger = EmptyTrigger()
     no_safe_exit: bool = isinstance(trigger, EmptyTrigger)
@@ -1,80 +1,523 @@
-from dataclasses import dataclass
+import pickle
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, field, fields, is_dataclass, make_dataclass
+from functools import partial
+from importlib import import_module
 from pathlib import Path
+from time import time
+from types import MemberDescriptorType, ModuleType
+from typing import Any, Callable, ClassVar, Hashable, Iterable, Type, get_type_hints
+from weakref import ref
 
+from ..constants.event import EVENT_PRIORITY
 
-@dataclass(frozen=True)
-class BaseEvent:
-    pass
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class BaseEvent:
+    """
+    event_priority: The lane of this event class in the global event bus, higher lanes are dispatched first. \n
+    event_durable: Whether the events of this class are kept in the event journal (if it is enabled) and replayed after a restart. \n
+    event_topic: Hierarchical topic of the event, segments separated by dots (e.g. <metrics.cpu.host1>), empty for none.
+    The events with a topic are also routed to the topic subscriptions that match it (the <topic> argument of on_process).
+    A subclass sets it on the class, or per event with a property or a keyword-only field of the same name. \n
+    event_deadline: Absolute deadline of the processing of the event (time.time() seconds), 0 for none.
+    A callback invocation of the default executor does not run past it, see BuiltinExecutor.
+    A subclass sets it per event with a property or a keyword-only field (field(default=0.0, kw_only=True)) of the same name,
+    or gives it a time to live with event_ttl. The expired events are dropped by the pipeline, see EventExpiryManager. \n
+    The event classes of the framework are slotted. A subclass is slotted only if it is decorated with @dataclass(frozen=True, slots=True),
+    and utils.slots.fast_init (applied above it) speeds up its __init__.
+    """
+    event_priority: ClassVar[int] = EVENT_PRIORITY.NORMAL
+    event_durable: ClassVar[bool] = True
+    event_topic: ClassVar[str] = ""
+    event_deadline: ClassVar[float] = 0.0
+
+
+# (Field name, value) pairs that an event must all be equal to, see the <where> argument of on_process.
+EventFilter = tuple[tuple[str, Hashable], ...]
+
+
+def event_ttl(seconds: float) -> Any:
+    """
+    A keyword-only event_deadline field, the events expire this many seconds after they are created: \n
+    event_deadline: float = event_ttl(5.0)
+    """
+    return field(default_factory=lambda: time() + seconds, kw_only=True)
+
+
+@dataclass(frozen=True, slots=True)
 class BaseSnowXEvent(BaseEvent):
-    pass
+    event_durable: ClassVar[bool] = False # Replaying the control events of the framework would repeat them.
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaseSnowXControlEvent(BaseSnowXEvent):
-    pass
+    event_priority: ClassVar[int] = EVENT_PRIORITY.CONTROL
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaseSnowXResultEvent(BaseSnowXEvent):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXStopEvent(BaseSnowXControlEvent):
     force: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXRestartEvent(BaseSnowXControlEvent):
     force: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXUpdateEvent(BaseSnowXControlEvent):
     force: bool
     update_path: Path = Path.cwd() / "update.zip"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXLoadPluginEvent(BaseSnowXControlEvent):
     identifier: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXLoadPluginResultEvent(BaseSnowXResultEvent):
     is_success: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXUnloadPluginEvent(BaseSnowXControlEvent):
     identifier: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXReloadPluginEvent(BaseSnowXControlEvent):
     identifier: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXReloadPluginResultEvent(BaseSnowXResultEvent):
     is_success: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXReloadAllEvent(BaseSnowXControlEvent):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SnowXReloadAllResultEvent(BaseSnowXResultEvent):
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class SnowXMetricsEvent(BaseSnowXControlEvent):
+    """
+    reset: Reset the metrics after taking the snapshot.
+    """
+    reset: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class SnowXMetricsResultEvent(BaseSnowXResultEvent):
+    snapshot: dict
+
+
+@dataclass(frozen=True, slots=True)
+class SnowXCircuitStateEvent(BaseSnowXEvent):
+    """
+    The circuit breaker of a callback changed its state, see CIRCUIT_STATE.
+    """
+    identifier: str
+    func_name: str
+    state: str
+    failure_rate: float
+
+
+CODEC_VERSION = 1
+
+_BATCH_HEADER = struct.Struct("<BHI") # Codec version, schema count, event count.
+_SCHEMA_HEADER = struct.Struct("<IH") # Schema fingerprint, name size.
+_EVENT_HEADER = struct.Struct("<HI") # Schema index, body size.
+_PICKLED = 0xFFFF # Schema index of an event that is pickled as a whole.
+
+# Field type -> (struct format, exact type check).
+_FIXED_KINDS: dict[type, tuple[str, str]] = {
+    bool: ("?", "type({v}) is not bool"),
+    int: ("q", "type({v}) is not int"),
+    float: ("d", "type({v}) is not float"),
+}
+# Field type -> (kind name, type check, encode expression, decode expression).
+_VAR_KINDS: dict[type, tuple[str, str, str, str]] = {
+    str: ("str", "type({v}) is not str", "{v}.encode('utf-8')", "_str({d}, 'utf-8')"),
+    bytes: ("bytes", "type({v}) is not bytes", "{v}", "bytes({d})"),
+    Path: ("path", "not isinstance({v}, _Path)", "str({v}).encode('utf-8')", "_Path(_str({d}, 'utf-8'))"),
+}
+_CODEC_ATTRIBUTE = "__event_codec__"
+_PICKLE_KIND = ("pickle", "", "_dumps({v}, _PROTOCOL)", "_loads({d})")
+# Field kind in a schema -> field type of a proxy class.
+_PROXY_KINDS: dict[str, type] = {code: kind for kind, (code, _) in _FIXED_KINDS.items()} | {kind[0]: annotation for annotation, kind in _VAR_KINDS.items()}
+# Class attributes of BaseEvent that a schema carries -> their type.
+_PROXY_ATTRIBUTES: dict[str, type] = {"event_priority": int, "event_durable": bool, "event_topic": str, "event_deadline": float}
+
+_ENCODE_ERRORS = (TypeError, ValueError, AttributeError, struct.error, pickle.PicklingError)
+
+
+def _raise(error: Exception, *_) -> Any:
+    raise error
+
+
+def _create_fn(name: str, args: str, lines: list[str], namespace: dict[str, Any]) -> Callable[..., Any]:
+    source = f"def {name}({args}):\n" + "\n".join(f"    {line}" for line in lines)
+    exec(source, namespace)
+    return namespace[name]
+
+
+class EventCodecError(Exception):
+    pass
+
+
+class EventCodec:
+    """
+    Binary layout of a BaseEvent dataclass, derived from its fields. \n
+    bool, int and float fields are packed into one fixed-size struct, together with the sizes of the variable-size fields
+    (str, bytes and Path), which follow it. Fields of any other type are pickled on their own.
+    The encode and decode functions are generated for the layout, like the __init__ of a dataclass. \n
+    The fingerprint covers the class name and the name and kind of every field, so an event encoded by another version
+    of the class is rejected instead of being decoded into the wrong fields.
+    """
+    def __init__(self, event_type: Type[BaseEvent]) -> None:
+        if not (isinstance(event_type, type) and issubclass(event_type, BaseEvent) and is_dataclass(event_type)):
+            raise EventCodecError(f"<{event_type}> is not a BaseEvent dataclass")
+
+        try:
+            hints = get_type_hints(event_type)
+        except Exception:
+            hints = {}
+
+        names = [field.name for field in fields(event_type)]
+        fixed: list[tuple[int, str, str]] = [] # (Field index, struct format, type check)
+        var: list[tuple[int, tuple[str, str, str, str]]] = [] # (Field index, kind)
+        kinds: list[tuple[str, str]] = [] # (Field name, kind)
+        for index, name in enumerate(names):
+            annotation = hints.get(name)
+            if annotation in _FIXED_KINDS:
+                code, check = _FIXED_KINDS[annotation]
+                fixed.append((index, code, check))
+                kinds.append((name, code))
+            else:
+                kind = _VAR_KINDS.get(annotation, _PICKLE_KIND)
+                var.append((index, kind))
+                kinds.append((name, kind[0]))
+
+        self._event_type = event_type
+        self._kinds = tuple(kinds)
+        self._has_pickle = any(kind is _PICKLE_KIND for _, kind in var)
+        self._name = f"{event_type.__module__}:{event_type.__qualname__}"
+        self._fingerprint = zlib.crc32(f"{CODEC_VERSION}|{self._name}|{';'.join(f'{name}:{kind}' for name, kind in kinds)}".encode("utf-8")) or 1
+
+        layout = "".join(code for _, code, _ in fixed) + "I" * len(var)
+        encode_struct = struct.Struct("<HI" + layout) # Starts with the event header.
+        decode_struct = struct.Struct("<" + layout)
+        namespace = {
+            "_cls": event_type,
+            "_pack": encode_struct.pack,
+            "_unpack": decode_struct.unpack_from,
+            "_new": object.__new__,
+            "_str": str,
+            "_Path": Path,
+            "_dumps": pickle.dumps,
+            "_loads": pickle.loads,
+            "_PROTOCOL": pickle.HIGHEST_PROTOCOL,
+        }
+
+        encode_lines = [f"_f{index} = event.{name}" for index, name in enumerate(names)]
+        checks = [check.format(v=f"_f{index}") for index, _, check in fixed]
+        checks += [kind[1].format(v=f"_f{index}") for index, kind in var if kind[1]]
+        if checks:
+            encode_lines.append(f"if {' or '.join(checks)}:")
+            encode_lines.append("    raise TypeError(f'<{event}> has a value that does not match the type of its field')")
+        encode_lines += [f"_b{index} = {kind[2].format(v=f'_f{index}')}" for index, kind in var]
+        packed = ["index", str(decode_struct.size) + "".join(f" + len(_b{index})" for index, _ in var)]
+        packed += [f"_f{index}" for index, _, _ in fixed] + [f"len(_b{index})" for index, _ in var]
+        encode_lines.append(f"return _pack({', '.join(packed)})" + "".join(f" + _b{index}" for index, _ in var))
+
+        decode_lines: list[str] = []
+        if layout:
+            unpacked = [f"_f{index}" for index, _, _ in fixed] + [f"_n{index}" for index, _ in var]
+            decode_lines.append(f"{', '.join(unpacked)}, = _unpack(view, position)")
+        decode_lines.append(f"position += {decode_struct.size}")
+        for index, kind in var:
+            decode_lines.append(f"_f{index} = {kind[3].format(d=f'view[position:position + _n{index}]')}")
+            decode_lines.append(f"position += _n{index}")
+        decode_lines.append("event = _new(_cls)")
+        state: list[str] = []
+        for index, name in enumerate(names):
+            member = getattr(event_type, name, None)
+            if isinstance(member, MemberDescriptorType): # Slotted field.
+                namespace[f"_set{index}"] = member.__set__
+                decode_lines.append(f"_set{index}(event, _f{index})")
+            else:
+                state.append(f"{name!r}: _f{index}")
+        if state:
+            decode_lines.append(f"event.__dict__.update({{{', '.join(state)}}})")
+        decode_lines.append("return event")
+
+        self._encode = _create_fn("encode", "event, index", encode_lines, namespace)
+        self._decode = _create_fn("decode", "view, position", decode_lines, namespace)
+
+    @property
+    def event_type(self) -> Type[BaseEvent]:
+        return self._event_type
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def fingerprint(self) -> int:
+        return self._fingerprint
+
+    @property
+    def has_pickle(self) -> bool:
+        """
+        Whether a field is not of a plain type (bool, int, float, str, bytes or Path), so its values are pickled.
+        """
+        return self._has_pickle
+
+    def get_schema(self) -> dict[str, Any]:
+        """
+        :return: The name, fingerprint, field kinds and class attributes of the class in JSON types, see EventCodecRegistry.resolve_schema.
+        """
+        field_names = {name for name, _ in self._kinds}
+        attributes = {}
+        for name, attribute_type in _PROXY_ATTRIBUTES.items():
+            value = getattr(self._event_type, name, None)
+            if name not in field_names and type(value) is attribute_type: # Not a field or a property.
+                attributes[name] = value
+        return {
+            "name": self._name,
+            "fingerprint": self._fingerprint,
+            "fields": [list(kind) for kind in self._kinds],
+            "attributes": attributes,
+        }
+
+    def encode(self, event: BaseEvent, index: int) -> bytes:
+        """
+        Encode the event, starting with its event header in a batch.
+        param index: Index of this codec in the schemas of the batch.
+        :raise TypeError: A field value does not have the exact type of its annotation, it would not be decoded into the same value.
+        :raise struct.error: An int field does not fit into 64 bits.
+        """
+        return self._encode(event, index)
+
+    def decode(self, view: memoryview, position: int) -> BaseEvent:
+        """
+        Decode the event whose body (after the event header) starts at the position. The fields are sliced from the view without copying.
+        """
+        return self._decode(view, position)
+
+
+class EventCodecRegistry:
+    """
+    Encode events into a compact binary format, as a replacement of pickle for events that leave the process. \n
+    A batch stores the name and fingerprint of each event class once, followed by the events. An event class is found
+    by its name when decoding, importing its module like pickle does, and an event whose class has a different fingerprint
+    is rejected. An event that does not fit its layout (for example a value of another type) is pickled as a whole.
+    An untrusted batch imports nothing, its classes are found in the imported modules or among the proxy classes.
+    """
+    def __init__(self) -> None:
+        # Weak references only, so reloaded event classes are not kept alive. A codec is kept by its class, see get_codec.
+        self._resolved: dict[tuple[str, int], tuple[ref[ModuleType], ref[EventCodec]]] = {}
+        self._proxies: dict[tuple[str, int], EventCodec] = {}
+
+    def get_codec(self, event_type: Type[BaseEvent]) -> EventCodec:
+        """
+        :raise EventCodecError: The class is not a BaseEvent dataclass.
+        """
+        codec = getattr(event_type, "__dict__", {}).get(_CODEC_ATTRIBUTE) # Not inherited by subclasses.
+        if codec is None:
+            codec = EventCodec(event_type)
+            setattr(event_type, _CODEC_ATTRIBUTE, codec) # The codec refers to the class, a registry entry would keep it alive.
+        return codec
+
+    def _resolve(self, name: str, fingerprint: int, importable: bool = True) -> EventCodec:
+        """
+        param importable: Import the module of the class if it is not imported. If it is False, a proxy class is used instead.
+        """
+        module_name, _, qualname = name.partition(":")
+        resolved = self._resolved.get((name, fingerprint))
+        if resolved is not None and sys.modules.get(module_name) is resolved[0](): # The module is not reloaded since.
+            codec = resolved[1]()
+            if codec is not None:
+                return codec
+
+        try:
+            module = sys.modules.get(module_name)
+            if module is None and importable:
+                module = import_module(module_name)
+            target = module
+            for part in qualname.split("."):
+                target = getattr(target, part)
+        except (ImportError, AttributeError) as e:
+            proxy = None if importable else self._proxies.get((name, fingerprint))
+            if proxy is not None:
+                return proxy
+            raise EventCodecError(f"Event class <{name}> cannot be found") from e
+
+        codec = self.get_codec(target)
+        if codec.fingerprint != fingerprint:
+            raise EventCodecError(f"Event class <{name}> has a different schema")
+        self._resolved[(name, fingerprint)] = (ref(module), ref(codec))
+        return codec
+
+    def _new_proxy(self, schema: Any) -> EventCodec:
+        try:
+            name, fingerprint, kinds, attributes = schema["name"], schema["fingerprint"], schema["fields"], schema["attributes"]
+            module_name, _, qualname = name.partition(":")
+            parts = qualname.split(".")
+            if not all(part.isidentifier() for part in (*module_name.split("."), *parts)):
+                raise ValueError(f"<{name}> is not a class name")
+            field_types = [(field_name, _PROXY_KINDS[kind]) for field_name, kind in kinds if field_name.isidentifier()]
+            if len(field_types) != len(kinds) or not all(type(attributes.get(key, value_type())) is value_type for key, value_type in _PROXY_ATTRIBUTES.items()):
+                raise ValueError(f"<{name}> has fields or attributes of other types")
+            namespace = {key: attributes[key] for key in _PROXY_ATTRIBUTES if key in attributes}
+            namespace.update({"__module__": module_name, "__qualname__": qualname})
+            event_type = make_dataclass(parts[-1], field_types, bases=(BaseEvent,), namespace=namespace, frozen=True, slots=True)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise EventCodecError(f"<{schema}> is not a valid event schema") from e
+
+        codec = self.get_codec(event_type)
+        if codec.fingerprint != fingerprint:
+            raise EventCodecError(f"<{name}> does not match its fingerprint")
+        return codec
+
+    def resolve_schema(self, schema: Any) -> Type[BaseEvent]:
+        """
+        Find the event class of a schema (see EventCodec.get_schema) without importing anything.
+        If its module is not imported, a proxy class is built from the schema: a BaseEvent dataclass with the same name,
+        fields and class attributes, but no methods. The events of the class in untrusted batches are decoded into it.
+        :raise EventCodecError: The schema is not valid, a field is not of a plain kind, or the class here has a different schema.
+        """
+        try:
+            name, fingerprint = schema["name"], schema["fingerprint"]
+            codec = self._proxies.get((name, fingerprint))
+        except (KeyError, TypeError) as e:
+            raise EventCodecError(f"<{schema}> is not a valid event schema") from e
+        if codec is None:
+            module_name = name.partition(":")[0] if isinstance(name, str) else ""
+            if module_name in sys.modules:
+                return self._resolve(name, fingerprint, False).event_type
+            codec = self._proxies[(name, fingerprint)] = self._new_proxy(schema)
+        return codec.event_type
+
+    def encode_batch(self, events: Iterable[BaseEvent], allow_pickle: bool = True) -> bytes:
+        """
+        param allow_pickle: Pickle the events and the fields that do not fit the layout. If it is False, they cannot be encoded.
+        :raise EventCodecError: An event cannot be encoded, not even by pickle.
+        """
+        schemas: dict[type, tuple[EventCodec, int]] = {}
+        chunks: list[bytes] = []
+        for event in events:
+            try:
+                schema = schemas.get(type(event))
+                if schema is None:
+                    schema = schemas[type(event)] = (self.get_codec(type(event)), len(schemas))
+                if not allow_pickle and schema[0].has_pickle:
+                    raise EventCodecError(f"<{event}> has fields that are pickled")
+                chunks.append(schema[0].encode(event, schema[1]))
+            except (EventCodecError, *_ENCODE_ERRORS) as e:
+                if not allow_pickle:
+                    raise EventCodecError(f"<{event}> cannot be encoded without pickle") from e
+                try:
+                    body = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    raise EventCodecError(f"<{event}> cannot be encoded") from e
+                chunks.append(_EVENT_HEADER.pack(_PICKLED, len(body)) + body)
+
+        header = [_BATCH_HEADER.pack(CODEC_VERSION, len(schemas), len(chunks))]
+        for codec, _ in schemas.values():
+            name = codec.name.encode("utf-8")
+            header.append(_SCHEMA_HEADER.pack(codec.fingerprint, len(name)))
+            header.append(name)
+        return b"".join(header + chunks)
+
+    def decode_batch(self, buffer: bytes | bytearray | memoryview, errors: list[Exception] | None = None, trusted: bool = True) -> list[BaseEvent]:
+        """
+        param errors: If it is given, an event that cannot be decoded is skipped and the error is appended to it. Otherwise the error is raised.
+        param trusted: If it is False, nothing in the buffer is unpickled: the pickled events and the classes with pickled fields are rejected.
+        No module is imported either, the classes of modules that are not imported are found among the proxy classes (see resolve_schema).
+        :raise EventCodecError: The buffer is not a batch of this codec version, or an event cannot be decoded.
+        """
+        view = memoryview(buffer)
+        try:
+            version, schema_count, event_count = _BATCH_HEADER.unpack_from(view, 0)
+        except struct.error as e:
+            raise EventCodecError("Truncated event batch") from e
+        if version != CODEC_VERSION:
+            raise EventCodecError(f"Unsupported event codec version <{version}>")
+
+        position = _BATCH_HEADER.size
+        decoders: list[Callable[[memoryview, int], BaseEvent]] = []
+        for _ in range(schema_count):
+            fingerprint, size = _SCHEMA_HEADER.unpack_from(view, position)
+            position += _SCHEMA_HEADER.size
+            name = str(view[position:position + size], "utf-8")
+            position += size
+            try:
+                codec = self._resolve(name, fingerprint, trusted)
+                if not trusted and codec.has_pickle:
+                    raise EventCodecError(f"Event class <{name}> has fields that are pickled")
+                decoders.append(codec.decode)
+            except EventCodecError as e:
+                if errors is None:
+                    raise
+                decoders.append(partial(_raise, e))
+
+        events: list[BaseEvent] = []
+        unpack_header = _EVENT_HEADER.unpack_from
+        for _ in range(event_count):
+            index, size = unpack_header(view, position)
+            position += _EVENT_HEADER.size
+            try:
+                if index == _PICKLED:
+                    if not trusted:
+                        raise EventCodecError("A pickled event is rejected")
+                    events.append(pickle.loads(view[position:position + size]))
+                else:
+                    events.append(decoders[index](view, position))
+            except EventCodecError as e:
+                if errors is None:
+                    raise
+                errors.append(e)
+            except Exception as e:
+                if errors is None:
+                    raise EventCodecError("Failed to decode an event") from e
+                errors.append(e)
+            position += size
+
+        return events
+
+    def encode(self, event: BaseEvent) -> bytes:
+        return self.encode_batch((event,))
+
+    def decode(self, buffer: bytes | bytearray | memoryview) -> BaseEvent:
+        events = self.decode_batch(buffer)
+        if len(events) != 1:
+            raise EventCodecError(f"Expected 1 event, got {len(events)}")
+        return events[0]
+
+
+event_codec = EventCodecRegistry()
+
+
 __all__ = [
     "BaseEvent",
+    "EventFilter",
+    "event_ttl",
 
     "BaseSnowXEvent",
     "BaseSnowXControlEvent",
@@ -91,4 +534,13 @@ __all__ = [
     "SnowXReloadPluginResultEvent",
     "SnowXReloadAllEvent",
     "SnowXReloadAllResultEvent",
+
+    "SnowXMetricsEvent",
+    "SnowXMetricsResultEvent",
+    "SnowXCircuitStateEvent",
+
+    "EventCodecError",
+    "EventCodec",
+    "EventCodecRegistry",
+    "event_codec",
 ]
@@ -22,6 +22,8 @@ class Metadata:
     dependent_framework_version: tuple[()] | tuple[Version | None] | tuple[Version | None, Version | None]
     dependent_plugins: tuple[DependentPlugin, ...]
     dependent_modules: tuple[str, ...]
+    overflow_policy: str
+    isolation: str
 
 
 @dataclass(frozen=True)
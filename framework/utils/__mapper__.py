@@ -1,9 +1,20 @@
+from . import breaker
+from . import dead_letter
 from . import delayed_import
+from . import fan_out
+from . import journal
+from . import limiter
 from . import lock
+from . import metrics
 from . import module
 from . import path
 from . import queue
+from . import record
 from . import serial_executor
+from . import slots
+from . import spill
+from . import topic
+from . import trace
 from . import version
 from . import worker
 from ..constants.vmodule import VMODULE_ROOT_PATH, VMODULE_SUBROOT_PATH
@@ -13,11 +24,22 @@ from ..kernel.vmodule.expand import Adder
 adder = Adder(f"{VMODULE_ROOT_PATH.ROOT}.{VMODULE_SUBROOT_PATH.UTILS}")
 
 
+adder.get_sub_adder("breaker").auto_add(breaker)
+adder.get_sub_adder("dead_letter").auto_add(dead_letter)
 adder.get_sub_adder("delayed_import").auto_add(delayed_import)
+adder.get_sub_adder("fan_out").auto_add(fan_out)
+adder.get_sub_adder("journal").auto_add(journal)
+adder.get_sub_adder("limiter").auto_add(limiter)
 adder.get_sub_adder("lock").auto_add(lock)
+adder.get_sub_adder("metrics").auto_add(metrics)
 adder.get_sub_adder("module").auto_add(module)
 adder.get_sub_adder("path").auto_add(path)
 adder.get_sub_adder("queue").auto_add(queue)
+adder.get_sub_adder("record").auto_add(record)
 adder.get_sub_adder("serial_executor").auto_add(serial_executor)
+adder.get_sub_adder("slots").auto_add(slots)
+adder.get_sub_adder("spill").auto_add(spill)
+adder.get_sub_adder("topic").auto_add(topic)
+adder.get_sub_adder("trace").auto_add(trace)
 adder.get_sub_adder("version").auto_add(version)
 adder.get_sub_adder("worker").auto_add(worker)
@@ -0,0 +1,90 @@
+from collections import deque
+from time import monotonic
+
+from ..constants.callback import CIRCUIT_STATE
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker over the outcomes of the last calls. \n
+    closed: The calls are allowed. When the window is full and its failure rate reaches failure_rate, the circuit opens. \n
+    open: The calls are rejected at once. After open_timeout seconds, the circuit becomes half-open. \n
+    half_open: One trial call is allowed, the others are rejected. If it succeeds the circuit closes with an empty window,
+    otherwise it opens again.
+    """
+    def __init__(self, window: int, failure_rate: float, open_timeout: float) -> None:
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window))
+        self._failure_rate = min(max(0.0, failure_rate), 1.0)
+        self._open_timeout = max(0.0, open_timeout)
+
+        self._state = CIRCUIT_STATE.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False # A trial call of the half-open state is in progress.
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def _open(self) -> None:
+        self._state = CIRCUIT_STATE.OPEN
+        self._opened_at = monotonic()
+        self._trial = False
+
+    def allow(self) -> bool:
+        """
+        :return: Whether a call is allowed now. If it is, its outcome must be given to record.
+        """
+        if self._state == CIRCUIT_STATE.CLOSED:
+            return True
+        if self._state == CIRCUIT_STATE.OPEN:
+            if monotonic() - self._opened_at < self._open_timeout:
+                return False
+            self._state = CIRCUIT_STATE.HALF_OPEN
+        if self._trial:
+            return False
+
+        self._trial = True
+        return True
+
+    def abort(self) -> None:
+        """
+        An allowed call ended without an outcome (e.g. it was cancelled).
+        """
+        self._trial = False
+
+    def record(self, is_success: bool) -> None:
+        if self._state == CIRCUIT_STATE.HALF_OPEN:
+            if is_success:
+                self._state = CIRCUIT_STATE.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                self._trial = False
+            else:
+                self._open()
+            return
+        if self._state == CIRCUIT_STATE.OPEN: # A call allowed before the circuit opened.
+            return
+
+        outcomes = self._outcomes
+        if len(outcomes) == outcomes.maxlen and not outcomes[0]:
+            self._failures -= 1
+        outcomes.append(is_success)
+        if not is_success:
+            self._failures += 1
+            if len(outcomes) == outcomes.maxlen and self._failures >= self._failure_rate * len(outcomes):
+                self._open()
+
+
+__all__ = [
+    "CircuitOpenError",
+    "CircuitBreaker",
+]
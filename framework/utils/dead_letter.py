@@ -0,0 +1,115 @@
+import json
+import os
+import struct
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterable
+
+from .record import iter_records, pack_record
+
+
+_METADATA_SIZE = struct.Struct("<I") # Prefix of the record, followed by the metadata and the encoded event.
+
+
+class DeadLetter:
+    """
+    An event whose callback failed after all its attempts, with the context of the failure. \n
+    param exception: The last exception, formatted as <type: message>.
+    """
+    __slots__ = ("id", "event", "identifier", "func_name", "exception", "attempts", "timestamp")
+
+    def __init__(
+            self,
+            id: int,
+            event: Any,
+            identifier: str,
+            func_name: str,
+            exception: str,
+            attempts: int,
+            timestamp: float,
+    ) -> None:
+        self.id = id
+        self.event = event
+        self.identifier = identifier
+        self.func_name = func_name
+        self.exception = exception
+        self.attempts = attempts
+        self.timestamp = timestamp
+
+    def get_metadata(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "identifier": self.identifier,
+            "func_name": self.func_name,
+            "exception": self.exception,
+            "attempts": self.attempts,
+            "timestamp": self.timestamp,
+        }
+
+
+class DeadLetterFile:
+    """
+    The file of a dead-letter store, a sequence of records (see utils.record) of the metadata (JSON) and the encoded event of each entry.
+    Loading stops at the first torn or corrupted record. \n
+    New entries are appended in batches. After entries are removed, the file is rewritten as a whole
+    into a temporary file that replaces it, so a crash leaves either the old or the new file.
+    """
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = Lock() # Written in worker threads.
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @staticmethod
+    def _pack(records: Iterable[tuple[dict[str, Any], bytes]]) -> bytes:
+        chunks: list[bytes] = []
+        for metadata, payload in records:
+            meta = json.dumps(metadata, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            chunks.append(pack_record(_METADATA_SIZE.pack(len(meta)) + meta + payload))
+        return b"".join(chunks)
+
+    def load(self) -> list[tuple[dict[str, Any], bytes]]:
+        try:
+            with open(self._path, "rb") as f:
+                buffer = f.read()
+        except FileNotFoundError:
+            return []
+
+        records: list[tuple[dict[str, Any], bytes]] = []
+        for _, record in iter_records(buffer):
+            try:
+                meta_size, = _METADATA_SIZE.unpack_from(record)
+                start = _METADATA_SIZE.size
+                records.append((json.loads(record[start:start + meta_size]), record[start + meta_size:]))
+            except (struct.error, ValueError):
+                break
+        return records
+
+    def append(self, records: list[tuple[dict[str, Any], bytes]]) -> None:
+        if not records:
+            return
+
+        data = self._pack(records)
+        with self._lock:
+            with open(self._path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def rewrite(self, records: list[tuple[dict[str, Any], bytes]]) -> None:
+        data = self._pack(records)
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with self._lock:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._path)
+
+
+__all__ = [
+    "DeadLetter",
+    "DeadLetterFile",
+]
@@ -0,0 +1,71 @@
+import asyncio
+from types import coroutine
+from typing import Any, Awaitable, Callable, Coroutine, Generator
+
+
+@coroutine
+def _resume(coro: Coroutine, yielded: Any) -> Generator[Any, Any, Any]:
+    # Drive a coroutine that already yielded once outside of a task, like the task that awaits this would drive it.
+    while True:
+        try:
+            value = yield yielded
+        except BaseException as e: # Thrown in by the task, for example CancelledError.
+            try:
+                yielded = coro.throw(e)
+            except StopIteration as stop:
+                return stop.value
+        else:
+            try:
+                yielded = coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+
+
+async def _finish(coro: Coroutine, yielded: Any) -> Any:
+    return await _resume(coro, yielded)
+
+
+async def fan_out(funcs: tuple[Callable[..., Awaitable[Any]], ...], *args: Any) -> list[Any]:
+    """
+    Call every function with the same arguments concurrently, like asyncio.gather. \n
+    Each call runs in the caller's task until it first suspends, and only the suspended calls get their own tasks,
+    so the calls that finish without suspending cost no task. A single function is awaited directly. \n
+    A function that raises does not stop the others, the first exception in the order of funcs is raised after all of them finished.
+    :return: The results in the order of funcs.
+    """
+    if len(funcs) == 1:
+        return [await funcs[0](*args)]
+
+    results: list[Any] = [None] * len(funcs)
+    errors: list[BaseException | None] = [None] * len(funcs)
+    pending: dict[int, asyncio.Future] = {}
+    for index, func in enumerate(funcs):
+        try:
+            coro = func(*args)
+            if not asyncio.iscoroutine(coro): # Another awaitable.
+                pending[index] = asyncio.ensure_future(coro)
+                continue
+            yielded = coro.send(None)
+        except StopIteration as stop:
+            results[index] = stop.value
+        except Exception as e:
+            errors[index] = e
+        else:
+            pending[index] = asyncio.ensure_future(_finish(coro, yielded))
+
+    if pending:
+        for index, result in zip(pending, await asyncio.gather(*pending.values(), return_exceptions=True)):
+            if isinstance(result, BaseException):
+                errors[index] = result
+            else:
+                results[index] = result
+
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
+
+
+__all__ = [
+    "fan_out",
+]
@@ -0,0 +1,219 @@
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO
+
+from .record import RECORD_HEADER_SIZE, iter_records, pack_record
+
+
+_CHECKPOINT = struct.Struct("<QI") # Watermark, CRC32 of the watermark.
+_SEQUENCE = struct.Struct("<Q") # Prefix of the payload of every record.
+
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILENAME = "checkpoint"
+
+
+class _Segment:
+    """
+    A preallocated, memory-mapped segment file. The unused tail is zero, so a zero size header marks the end of the records.
+    """
+    def __init__(self, path: Path, first_seq: int, size: int = 0) -> None:
+        self.path = path
+        self.first_seq = first_seq
+        self.last_seq = first_seq - 1
+        self.write_pos = 0
+
+        self._file: BinaryIO = open(path, "r+b" if size == 0 else "w+b")
+        if size:
+            self._file.truncate(size)
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self.size) if self.size else None
+        self._flushed_pos = 0
+
+    def fits(self, record_size: int) -> bool:
+        return self.write_pos + record_size <= self.size
+
+    def write(self, seq: int, payload: bytes) -> None:
+        record = pack_record(_SEQUENCE.pack(seq) + payload)
+        end = self.write_pos + len(record)
+        self._mmap[self.write_pos:end] = record
+        self.write_pos = end
+        self.last_seq = seq
+
+    def scan(self, expected_seq: int | None) -> list[tuple[int, bytes]]:
+        """
+        Read the records until the end marker, a checksum mismatch or a sequence gap (a torn write of a crash).
+        """
+        records: list[tuple[int, bytes]] = []
+        pos = 0
+        for end, payload in iter_records(self._mmap) if self._mmap is not None else ():
+            if len(payload) < _SEQUENCE.size:
+                break
+            seq, = _SEQUENCE.unpack_from(payload)
+            if expected_seq is not None and seq != expected_seq:
+                break
+
+            records.append((seq, payload[_SEQUENCE.size:]))
+            self.last_seq = seq
+            expected_seq = seq + 1
+            pos = end
+
+        self.write_pos = pos
+        return records
+
+    def flush(self) -> None:
+        if self._mmap is None or self._flushed_pos == self.write_pos:
+            return
+        position = self.write_pos
+        self._mmap.flush()
+        self._flushed_pos = position
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class EventJournal:
+    """
+    A segmented, memory-mapped append-only log of binary records. \n
+    Every record has a sequence number and a CRC32 checksum. The segment files are preallocated with segment_maxbytes and
+    rotated when full. Appending only copies the record into the mapped memory, so it survives a crash of the process at once.
+    commit flushes the segments to disk in one batch (group commit), stores the consumed watermark in the checkpoint file,
+    and removes the segments whose records are all below it. \n
+    Note: append may be called while commit runs in another thread, but not from several threads at once.
+    """
+    def __init__(self, directory: Path, segment_maxbytes: int) -> None:
+        self._directory = directory
+        self._segment_maxbytes = max(segment_maxbytes, 4096)
+
+        self._lock = Lock()
+        self._segments: list[_Segment] = []
+        self._active: _Segment | None = None
+        self._next_seq = 0
+        self._watermark = 0
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    @property
+    def watermark(self) -> int:
+        return self._watermark
+
+    @property
+    def segments(self) -> int:
+        return len(self._segments)
+
+    def _read_checkpoint(self) -> int:
+        try:
+            data = (self._directory / CHECKPOINT_FILENAME).read_bytes()
+            watermark, checksum = _CHECKPOINT.unpack(data)
+        except (OSError, struct.error):
+            return 0
+
+        if zlib.crc32(_SEQUENCE.pack(watermark)) != checksum:
+            return 0
+        return watermark
+
+    def _write_checkpoint(self, watermark: int) -> None:
+        path = self._directory / CHECKPOINT_FILENAME
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(_CHECKPOINT.pack(watermark, zlib.crc32(_SEQUENCE.pack(watermark))))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def open(self) -> list[tuple[int, bytes]]:
+        """
+        Recover the journal from the directory.
+        :return: The records that are not below the consumed watermark, in sequence order.
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._watermark = self._read_checkpoint()
+        self._next_seq = self._watermark
+
+        records: list[tuple[int, bytes]] = []
+        expected_seq: int | None = None
+        for path in sorted(self._directory.glob(f"*{SEGMENT_SUFFIX}")):
+            try:
+                segment = _Segment(path, int(path.stem))
+            except (OSError, ValueError):
+                continue
+
+            if expected_seq is not None and segment.first_seq != expected_seq:
+                segment.close()
+                path.unlink(missing_ok=True) # Left behind a gap, it cannot be replayed in order.
+                continue
+
+            scanned = segment.scan(segment.first_seq)
+            if not scanned:
+                segment.close()
+                path.unlink(missing_ok=True)
+                continue
+
+            self._segments.append(segment)
+            records.extend(record for record in scanned if record[0] >= self._watermark)
+            expected_seq = segment.last_seq + 1
+            self._next_seq = max(self._next_seq, expected_seq)
+
+        return records
+
+    def _rotate(self, record_size: int) -> _Segment:
+        path = self._directory / f"{self._next_seq:020d}{SEGMENT_SUFFIX}"
+        segment = _Segment(path, self._next_seq, max(self._segment_maxbytes, record_size))
+        self._segments.append(segment)
+        self._active = segment
+        return segment
+
+    def append(self, payload: bytes) -> int:
+        """
+        :return: Sequence number of the record.
+        """
+        record_size = RECORD_HEADER_SIZE + _SEQUENCE.size + len(payload)
+        with self._lock:
+            segment = self._active
+            if segment is None or not segment.fits(record_size):
+                segment = self._rotate(record_size)
+
+            seq = self._next_seq
+            segment.write(seq, payload)
+            self._next_seq = seq + 1
+        return seq
+
+    def commit(self, watermark: int) -> None:
+        """
+        Flush the appended records, then store the watermark (all records below it are consumed) and remove the consumed segments.
+        """
+        with self._lock:
+            segments = tuple(self._segments)
+        for segment in segments:
+            segment.flush()
+
+        if watermark != self._watermark:
+            self._write_checkpoint(watermark)
+            self._watermark = watermark
+
+        with self._lock:
+            obsolete = [segment for segment in self._segments if segment.last_seq < watermark and segment is not self._active]
+            self._segments = [segment for segment in self._segments if segment not in obsolete]
+        for segment in obsolete:
+            segment.close()
+            segment.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            segments, self._segments, self._active = self._segments, [], None
+        for segment in segments:
+            segment.flush()
+            segment.close()
+
+
+__all__ = [
+    "EventJournal",
+]
@@ -0,0 +1,118 @@
+import asyncio
+from collections import deque
+from time import monotonic
+
+
+class ConcurrencyLimiter:
+    """
+    Limit the number of concurrent operations. \n
+    acquire returns the start time of the operation, which must be passed back to release together with its outcome.
+    """
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, limit)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _wakeup(self) -> None:
+        while self._waiters and self._in_flight < self._limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def acquire(self) -> float:
+        if self._in_flight < self._limit and not self._waiters:
+            self._in_flight += 1
+            return monotonic()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1 # The slot was handed over before the cancellation.
+                self._wakeup()
+            raise asyncio.CancelledError
+
+        return monotonic()
+
+    def release(self, started_at: float, is_success: bool | None = None) -> None:
+        """
+        :param started_at: The value returned by acquire.
+        :param is_success: Outcome of the operation. If this parameter is none, the operation is not used as a sample.
+        """
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wakeup()
+
+
+class AIMDLimiter(ConcurrencyLimiter):
+    """
+    A concurrency limiter that adjusts its limit by additive increase / multiplicative decrease. \n
+    The limit grows by one after a full limit of operations finished successfully within target_latency,
+    and is multiplied by decrease_factor when an operation fails or runs longer than target_latency.
+    Only one decrease is applied for the operations that were already running at the time of the last decrease. \n
+    latency is the exponentially weighted moving average of the operation latency.
+    """
+    def __init__(
+            self,
+            target_latency: float,
+            max_limit: int,
+            min_limit: int = 1,
+            initial_limit: int | None = None,
+            decrease_factor: float = 0.5,
+            smoothing: float = 0.2,
+    ) -> None:
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        super().__init__(min(self._max_limit, max(self._min_limit, initial_limit or self._min_limit)))
+
+        self._target_latency = target_latency
+        self._decrease_factor = min(max(decrease_factor, 0.0), 1.0)
+        self._smoothing = min(max(smoothing, 0.0), 1.0)
+
+        self._latency = 0.0
+        self._successes = 0
+        self._last_decrease = 0.0
+
+    @property
+    def latency(self) -> float:
+        return self._latency
+
+    @property
+    def target_latency(self) -> float:
+        return self._target_latency
+
+    def release(self, started_at: float, is_success: bool | None = None) -> None:
+        if is_success is not None:
+            now = monotonic()
+            latency = now - started_at
+            self._latency += (latency - self._latency) * self._smoothing
+
+            if not is_success or latency > self._target_latency:
+                if started_at >= self._last_decrease:
+                    self._limit = max(self._min_limit, int(self._limit * self._decrease_factor))
+                    self._last_decrease = now
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self._limit:
+                    self._limit = min(self._max_limit, self._limit + 1)
+                    self._successes = 0
+
+        super().release(started_at, is_success)
+
+
+__all__ = [
+    "ConcurrencyLimiter",
+    "AIMDLimiter",
+]
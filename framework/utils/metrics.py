@@ -0,0 +1,147 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+
+# Upper bounds (seconds) of the latency buckets, the last bucket counts everything above.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0,
+)
+
+
+class LatencyHistogram:
+    """
+    A latency histogram with fixed buckets, the counts are kept in one array. \n
+    Recording is a binary search and an increment, it does not allocate.
+    The quantiles of a snapshot are the upper bounds of the buckets they fall into.
+    """
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self._bounds = bounds
+        self._counts = array("Q", bytes(8 * (len(bounds) + 1)))
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def record(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        if value > self._max:
+            self._max = value
+
+    def quantile(self, q: float) -> float:
+        if self._count == 0:
+            return 0.0
+
+        rank = q * self._count
+        total = 0
+        for index, count in enumerate(self._counts):
+            total += count
+            if total >= rank:
+                return self._bounds[index] if index < len(self._bounds) else self._max
+        return self._max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self._count,
+            "sum": self._sum,
+            "mean": self._sum / self._count if self._count else 0.0,
+            "max": self._max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip((*self._bounds, float("inf")), self._counts)),
+        }
+
+    def reset(self) -> None:
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+
+class QueueProbe:
+    """
+    Enqueue timestamps and depth of a queue, fed by the queue with every item put into and taken from its memory. \n
+    The timestamps are kept in FIFO order next to the items, so the wait of an item is known when it is taken without
+    marking the item. A queue that is FIFO per key (e.g. per priority lane) gives the key of each item with key_getter. \n
+    param on_wait: Called with every item taken and its wait (seconds), e.g. to record the wait per item type.
+    """
+    def __init__(
+            self,
+            key_getter: Callable[[Any], Hashable] | None = None,
+            on_wait: Callable[[Any, float], None] | None = None,
+    ) -> None:
+        self._key_getter = key_getter
+        self._on_wait = on_wait
+
+        self._fifo: deque[float] = deque() # The timestamps if there is no key_getter.
+        self._timestamps: dict[Hashable, deque[float]] = {}
+        self._depth = 0
+        self._max_depth = 0
+        self._put_count = 0
+        self.wait = LatencyHistogram()
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def _get_timestamps(self, item: Any) -> deque[float]:
+        if self._key_getter is None:
+            return self._fifo
+
+        key = self._key_getter(item)
+        timestamps = self._timestamps.get(key)
+        if timestamps is None:
+            timestamps = self._timestamps[key] = deque()
+        return timestamps
+
+    def put(self, item: Any) -> None:
+        self._get_timestamps(item).append(monotonic())
+        self._put_count += 1
+        depth = self._depth = self._depth + 1
+        if depth > self._max_depth:
+            self._max_depth = depth
+
+    def get(self, item: Any) -> None:
+        timestamps = self._get_timestamps(item)
+        if not timestamps:
+            return
+
+        wait = monotonic() - timestamps.popleft()
+        self._depth -= 1
+        self.wait.record(wait)
+        if self._on_wait is not None:
+            self._on_wait(item, wait)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "depth": self._depth,
+            "max_depth": self._max_depth,
+            "put": self._put_count,
+            "wait": self.wait.snapshot(),
+        }
+
+    def reset(self) -> None:
+        self._max_depth = self._depth
+        self._put_count = 0
+        self.wait.reset()
+
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "LatencyHistogram",
+    "QueueProbe",
+]
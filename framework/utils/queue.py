@@ -1,18 +1,56 @@
 import asyncio
-from typing import Any, Type
+from collections import deque
+from heapq import heapify, heappop, heappush
+from math import inf
+from typing import Any, Callable, Iterator, Type
+
+from .metrics import QueueProbe
+from .spill import SpillFile
+from ..constants.event import OVERFLOW_POLICY, OVERFLOW_POLICIES
 
 
 class TypedAsyncQueue(asyncio.Queue):
-    def __init__(self, allowed_type: Type[Any], maxsize: int = 0):
+    """
+    param probe: Fed with every item put into and taken from the queue, to measure its depth and the wait of the items.
+    """
+    def __init__(self, allowed_type: Type[Any], maxsize: int = 0, probe: QueueProbe | None = None):
         self._allowed_type = allowed_type
+        self._probe = probe
         super().__init__(maxsize)
 
-    async def bulk_put(self, items: tuple[Any, ...]) -> None:
+    @property
+    def probe(self) -> QueueProbe | None:
+        return self._probe
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        if self._probe is not None:
+            self._probe.put(item)
+
+    def _get(self) -> Any:
+        item = super()._get()
+        if self._probe is not None:
+            self._probe.get(item)
+        return item
+
+    def force_put(self, item: Any) -> None:
+        """
+        Put the item without waiting, even if the queue is full.
+        """
+        self._put(item)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
+
+    async def bulk_put(self, items: tuple[Any, ...] | list[Any]) -> None:
         for item in items:
             if not isinstance(item, self._allowed_type):
                 continue
 
-            await self.put(item)
+            if self.full():
+                await self.put(item)
+            else:
+                self.put_nowait(item)
 
     async def auto_put(self, item: tuple[Any, ...] | Any | None) -> None:
         if isinstance(item, tuple):
@@ -22,7 +60,333 @@ class TypedAsyncQueue(asyncio.Queue):
         if isinstance(item, self._allowed_type):
             await self.put(item)
 
+    def _drain(self, items: list[Any], limit: int) -> None:
+        while len(items) < limit and not self.empty():
+            items.append(self.get_nowait())
+
+    async def bulk_get(self, maxsize: int, window: float = 0) -> tuple[Any, ...]:
+        """
+        Wait for at least one item, then drain the items that are already queued in the same wakeup.
+        :param maxsize: Upper limit of the batch. The actual size follows the current queue depth.
+        :param window: If the batch is not full after draining, wait this long (seconds) once and drain again.
+         If this parameter is 0, do not wait.
+        :return: Items in queue order. The caller is responsible for calling task_done for each item.
+        """
+        items = [await self.get()]
+        limit = max(1, maxsize)
+
+        self._drain(items, limit)
+        if window > 0 and len(items) < limit:
+            await asyncio.sleep(window)
+            self._drain(items, limit)
+
+        return tuple(items)
+
+
+class _DeadlineHeap:
+    """
+    The item container of OverflowAsyncQueue in earliest-deadline-first order.
+    The items without a deadline are taken after them, all the items with the same deadline in FIFO order.
+    """
+    def __init__(self, deadline_getter: Callable[[Any], float]) -> None:
+        self._deadline_getter = deadline_getter
+        self._heap: list[tuple[float, int, Any]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Any]:
+        for *_, item in sorted(self._heap):
+            yield item
+
+    def append(self, item: Any) -> None:
+        heappush(self._heap, (self._deadline_getter(item) or inf, self._seq, item))
+        self._seq += 1
+
+    def popleft(self) -> Any:
+        return heappop(self._heap)[2]
+
+    def replace_latest(self, item: Any) -> Any:
+        """
+        Add the item in place of the item that would be taken last (the oldest of them if several have the latest deadline).
+        :return: The replaced item, or the item itself if its deadline is later than the deadlines of all the items.
+        """
+        heap = self._heap
+        deadline = self._deadline_getter(item) or inf
+        index = max(range(len(heap)), key=lambda position: (heap[position][0], -heap[position][1]))
+        if deadline > heap[index][0]:
+            return item
+
+        replaced = heap[index][2]
+        heap[index] = (deadline, self._seq, item)
+        self._seq += 1
+        heapify(heap)
+        return replaced
+
+
+class OverflowAsyncQueue(TypedAsyncQueue):
+    """
+    A typed queue that applies an overflow policy when it is full. \n
+    block: Wait for free space (the behavior of TypedAsyncQueue). \n
+    drop_newest: Discard the incoming item. \n
+    drop_oldest: Discard the oldest queued item to make room for the incoming item. \n
+    spill: Append the incoming item to the spill file, spilled items are moved back into the queue as it drains.
+    If the spill file is full or the item cannot be pickled, the item is discarded. The items left in the spill file
+    by a previous close are put back first. \n
+    Every discarded item is counted in dropped, every spilled item is counted in spilled. \n
+    param on_evict: Called with every item that the queue discards. \n
+    param on_spill: Called with every item written to the spill file, the result is kept with it. \n
+    param on_restore: Called with every item loaded back from the spill file and the result of on_spill,
+    if it returns False, the item is discarded without counting it. \n
+    param deadline_getter: If it is given, the items are taken in earliest-deadline-first order instead of FIFO order,
+    a deadline of 0 means none (see _DeadlineHeap). drop_oldest then discards the item that would be taken last
+    (the latest deadline or no deadline, which may be the incoming item), and the wait measured by the probe is only approximate.
+    """
+    def __init__(
+            self,
+            allowed_type: Type[Any],
+            maxsize: int = 0,
+            policy: str = OVERFLOW_POLICY.BLOCK,
+            spill_file: SpillFile | None = None,
+            on_evict: Callable[[Any], None] | None = None,
+            probe: QueueProbe | None = None,
+            deadline_getter: Callable[[Any], float] | None = None,
+            on_spill: Callable[[Any], Any] | None = None,
+            on_restore: Callable[[Any, Any], bool] | None = None,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: <{policy}>")
+        if policy == OVERFLOW_POLICY.SPILL and spill_file is None:
+            raise ValueError(f"In <{OVERFLOW_POLICY.SPILL}> overflow policy, the spill_file parameter cannot be none")
+
+        self._deadline_getter = deadline_getter
+        super().__init__(allowed_type, maxsize, probe)
+        self._policy = policy
+        self._spill_file = spill_file
+        self._on_evict = on_evict
+        self._on_spill = on_spill
+        self._on_restore = on_restore
+
+        self.dropped = 0
+        self.spilled = 0
+        if spill_file is not None and len(spill_file):
+            self._unfinished_tasks += len(spill_file)
+            self._finished.clear()
+            self._refill()
+
+    def _init(self, maxsize: int) -> None:
+        if self._deadline_getter is None:
+            super()._init(maxsize)
+        else:
+            self._queue = _DeadlineHeap(self._deadline_getter)
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @property
+    def spill_size(self) -> int:
+        if self._spill_file is None:
+            return 0
+        return len(self._spill_file)
+
+    def _refill(self) -> None:
+        spill_file = self._spill_file
+        while len(spill_file) and not self.full():
+            try:
+                token, item = spill_file.pop()
+            except IndexError:
+                break
+            if self._on_restore is None or self._on_restore(item, token):
+                self._put(item)
+            else:
+                self.task_done()
+
+        lost, spill_file.lost = spill_file.lost, 0
+        for _ in range(lost):
+            self.task_done()
+        self.dropped += lost
+
+    def _get(self) -> Any:
+        item = super()._get()
+        if self._spill_file is not None and len(self._spill_file): # The queue stays full while the spill file is not empty.
+            self._refill()
+        return item
+
+    def _evict(self, item: Any) -> None:
+        if self._on_evict is not None:
+            self._on_evict(item)
+
+    def _spill(self, item: Any) -> None:
+        token = None if self._on_spill is None else self._on_spill(item)
+        if not self._spill_file.push((token, item)):
+            self._evict(item)
+            self.dropped += 1
+            return
+
+        self.spilled += 1
+        self._unfinished_tasks += 1
+        self._finished.clear()
+
+    def put_nowait(self, item: Any) -> None:
+        if self._policy == OVERFLOW_POLICY.BLOCK or not self.full():
+            super().put_nowait(item)
+            return
+
+        if self._policy == OVERFLOW_POLICY.DROP_NEWEST:
+            self._evict(item)
+            self.dropped += 1
+        elif self._policy == OVERFLOW_POLICY.DROP_OLDEST and self._deadline_getter is not None:
+            evicted = self._queue.replace_latest(item)
+            if evicted is not item and self._probe is not None:
+                self._probe.get(evicted)
+                self._probe.put(item)
+            self._evict(evicted)
+            self.dropped += 1
+        elif self._policy == OVERFLOW_POLICY.DROP_OLDEST:
+            self._evict(self.get_nowait())
+            self.task_done()
+            self.dropped += 1
+            super().put_nowait(item)
+        else:
+            self._spill(item)
+
+    async def put(self, item: Any) -> None:
+        if self._policy == OVERFLOW_POLICY.BLOCK:
+            await super().put(item)
+            return
+
+        self.put_nowait(item)
+
+    def close(self, keep_spill: bool = True) -> None:
+        """
+        :param keep_spill: Keep the items of the spill file for the next queue with the same spill file, otherwise discard them.
+        """
+        if self._spill_file is None:
+            return
+        if keep_spill:
+            self._spill_file.close()
+        else:
+            self._spill_file.clear()
+
+
+class _PriorityLanes:
+    """
+    The item container of PriorityAsyncQueue, one FIFO lane per priority.
+    """
+    def __init__(self, priority_getter: Callable[[Any], int], starvation_limit: int) -> None:
+        self._priority_getter = priority_getter
+        self._starvation_limit = starvation_limit
+
+        self._lanes: dict[int, deque[Any]] = {}
+        self._order: list[int] = [] # Priorities in descending order.
+        self._size = 0
+        self._streak = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        for priority in self._order:
+            yield from self._lanes[priority]
+
+    def append(self, item: Any) -> None:
+        priority = self._priority_getter(item)
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+            self._order.append(priority)
+            self._order.sort(reverse=True)
+
+        lane.append(item)
+        self._size += 1
+
+    def popleft(self) -> Any:
+        first: deque[Any] | None = None
+        second: deque[Any] | None = None
+        for priority in self._order:
+            lane = self._lanes[priority]
+            if not lane:
+                continue
+            if first is None:
+                first = lane
+                continue
+            second = lane
+            break
+
+        if first is None:
+            raise IndexError("pop from an empty queue")
+
+        if second is None:
+            self._streak = 0
+            lane = first
+        elif self._starvation_limit and self._streak >= self._starvation_limit:
+            self._streak = 0
+            lane = second
+        else:
+            self._streak += 1
+            lane = first
+
+        self._size -= 1
+        return lane.popleft()
+
+
+class PriorityAsyncQueue(TypedAsyncQueue):
+    """
+    A typed queue with one FIFO lane per priority, the items in higher lanes are taken first. \n
+    param priority_getter: Get the priority of an item. \n
+    param starvation_limit: After this many items in a row are taken from a higher lane while a lower lane is waiting,
+    the next item is taken from the next lower lane. If this parameter is 0, lower lanes may starve. \n
+    param unbounded_priority: Items with at least this priority are put even if the queue is full.
+    If this parameter is none, all items are subject to maxsize. \n
+    param put_hook: Called with every item accepted into the queue (e.g. to journal it). \n
+    param probe: See TypedAsyncQueue, give it the priority_getter as key_getter, since the queue is only FIFO in each lane.
+    """
+    def __init__(
+            self,
+            allowed_type: Type[Any],
+            maxsize: int = 0,
+            priority_getter: Callable[[Any], int] = lambda item: 0,
+            starvation_limit: int = 0,
+            unbounded_priority: int | None = None,
+            put_hook: Callable[[Any], None] | None = None,
+            probe: QueueProbe | None = None,
+    ):
+        self._priority_getter = priority_getter
+        self._starvation_limit = max(0, starvation_limit)
+        self._unbounded_priority = unbounded_priority
+        self._put_hook = put_hook
+        super().__init__(allowed_type, maxsize, probe)
+
+    def _init(self, maxsize: int) -> None:
+        self._queue = _PriorityLanes(self._priority_getter, self._starvation_limit)
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        if self._put_hook is not None:
+            self._put_hook(item)
+
+    def _is_unbounded(self, item: Any) -> bool:
+        return self._unbounded_priority is not None and self._priority_getter(item) >= self._unbounded_priority
+
+    def put_nowait(self, item: Any) -> None:
+        if not self._is_unbounded(item) or not self.full():
+            super().put_nowait(item)
+            return
+
+        self.force_put(item)
+
+    async def put(self, item: Any) -> None:
+        if self._is_unbounded(item):
+            self.put_nowait(item)
+            return
+
+        await super().put(item)
+
 
 __all__ = [
     "TypedAsyncQueue",
+    "OverflowAsyncQueue",
+    "PriorityAsyncQueue",
 ]
@@ -0,0 +1,60 @@
+import struct
+import zlib
+from typing import BinaryIO, Iterator
+
+
+_RECORD_HEADER = struct.Struct("<II") # Payload size, CRC32 of the payload.
+
+RECORD_HEADER_SIZE = _RECORD_HEADER.size
+
+
+def pack_record(payload: bytes) -> bytes:
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_records(buffer: bytes | bytearray | memoryview, position: int = 0, end: int = -1) -> Iterator[tuple[int, bytes | memoryview]]:
+    """
+    Read the records of the buffer from the position, until the end, a zero size header (the unused tail of a preallocated file),
+    a torn record or a checksum mismatch.
+    :param end: End of the records in the buffer, the end of the buffer if it is negative.
+    :return: (End position of the record, payload) pairs.
+    """
+    if end < 0:
+        end = len(buffer)
+
+    while position + _RECORD_HEADER.size <= end:
+        size, checksum = _RECORD_HEADER.unpack_from(buffer, position)
+        start = position + _RECORD_HEADER.size
+        if size == 0 or start + size > end:
+            return
+
+        payload = buffer[start:start + size]
+        if zlib.crc32(payload) != checksum:
+            return
+
+        position = start + size
+        yield position, payload
+
+
+def read_record(file: BinaryIO) -> bytes | None:
+    """
+    Read the record at the current position of the file.
+    :return: The payload, none at the end of the records or if the record is torn or corrupted.
+    """
+    header = file.read(_RECORD_HEADER.size)
+    if len(header) < _RECORD_HEADER.size:
+        return None
+
+    size, checksum = _RECORD_HEADER.unpack(header)
+    payload = file.read(size)
+    if size == 0 or len(payload) < size or zlib.crc32(payload) != checksum:
+        return None
+    return payload
+
+
+__all__ = [
+    "RECORD_HEADER_SIZE",
+    "pack_record",
+    "iter_records",
+    "read_record",
+]
@@ -0,0 +1,50 @@
+from dataclasses import MISSING, fields
+from inspect import Parameter, signature
+from types import MemberDescriptorType
+from typing import Any
+
+
+def fast_init(cls: type) -> type:
+    """
+    Replace the __init__ of a frozen slotted dataclass (@dataclass(frozen=True, slots=True)) by one that sets the slots
+    through their member descriptors, instead of object.__setattr__ for each field. Apply it above the dataclass decorator. \n
+    Only classes whose fields are all plain positional fields are changed: a class with keyword-only fields, default factories,
+    InitVar or init=False fields keeps the __init__ generated by dataclass. Subclasses are not changed, they apply it themselves.
+    """
+    init_fields = fields(cls)
+    parameters = list(signature(cls.__init__).parameters.values())[1:]
+    if [parameter.name for parameter in parameters] != [field.name for field in init_fields]:
+        return cls
+    if any(parameter.kind is not Parameter.POSITIONAL_OR_KEYWORD for parameter in parameters):
+        return cls
+    if any(field.default_factory is not MISSING for field in init_fields):
+        return cls
+
+    namespace: dict[str, Any] = {}
+    arguments: list[str] = []
+    lines: list[str] = []
+    for index, field in enumerate(init_fields):
+        member = getattr(cls, field.name, None)
+        if not isinstance(member, MemberDescriptorType):
+            return cls
+        namespace[f"_set{index}"] = member.__set__
+        if field.default is MISSING:
+            arguments.append(field.name)
+        else:
+            namespace[f"_default{index}"] = field.default
+            arguments.append(f"{field.name}=_default{index}")
+        lines.append(f"_set{index}(self, {field.name})")
+    if hasattr(cls, "__post_init__"):
+        lines.append("self.__post_init__()")
+
+    source = f"def __init__({', '.join(['self', *arguments])}):\n" + "\n".join(f"    {line}" for line in lines or ["pass"])
+    exec(source, namespace)
+    init = namespace["__init__"]
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    cls.__init__ = init
+    return cls
+
+
+__all__ = [
+    "fast_init",
+]
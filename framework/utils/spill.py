@@ -0,0 +1,310 @@
+import os
+import pickle
+import struct
+from collections import deque
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from .record import iter_records, pack_record, read_record
+
+
+_BATCH_HEADER = struct.Struct("<I") # Item count, prefix of the payload of every record.
+_CURSOR = struct.Struct("<qQI") # Segment index, offset of the batch being read, items of the batch already taken.
+
+SEGMENT_SUFFIX = ".spill"
+CURSOR_FILENAME = "cursor"
+
+
+def _pack_batch(items: list[bytes]) -> bytes:
+    return pack_record(_BATCH_HEADER.pack(len(items)) + b"".join(items))
+
+
+def _load_batch(payload: bytes) -> list[Any]:
+    count, = _BATCH_HEADER.unpack_from(payload)
+    stream = BytesIO(payload)
+    stream.seek(_BATCH_HEADER.size)
+    unpickler = pickle.Unpickler(stream)
+    return [unpickler.load() for _ in range(count)]
+
+
+class _Segment:
+    __slots__ = ("index", "path", "size", "unread")
+
+    def __init__(self, index: int, path: Path, size: int = 0, unread: int = 0) -> None:
+        self.index = index
+        self.path = path
+        self.size = size
+        self.unread = unread # Items in the batches after the read position.
+
+
+class SpillFile:
+    """
+    A bounded FIFO of picklable objects stored in segment files of a directory. \n
+    The objects are pickled when they are pushed and written in batches of batch_size, one record (see utils.record) per batch,
+    and they are read back one batch at a time. When the reader has caught up with the files, it takes the batch in memory directly.
+    A segment file is rotated at segment_maxbytes and deleted once it is read, so only the part that the reader is behind
+    takes disk space, up to max_bytes. \n
+    close writes the objects in memory and the read position into the directory, they are read again when it is reopened.
+    """
+    def __init__(self, directory: Path, max_bytes: int, segment_maxbytes: int = 4 * 1024 * 1024, batch_size: int = 256) -> None:
+        self._directory = directory
+        self._max_bytes = max(0, max_bytes)
+        self._segment_maxbytes = max(1, segment_maxbytes)
+        self._batch_size = max(1, batch_size)
+
+        self._segments: deque[_Segment] = deque()
+        self._write_file: BinaryIO | None = None # Of the last segment.
+        self._read_file: BinaryIO | None = None # Of the first segment.
+        self._read_pos = 0
+        self._skip = 0 # Items of the first batch that were taken before the directory was reopened.
+        self._bytes = 0
+        self._stored = 0
+
+        self._head: deque[Any] = deque() # Read from the files, not taken yet.
+        self._head_source: tuple[int, int] | None = None # (Segment index, offset) of the batch of the head, none if it was in memory.
+        self._head_taken = 0
+        self._tail: list[bytes] = [] # Pickled, not written yet.
+        self._tail_bytes = 0
+
+        self.lost = 0 # Items of corrupted batches, reset by the reader.
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self._head) + self._stored + len(self._tail)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        return self._bytes + self._tail_bytes
+
+    def _segment_path(self, index: int) -> Path:
+        return self._directory / f"{index}{SEGMENT_SUFFIX}"
+
+    def _read_cursor(self) -> tuple[int, int, int] | None:
+        try:
+            with open(self._directory / CURSOR_FILENAME, "rb") as f:
+                payload = read_record(f)
+            return None if payload is None else _CURSOR.unpack(payload)
+        except (OSError, struct.error):
+            return None
+
+    def _write_cursor(self, cursor: tuple[int, int, int] | None) -> None:
+        path = self._directory / CURSOR_FILENAME
+        if cursor is None:
+            path.unlink(missing_ok=True)
+            return
+
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(pack_record(_CURSOR.pack(*cursor)))
+        os.replace(temp_path, path)
+
+    def _open(self) -> None:
+        if not self._directory.is_dir():
+            return
+
+        indexes: list[int] = []
+        for path in self._directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                indexes.append(int(path.stem))
+            except ValueError:
+                continue
+
+        cursor = self._read_cursor()
+        for index in sorted(indexes):
+            path = self._segment_path(index)
+            if cursor is not None and index < cursor[0]:
+                path.unlink(missing_ok=True)
+                continue
+
+            data = path.read_bytes()
+            offset = cursor[1] if cursor is not None and index == cursor[0] else 0
+            unread = sum(_BATCH_HEADER.unpack_from(payload)[0] for _, payload in iter_records(data, offset))
+            if not unread:
+                path.unlink(missing_ok=True)
+                continue
+
+            if not self._segments and cursor is not None and index == cursor[0]:
+                self._read_pos = offset
+                self._skip = min(cursor[2], unread)
+            self._segments.append(_Segment(index, path, len(data), unread))
+            self._bytes += len(data)
+            self._stored += unread
+
+        self._stored -= self._skip
+
+    def _new_segment(self, index: int) -> _Segment:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return _Segment(index, self._segment_path(index))
+
+    def _write_batch(self) -> None:
+        record = _pack_batch(self._tail)
+        segment = self._segments[-1] if self._write_file is not None else None
+        if segment is None or segment.size + len(record) > self._segment_maxbytes:
+            if self._write_file is not None:
+                self._write_file.close()
+            segment = self._new_segment(self._segments[-1].index + 1 if self._segments else 0)
+            self._segments.append(segment)
+            self._write_file = open(segment.path, "wb")
+
+        self._write_file.write(record)
+        self._write_file.flush() # Visible to the reader.
+        segment.size += len(record)
+        segment.unread += len(self._tail)
+        self._bytes += len(record)
+        self._stored += len(self._tail)
+        self._tail.clear()
+        self._tail_bytes = 0
+
+    def push(self, item: Any) -> bool:
+        """
+        :return: False if the item cannot be pickled or the spill file is full.
+        """
+        try:
+            data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        if self._bytes + self._tail_bytes + len(data) > self._max_bytes:
+            return False
+
+        self._tail.append(data)
+        self._tail_bytes += len(data)
+        if len(self._tail) >= self._batch_size:
+            self._write_batch()
+        return True
+
+    def _drop_segment(self) -> None:
+        segment = self._segments.popleft()
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+        if not self._segments and self._write_file is not None:
+            self._write_file.close()
+            self._write_file = None
+        self._read_pos = 0
+        self._bytes -= segment.size
+        segment.path.unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        """
+        Fill the empty head with the next batch of the files, or with the batch in memory if the files are read.
+        """
+        while self._segments:
+            segment = self._segments[0]
+            if not segment.unread: # Corrupted.
+                self._drop_segment()
+                continue
+
+            if self._read_file is None:
+                self._read_file = open(segment.path, "rb")
+                self._read_file.seek(self._read_pos)
+            offset = self._read_file.tell()
+            payload = read_record(self._read_file)
+            try:
+                items = None if payload is None else _load_batch(payload)
+            except Exception:
+                items = None
+            if items is None or len(items) > segment.unread: # Corrupted, the rest of the segment is lost.
+                self.lost += segment.unread - self._skip
+                self._stored -= segment.unread - self._skip
+                self._skip = 0
+                segment.unread = 0
+                continue
+
+            skip, self._skip = self._skip, 0
+            segment.unread -= len(items)
+            self._stored -= len(items) - skip
+            self._head.extend(items[skip:])
+            self._head_source = (segment.index, offset)
+            self._head_taken = skip
+            if self._head:
+                return
+
+        if self._tail:
+            self._head.extend(pickle.loads(data) for data in self._tail)
+            self._head_source = None
+            self._head_taken = 0
+            self._tail.clear()
+            self._tail_bytes = 0
+
+    def pop(self) -> Any:
+        """
+        :raise IndexError: The spill file is empty, or its remaining items are lost.
+        """
+        if not self._head:
+            self._load()
+            if not self._head:
+                raise IndexError("pop from an empty spill file")
+
+        self._head_taken += 1
+        item = self._head.popleft()
+        if not self._head:
+            while self._segments and not self._segments[0].unread:
+                self._drop_segment()
+        return item
+
+    def close(self) -> None:
+        """
+        Keep the remaining items in the directory.
+        """
+        if self._tail:
+            self._write_batch()
+        if self._write_file is not None:
+            self._write_file.close()
+            self._write_file = None
+        if self._read_file is not None:
+            self._read_pos = self._read_file.tell()
+            self._read_file.close()
+            self._read_file = None
+
+        cursor: tuple[int, int, int] | None = None
+        if self._head and self._head_source is not None:
+            cursor = (*self._head_source, self._head_taken)
+        elif self._head: # Taken from memory, before every batch in the files.
+            segment = self._new_segment(self._segments[0].index - 1 if self._segments else 0)
+            segment.path.write_bytes(_pack_batch([pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL) for item in self._head]))
+            cursor = (segment.index, 0, 0)
+        elif self._segments:
+            cursor = (self._segments[0].index, self._read_pos, self._skip)
+        if cursor is not None or self._directory.is_dir():
+            self._write_cursor(cursor)
+
+        self._reset()
+
+    def clear(self) -> None:
+        """
+        Discard the remaining items and delete the files.
+        """
+        if self._write_file is not None:
+            self._write_file.close()
+            self._write_file = None
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+        for segment in self._segments:
+            segment.path.unlink(missing_ok=True)
+        if self._directory.is_dir():
+            self._write_cursor(None)
+
+        self._reset()
+
+    def _reset(self) -> None:
+        self._segments.clear()
+        self._read_pos = 0
+        self._skip = 0
+        self._bytes = 0
+        self._stored = 0
+        self._head.clear()
+        self._head_source = None
+        self._head_taken = 0
+        self._tail.clear()
+        self._tail_bytes = 0
+
+
+__all__ = [
+    "SpillFile",
+]
@@ -0,0 +1,136 @@
+import re
+from typing import Any, Callable
+
+
+TOPIC_SEPARATOR = "."
+TOPIC_WILDCARD = "*" # Matches exactly one segment.
+TOPIC_MULTI_WILDCARD = "#" # Matches the rest of the topic, zero or more segments. Only allowed as the last segment.
+
+
+def split_topic_pattern(pattern: str) -> list[str]:
+    """
+    :raise ValueError: The pattern is empty, or the multi-segment wildcard is not its last segment.
+    """
+    if not isinstance(pattern, str) or not pattern:
+        raise ValueError(f"<{pattern}> is not a non-empty topic pattern")
+
+    segments = pattern.split(TOPIC_SEPARATOR)
+    if TOPIC_MULTI_WILDCARD in segments[:-1]:
+        raise ValueError(f"<{pattern}>: <{TOPIC_MULTI_WILDCARD}> is only allowed as the last segment")
+    return segments
+
+
+def compile_topic_pattern(pattern: str) -> Callable[[str], bool]:
+    """
+    :return: A function that tells whether a topic matches the pattern.
+    """
+    segments = split_topic_pattern(pattern)
+    is_multi = segments[-1] == TOPIC_MULTI_WILDCARD
+    if is_multi:
+        segments = segments[:-1]
+    if not segments:
+        return lambda topic: True
+
+    regex = re.escape(TOPIC_SEPARATOR).join(r"[^.]*" if segment == TOPIC_WILDCARD else re.escape(segment) for segment in segments)
+    if is_multi:
+        regex += r"(?:\..*)?"
+    match = re.compile(regex, re.DOTALL).fullmatch
+    return lambda topic: match(topic) is not None
+
+
+class _TopicNode:
+    __slots__ = ("children", "values", "rest_values")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TopicNode] = {}
+        self.values: list[Any] = [] # Patterns that end at this node.
+        self.rest_values: list[Any] = [] # Patterns that end with the multi-segment wildcard after this node.
+
+
+class TopicTrie:
+    """
+    Topic patterns in a trie of their segments, matching a topic walks its segments whatever the number of patterns.
+    """
+    def __init__(self) -> None:
+        self._root = _TopicNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: Any) -> None:
+        """
+        :raise ValueError: The pattern is not valid, see split_topic_pattern.
+        """
+        segments = split_topic_pattern(pattern)
+        node = self._root
+        for segment in segments[:-1]:
+            node = node.children.setdefault(segment, _TopicNode())
+
+        if segments[-1] == TOPIC_MULTI_WILDCARD:
+            node.rest_values.append(value)
+        else:
+            node.children.setdefault(segments[-1], _TopicNode()).values.append(value)
+        self._size += 1
+
+    def _remove(self, node: _TopicNode, predicate: Callable[[Any], bool]) -> bool:
+        """
+        :return: Whether the node is empty after the removal.
+        """
+        for values in (node.values, node.rest_values):
+            kept = [value for value in values if not predicate(value)]
+            self._size -= len(values) - len(kept)
+            values[:] = kept
+
+        for segment, child in tuple(node.children.items()):
+            if self._remove(child, predicate):
+                del node.children[segment]
+        return not (node.children or node.values or node.rest_values)
+
+    def remove(self, predicate: Callable[[Any], bool]) -> None:
+        """
+        Remove the values of all the patterns for which the predicate is true.
+        """
+        self._remove(self._root, predicate)
+
+    def clear(self) -> None:
+        self._root = _TopicNode()
+        self._size = 0
+
+    def match(self, topic: str) -> list[Any]:
+        """
+        :return: The values of the patterns that match the topic, in no particular order. A value added with
+         several matching patterns is returned once for each of them.
+        """
+        matched: list[Any] = []
+        nodes = [self._root]
+        for segment in topic.split(TOPIC_SEPARATOR):
+            next_nodes: list[_TopicNode] = []
+            for node in nodes:
+                if node.rest_values:
+                    matched.extend(node.rest_values)
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                if segment != TOPIC_WILDCARD:
+                    child = node.children.get(TOPIC_WILDCARD)
+                    if child is not None:
+                        next_nodes.append(child)
+            nodes = next_nodes
+            if not nodes:
+                return matched
+
+        for node in nodes:
+            matched.extend(node.values)
+            matched.extend(node.rest_values)
+        return matched
+
+
+__all__ = [
+    "TOPIC_SEPARATOR",
+    "TOPIC_WILDCARD",
+    "TOPIC_MULTI_WILDCARD",
+    "split_topic_pattern",
+    "compile_topic_pattern",
+    "TopicTrie",
+]
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+from random import getrandbits
+from threading import Lock
+from typing import Any
+
+
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+
+def new_trace_id() -> int:
+    return getrandbits(128) or 1
+
+
+def new_span_id() -> int:
+    return getrandbits(64) or 1
+
+
+def _to_any_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)} # int64 is a string in the OTLP JSON encoding.
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _to_any_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """
+    A finished span. The ids are kept as integers and the timestamps as nanoseconds since the epoch,
+    they are only formatted when the span is exported.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "is_error")
+
+    def __init__(
+            self,
+            name: str,
+            trace_id: int,
+            span_id: int,
+            parent_span_id: int,
+            start_ns: int,
+            end_ns: int,
+            attributes: dict[str, Any],
+            is_error: bool = False,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_span_id = parent_span_id
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.attributes = attributes
+        self.is_error = is_error
+
+    def to_otlp(self) -> dict[str, Any]:
+        """
+        :return: The span in the OTLP/JSON encoding (hex ids, string timestamps).
+        """
+        span = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(max(self.start_ns, self.end_ns)),
+            "attributes": _to_attributes(self.attributes),
+            "status": {"code": STATUS_CODE_ERROR if self.is_error else STATUS_CODE_OK},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = f"{self.parent_span_id:016x}"
+        return span
+
+
+class SpanExporter:
+    """
+    Export finished spans to a JSON-lines file. Every flush appends one line, an OTLP ExportTraceServiceRequest
+    in the JSON encoding (the format of the OpenTelemetry file exporter), so the file can be loaded by OTLP tools. \n
+    Spans are buffered in memory until they are flushed. If the buffer is full, new spans are discarded and counted in dropped. \n
+    param service_name: The service.name resource attribute. \n
+    param scope_name: The name of the instrumentation scope of the spans.
+    """
+    def __init__(self, path: Path, service_name: str, scope_name: str, buffer_maxsize: int) -> None:
+        self._path = path
+        self._resource = {"attributes": _to_attributes({"service.name": service_name})}
+        self._scope = {"name": scope_name}
+        self._buffer_maxsize = max(1, buffer_maxsize)
+
+        self._buffer: list[Span] = []
+        self._lock = Lock() # Written in worker threads.
+        self.dropped = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def add(self, span: Span) -> None:
+        if len(self._buffer) >= self._buffer_maxsize:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+
+    def drain(self) -> list[Span]:
+        """
+        Take the buffered spans, to write them elsewhere (e.g. in a worker thread).
+        """
+        spans, self._buffer = self._buffer, []
+        return spans
+
+    def write(self, spans: list[Span]) -> None:
+        if not spans:
+            return
+
+        request = {
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{
+                    "scope": self._scope,
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }],
+        }
+        with self._lock:
+            with open(self._path, "a", encoding="utf8") as f:
+                f.write(json.dumps(request, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def flush(self) -> int:
+        """
+        :return: The number of spans written.
+        """
+        spans = self.drain()
+        self.write(spans)
+        return len(spans)
+
+
+__all__ = [
+    "new_trace_id",
+    "new_span_id",
+    "Span",
+    "SpanExporter",
+]
@@ -1,25 +1,70 @@
 import asyncio
 from typing import Any, Callable, Coroutine
 
+from .limiter import ConcurrencyLimiter
 from .lock import AsyncCompletionLock
 
 
 class ProducerConsumerWorker:
+    """
+    param max_concurrency: The maximum number of consumer tasks in flight. If this parameter is 0, there is no limit.
+    The producer waits for a free slot before it creates the next consumer task. \n
+    param limiter: Use this limiter instead of a fixed one created from max_concurrency (e.g. AIMDLimiter).
+    A consumer task that returns False or raises is reported to the limiter as a failure. \n
+    param serial: If this parameter is true, no consumer task is created, the consumer loop awaits the consumer function inline,
+    so the events are consumed one by one in the order they were produced. max_concurrency is ignored in this mode.
+    """
     def __init__(
             self,
             producer_func: Callable[[], Coroutine[None, None, Any | None]],
             consumer_func: Callable[[...], Coroutine[None, None, Any]],
             consumer_queue_maxsize: int = 0,
+            max_concurrency: int = 0,
+            serial: bool = False,
+            limiter: ConcurrencyLimiter | None = None,
     ) -> None:
         self._producer_func = producer_func
         self._consumer_func = consumer_func
+        self._max_concurrency = max(0, max_concurrency)
+        self._serial = serial
+        self._limiter = limiter
 
         self._run_sign: bool = False
         self._completion_lock: AsyncCompletionLock | None = None
         self._producer_loop_task: asyncio.Task | None = None
-        self._consumer_queue: asyncio.Queue[asyncio.Task[Any] | None] = asyncio.Queue(consumer_queue_maxsize)
+        self._consumer_queue: asyncio.Queue[asyncio.Task[Any] | Any | None] = asyncio.Queue(consumer_queue_maxsize)
         self._consumer_loop_task: asyncio.Task | None = None
 
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @property
+    def serial(self) -> bool:
+        return self._serial
+
+    @property
+    def limiter(self) -> ConcurrencyLimiter | None:
+        return self._limiter
+
+    @staticmethod
+    def _release(limiter: ConcurrencyLimiter, started_at: float, consumer: asyncio.Task[Any]) -> None:
+        if consumer.cancelled():
+            limiter.release(started_at)
+            return
+
+        limiter.release(started_at, consumer.exception() is None and consumer.result() is not False)
+
+    async def _new_consumer(self, event: Any) -> asyncio.Task[Any]:
+        limiter = self._limiter
+        if limiter is None:
+            return asyncio.create_task(self._consumer_func(event))
+
+        started_at = await limiter.acquire()
+        consumer = asyncio.create_task(self._consumer_func(event))
+        consumer.add_done_callback(lambda task: self._release(limiter, started_at, task))
+        return consumer
+
     async def _producer_loop(self) -> None:
         while self._run_sign:
             event = await self._producer_func()
@@ -27,18 +72,22 @@ class ProducerConsumerWorker:
                 continue
 
             async with self._completion_lock:
-                consumer = asyncio.create_task(self._consumer_func(event))
-                await self._consumer_queue.put(consumer)
+                if self._serial:
+                    await self._consumer_queue.put(event)
+                    continue
+
+                await self._consumer_queue.put(await self._new_consumer(event))
 
     async def _consumer_loop(self) -> None:
         while True:
-            if (not self._run_sign) and self._consumer_queue.empty():
-                break
-
             consumer = await self._consumer_queue.get()
             self._consumer_queue.task_done()
 
-            if consumer is None:
+            if consumer is None: # Put by stop after the last consumer of the producer.
+                break
+
+            if self._serial:
+                await self._consumer_func(consumer)
                 continue
 
             await consumer
@@ -47,7 +96,7 @@ class ProducerConsumerWorker:
         while not self._consumer_queue.empty():
             consumer = self._consumer_queue.get_nowait()
             self._consumer_queue.task_done()
-            if consumer is None:
+            if consumer is None or self._serial:
                 continue
 
             consumer.cancel()
@@ -65,6 +114,8 @@ class ProducerConsumerWorker:
 
         self._run_sign = True
         self._completion_lock = AsyncCompletionLock()
+        if self._max_concurrency and self._limiter is None and not self._serial:
+            self._limiter = ConcurrencyLimiter(self._max_concurrency)
         self._producer_loop_task = asyncio.create_task(self._producer_loop())
         self._consumer_loop_task = asyncio.create_task(self._consumer_loop())
 
@@ -21,9 +21,9 @@ counter.load(save_filepath)
 
 
 if config.get("auto_save"):
-    @on_exit
-    @on_autorun(trigger=IntervalTrigger(config.get("save_interval")))
-    async def _save() -> None:
+    @on_exit(run_in="thread")
+    @on_autorun(trigger=IntervalTrigger(config.get("save_interval")), run_in="thread")
+    def _save() -> None:
         counter.save(save_filepath)
 
 